@@ -1,4 +1,4 @@
-import pathlib
+import pathlib, importlib
 
 HERE = pathlib.Path(__file__).parent
 __version__ = (HERE / "VERSION").read_text().strip()
@@ -10,13 +10,49 @@ from fairpy.families import *
 from fairpy.agents import *
 from fairpy.decorators import *
 
-class items:
-	from fairpy.items.round_robin import round_robin
-	from fairpy.items.max_welfare import max_sum_allocation, max_power_sum_allocation, max_product_allocation, max_minimum_allocation, max_welfare_allocation, max_welfare_allocation_for_families
-	from fairpy.items.leximin import leximin_optimal_allocation, leximin_optimal_allocation_for_families
-	from fairpy.items.one_of_threehalves_mms import bidirectional_bag_filling
-	from fairpy.items.utilitarian_matching import utilitarian_matching
-	from fairpy.items.iterated_maximum_matching import iterated_maximum_matching
-	from fairpy.items.min_sharing import proportional_allocation_with_min_sharing, envyfree_allocation_with_min_sharing, maxproduct_allocation_with_min_sharing
-	from fairpy.items.bounded_sharing import proportional_allocation_with_bounded_sharing, efficient_envyfree_allocation_with_bounded_sharing
-	from fairpy.items.propm_allocation import propm_allocation
+
+class _LazyNamespace:
+	"""
+	A namespace of functions that are imported from their modules only when first accessed,
+	so that the heavy dependencies of the algorithms (cvxpy, networkx, prtpy, ...) are loaded only when they are needed.
+	"""
+	def __init__(self, name:str, modules:dict):
+		"""
+		:param modules: maps each module name to the names of the functions imported from it.
+		"""
+		self._name = name
+		self._module_of = {function: module for module,functions in modules.items() for function in functions}
+
+	def __getattr__(self, function:str):
+		if function.startswith("_") or function not in self._module_of:
+			raise AttributeError(f"'{self._name}' has no attribute '{function}'")
+		value = getattr(importlib.import_module(self._module_of[function]), function)
+		setattr(self, function, value)
+		return value
+
+	def __dir__(self):
+		return sorted(self._module_of)
+
+	def __repr__(self):
+		return f"<lazy namespace {self._name}>"
+
+
+items = _LazyNamespace("fairpy.items", {
+	"fairpy.items.round_robin": ["round_robin", "round_robin_many"],
+	"fairpy.items.max_welfare": ["max_sum_allocation", "max_power_sum_allocation", "max_product_allocation", "max_minimum_allocation", "max_welfare_allocation", "compiled_max_welfare_allocation", "max_welfare_allocation_for_families"],
+	"fairpy.items.leximin": ["leximin_optimal_allocation", "leximin_optimal_allocation_for_families"],
+	"fairpy.items.one_of_threehalves_mms": ["bidirectional_bag_filling"],
+	"fairpy.items.utilitarian_matching": ["utilitarian_matching"],
+	"fairpy.items.iterated_maximum_matching": ["iterated_maximum_matching"],
+	"fairpy.items.min_sharing": ["proportional_allocation_with_min_sharing", "envyfree_allocation_with_min_sharing", "maxproduct_allocation_with_min_sharing"],
+	"fairpy.items.bounded_sharing": ["proportional_allocation_with_bounded_sharing", "efficient_envyfree_allocation_with_bounded_sharing"],
+	"fairpy.items.propm_allocation": ["propm_allocation"],
+})
+
+
+_lazy_functions = _LazyNamespace("fairpy", {
+	"fairpy.criteria": ["fairness_report"],
+})
+
+def __getattr__(name:str):
+	return getattr(_lazy_functions, name)
@@ -12,6 +12,7 @@ from fairpy.cake.valuations  import *
 
 from abc import ABC, abstractmethod
 from typing import *
+import functools
 Item = Any
 Bundle = Set[Item]
 
@@ -371,7 +372,30 @@ class BinaryAgent(Agent):
     Anonymous are 2 agents with a Binary valuation who wants ['x', 'y', 'z'].
     """
     def __init__(self, desired_items:Bundle, name:str=None, duplicity:int=1):
-        super().__init__(BinaryValuation(desired_items), name=name, duplicity=duplicity)
+        """
+        :param desired_items: a set of desired goods, or a BinaryValuation (e.g. a row of BinaryValuationBitsets).
+        """
+        valuation = desired_items if isinstance(desired_items, BinaryValuation) else BinaryValuation(desired_items)
+        super().__init__(valuation, name=name, duplicity=duplicity)
+
+    @staticmethod
+    def list_from_matrix(matrix, items:List[Item]=None)->List['BinaryAgent']:
+        """
+        Construct a list of binary agents from a 0/1 matrix, with a row for each agent and a column for each item.
+        The desired items are stored as packed bits (see BinaryValuationBitsets), which is much smaller than a set per agent.
+        :param items [optional]: the item of each column. Default: 0, 1, 2, ...
+
+        >>> the_list = BinaryAgent.list_from_matrix([[1,0,1],[0,1,1]], items=["x","y","z"])
+        >>> the_list[1]
+        Agent #1 is an agent with a Binary valuation who wants ['y', 'z'].
+        >>> the_list[0].value({"x","y"})
+        1
+        """
+        bitsets = BinaryValuationBitsets(matrix, items)
+        return [
+            BinaryAgent(valuation, name=f"Agent #{index}")
+            for index,valuation in enumerate(bitsets.valuations())
+        ]
 
 
 
@@ -511,6 +535,137 @@ class PiecewiseLinearAgent(Agent):
 
 
 
+class CachedAgent(Agent):
+    """
+    Wraps a cake agent: memoizes its answers to Eval and Mark queries in a bounded LRU cache,
+    and counts the Robertson-Webb queries asked by the algorithm and those that reached the wrapped agent.
+    Useful when the wrapped agent's valuation is expensive to query, and for comparing the query complexity of algorithms.
+
+    >>> a = CachedAgent(PiecewiseConstantAgent([11,22,33,44], "Alice"))
+    >>> a.name(), a.total_value(), a.cake_length()
+    ('Alice', 110, 4)
+    >>> [float(answer) for answer in (a.eval(1,3), a.eval(1,3), a.mark(1,77), a.value([(1,3),(0,1)]))]
+    [55.0, 55.0, 3.5, 66.0]
+    >>> a.query_counts
+    {'eval': 2, 'mark': 1, 'eval_cached': 2, 'mark_cached': 0}
+    >>> a.reset_counts()
+    >>> [float(value) for value in a.partition_values([1,3])], a.query_counts
+    ([11.0, 55.0, 44.0], {'eval': 1, 'mark': 0, 'eval_cached': 2, 'mark_cached': 0})
+
+    A copy (or an unpickled agent) has its own caches, which start empty, and its own counts:
+    >>> import copy, pickle
+    >>> b = copy.deepcopy(a)
+    >>> float(b.eval(0,1)), b.query_counts
+    (11.0, {'eval': 2, 'mark': 0, 'eval_cached': 2, 'mark_cached': 0})
+    >>> a.query_counts
+    {'eval': 1, 'mark': 0, 'eval_cached': 2, 'mark_cached': 0}
+    >>> c = pickle.loads(pickle.dumps(a))
+    >>> float(c.eval(0,1)), c.query_counts
+    (11.0, {'eval': 2, 'mark': 0, 'eval_cached': 2, 'mark_cached': 0})
+    """
+    def __init__(self, agent:Agent, maxsize:int=4096):
+        """
+        :param agent: the agent to wrap.
+        :param maxsize: the maximum number of answers kept in each of the eval and mark caches (None = unbounded).
+        """
+        super().__init__(agent.valuation, name=agent.name(), duplicity=agent.duplicity)
+        self.agent = agent
+        self.maxsize = maxsize
+        self._create_caches()
+        self.reset_counts()
+
+    def _create_caches(self):
+        # The caches wrap bound methods, so they belong to this instance only: they are re-created on copy and unpickling.
+        self._cached_eval = functools.lru_cache(maxsize=self.maxsize)(self._query_eval)
+        self._cached_mark = functools.lru_cache(maxsize=self.maxsize)(self._query_mark)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["_cached_eval"], state["_cached_mark"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._create_caches()
+
+    def _query_eval(self, start:float, end:float)->float:
+        self._queries["eval"] += 1
+        return self.agent.eval(start, end)
+
+    def _query_mark(self, start:float, target_value:float)->float:
+        self._queries["mark"] += 1
+        return self.agent.mark(start, target_value)
+
+    def eval(self, start:float, end:float)->float:
+        self._requests["eval"] += 1
+        return self._cached_eval(start, end)
+
+    def mark(self, start:float, target_value:float)->float:
+        self._requests["mark"] += 1
+        return self._cached_mark(start, target_value)
+
+    def value(self, piece:List[tuple])->float:
+        if piece is None:
+            return 0
+        return sum([self.eval(*interval) for interval in piece])
+
+    def partition_values(self, partition:List[float])->List[float]:
+        cuts = [0] + list(partition) + [self.cake_length()]
+        return [self.eval(cuts[i], cuts[i+1]) for i in range(len(cuts)-1)]
+
+    @property
+    def query_counts(self)->Dict[str,int]:
+        """
+        :return: the number of eval and mark queries answered by the wrapped agent since the last reset,
+                 and the number of those answered from the cache ("eval_cached", "mark_cached").
+        """
+        return {
+            "eval": self._queries["eval"],
+            "mark": self._queries["mark"],
+            "eval_cached": self._requests["eval"] - self._queries["eval"],
+            "mark_cached": self._requests["mark"] - self._queries["mark"],
+        }
+
+    def reset_counts(self):
+        """
+        Resets the query counts; the cached answers are kept.
+        """
+        self._requests = {"eval": 0, "mark": 0}
+        self._queries = {"eval": 0, "mark": 0}
+
+    def clear_cache(self):
+        self._cached_eval.cache_clear()
+        self._cached_mark.cache_clear()
+
+    def __repr__(self):
+        return f"{self.name()} is a cached agent with a {self.valuation}"
+
+
+def count_queries(algorithm:Callable, agents:List[Agent], *args, maxsize:int=4096, **kwargs)->Tuple[Any, Dict[str,int]]:
+    """
+    Runs a cake-cutting algorithm on cached copies of the given agents (see CachedAgent),
+    and counts the Robertson-Webb queries it makes.
+
+    :param algorithm: a function that accepts a list of agents as its first argument; `args` and `kwargs` are passed to it too.
+    :return: the output of the algorithm, and the total query counts of all agents (as in CachedAgent.query_counts).
+
+    >>> from fairpy.cake.last_diminisher import last_diminisher
+    >>> agents = [PiecewiseConstantAgent([1,2,3,4]), PiecewiseConstantAgent([4,3,2,1]), PiecewiseConstantAgent([1,1,1,1])]
+    >>> (allocation, counts) = count_queries(last_diminisher, agents)
+    >>> counts
+    {'eval': 9, 'mark': 5, 'eval_cached': 0, 'mark_cached': 0}
+    """
+    cached_agents = [agent if isinstance(agent, CachedAgent) else CachedAgent(agent, maxsize=maxsize) for agent in agents]
+    for agent in cached_agents:
+        agent.reset_counts()
+    output = algorithm(cached_agents, *args, **kwargs)
+    counts = {"eval": 0, "mark": 0, "eval_cached": 0, "mark_cached": 0}
+    for agent in cached_agents:
+        for query,count in agent.query_counts.items():
+            counts[query] += count
+    return (output, counts)
+
+
 
 
 ######## UTILITY FUNCTIONS #######
@@ -609,6 +764,8 @@ def agent_names_from(input:Any)->List[str]:
     if hasattr(input, "keys"):
         return sorted(input.keys())
     elif hasattr(input, 'num_of_agents'):
+        if getattr(input, 'agent_names', None) is not None:
+            return list(input.agent_names)
         num_of_agents = input.num_of_agents
         return [f"Agent #{i}" for i in range(num_of_agents)]
 
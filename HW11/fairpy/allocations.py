@@ -17,11 +17,13 @@ from collections import defaultdict
 from collections.abc import Iterable
 import fairpy
 from fairpy import ValuationMatrix
+from fairpy.items.valuations import _save_matrix, _open_matrix, _issparse
 from fairpy.bundles import *
 
 
 DEFAULT_PRECISION = 3     # number of significant digits in printing
 DEFAULT_SEPARATOR = ","   # separator between items in printing
+MAX_DENSE_REPR_SIZE = 10**6   # a larger sparse allocation matrix is printed by its non-zero entries only
 
 
 
@@ -38,6 +40,27 @@ class AllocationMatrix:
     >>> z
     [[0.2 0.3 0.5]
      [0.8 0.7 0.5]]
+
+    >>> import os, tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "allocation.npy")
+    >>> z.save(path)
+    >>> AllocationMatrix.open(path)
+    [[0.2 0.3 0.5]
+     [0.8 0.7 0.5]]
+
+    The matrix can also be a scipy.sparse matrix (e.g. the allocation computed for a SparseValuationMatrix);
+    it is kept sparse, and a row is then a sparse row:
+    >>> import scipy.sparse
+    >>> z = AllocationMatrix(scipy.sparse.csr_matrix([[.2,0,1],[.8,1,0]]))
+    >>> float(z[1,0])
+    0.8
+    >>> z[0].toarray()
+    array([[0.2, 0. , 1. ]])
+    >>> z.num_of_sharings()
+    1
+    >>> z
+    [[0.2 0.  1. ]
+     [0.8 1.  0. ]]
     """
 
     def __init__(self, allocation_matrix:np.ndarray):
@@ -45,9 +68,13 @@ class AllocationMatrix:
             allocation_matrix = np.array(allocation_matrix)
         elif isinstance(allocation_matrix,AllocationMatrix):
             allocation_matrix = allocation_matrix._z
+        if _issparse(allocation_matrix):
+            allocation_matrix = allocation_matrix.tocsr()
+            (self.num_of_agents, self.num_of_objects) = allocation_matrix.shape
+        else:
+            self.num_of_agents = len(allocation_matrix)
+            self.num_of_objects = len(allocation_matrix[0])
         self._z = allocation_matrix
-        self.num_of_agents = len(allocation_matrix)
-        self.num_of_objects = len(allocation_matrix[0])
 
     def agents(self):
         return range(self.num_of_agents)
@@ -67,6 +94,8 @@ class AllocationMatrix:
         >>> AllocationMatrix([ [1, 0.4, 0, 0] , [0, 0.6, 0.3, 0] , [0, 0, 0.7, 1] ]).num_of_sharings()   # Two sharings in different objects
         2
         """
+        if _issparse(self._z):
+            return int(np.ceil(self._z.data).sum() - self.num_of_objects)
         num_of_edges = 0
         for i in self.agents():
             for o in self.objects():
@@ -80,6 +109,9 @@ class AllocationMatrix:
         See here http://people.mpi-inf.mpg.de/~doerr/papers/unbimatround.pdf 
         for an unbiased matrix rounding algorithm
         """
+        if _issparse(self._z):
+            self._z.data = np.round(self._z.data, num_digits) + 0   # "+ 0" avoids "negative zero"
+            return self
         for i in range(len(self._z)):
             for j in range(len(self._z[i])):
                 fraction = np.round(self._z[i][j], num_digits)
@@ -90,11 +122,31 @@ class AllocationMatrix:
 
     def __getitem__(self, key):
         if isinstance(key,tuple):
+            if _issparse(self._z):
+                return self._z[key[0], key[1]]
             return self._z[key[0]][key[1]]  # 'key' (agent index, item index); return this agent's valuation for that item.
         else:
             return self._z[key]  # 'key' is the index of an agent; return this agent's valuation.
 
+    def save(self, path:str, agent_names:list=None, object_names:list=None):
+        """
+        Saves this allocation matrix to the given path, in .npy format, with the agent and object names (if given) in path+".names.json".
+        """
+        _save_matrix(path, self._z, agent_names, object_names)
+
+    @classmethod
+    def open(cls, path:str, mmap:bool=True, mode:str="c")->'AllocationMatrix':
+        """
+        Opens an allocation matrix saved by `save`; by default it is backed by a copy-on-write np.memmap (see ValuationMatrix.open).
+        """
+        (matrix, _, _) = _open_matrix(path, mmap, mode)
+        return cls(matrix)
+
     def __repr__(self):
+        if _issparse(self._z):
+            if self.num_of_agents * self.num_of_objects > MAX_DENSE_REPR_SIZE:
+                return repr(self._z)
+            return np.array2string (self._z.toarray(), max_line_width=100)
         return np.array2string (self._z, max_line_width=100)		
 
 
@@ -220,7 +272,7 @@ class Allocation:
         if isinstance(bundles,dict):       # If "bundles" is a dict mapping an agent name to its bundle... 
             bundles = [bundles.get(name,None) for name in map_agent_index_to_name]  # ... convert it to a list mapping an agent index to its bundle.
 
-        if isinstance(bundles, np.ndarray):
+        if isinstance(bundles, np.ndarray) or _issparse(bundles):
             bundles = AllocationMatrix(bundles)
         if isinstance(bundles, AllocationMatrix):
             self.matrix = bundles
@@ -306,7 +358,7 @@ class Allocation:
         >>> Allocation(v,z).utility_profile()
         array([0.4, 0.9])
         """
-        return np.array([self.agent_bundle_value_matrix[i_agent,i_agent] for i_agent in range(self.num_of_agents)])
+        return np.asarray(self.agent_bundle_value_matrix.diagonal())
 
     def utility_profile_matrix(self)->list:
         """
@@ -386,11 +438,41 @@ def compute_agent_bundle_value_matrix(agents, bundles, num_of_agents, num_of_bun
     array([[3. , 3.5],
            [9. , 6. ]])
 
+    >>> compute_agent_bundle_value_matrix(fairpy.SparseValuationMatrix(agents), bundles, 2, 2).toarray()
+    array([[3. , 3.5],
+           [9. , 6. ]])
+
+    >>> agents.object_names = ["x","y","z"]     # bundles of object names, or of object indices
+    >>> compute_agent_bundle_value_matrix(agents, [["x","y"],["z"]], 2, 2)
+    array([[3. , 3.5],
+           [9. , 6. ]])
+    >>> compute_agent_bundle_value_matrix(agents, bundles, 2, 2)
+    array([[3. , 3.5],
+           [9. , 6. ]])
+
     >>> agents=fairpy.agents_from(agents)
     >>> compute_agent_bundle_value_matrix(agents, bundles, 2, 2)
     array([[3. , 3.5],
            [9. , 6. ]])
+
+    >>> agents=fairpy.agents_from({"Alice":{"x":1,"y":2,"z":3},"George":{"x":4,"y":5,"z":6}})
+    >>> compute_agent_bundle_value_matrix(agents, [ListBundle("xz"), FractionalBundle([0,0.5,0], ["x","y","z"])], 2, 2)
+    array([[ 4. ,  1. ],
+           [10. ,  2.5]])
     """
+    # Additive agents: a single matrix product of the valuation matrix and the bundle matrix.
+    additive = _additive_values_and_items(agents)
+    if additive is not None:
+        values, items = additive
+        sparse = _issparse(values)
+        bundle_matrix = _bundles_to_matrix(bundles, items, sparse=sparse)
+        if bundle_matrix is None and getattr(agents, "object_names", None) is not None:   # bundles of object names
+            bundle_matrix = _bundles_to_matrix(bundles, agents.object_names, sparse=sparse)
+        if bundle_matrix is not None:
+            if sparse:    # keep the result sparse: an agent's value is non-zero only for bundles with objects it values
+                return (values @ bundle_matrix.T).tocsr().astype(float)
+            return np.asarray(values @ bundle_matrix.T, dtype=float)
+
     agent_bundle_value_matrix = np.zeros([num_of_agents,num_of_bundles])
     # print("bundles: ",bundles)
     if hasattr(agents, 'agent_value_for_bundle'):  # E.g. when agents is a ValuationMatrix.
@@ -418,6 +500,124 @@ def compute_agent_bundle_value_matrix(agents, bundles, num_of_agents, num_of_bun
     return agent_bundle_value_matrix
 
 
+def _additive_values_and_items(agents):
+    """
+    If all agents are additive over the same items, returns a pair (values, items),
+    where values is an (agents x items) array and items is the list of items, in the order of the columns.
+    Otherwise, returns None.
+
+    >>> _additive_values_and_items(ValuationMatrix([[1,2],[3,4]]))
+    (array([[1, 2],
+           [3, 4]]), range(0, 2))
+    >>> _additive_values_and_items(fairpy.agents_from({"Alice":{"x":1,"y":2}, "George":{"y":4,"x":3}}))
+    (array([[1, 2],
+           [3, 4]]), ['x', 'y'])
+    >>> _additive_values_and_items(fairpy.agents_from({"Alice":{"x":1,"y":2}, "George":{"x":3,"z":4}}))  # different items
+    >>> _additive_values_and_items([fairpy.MonotoneAgent({"x": 1, "y": 2, "xy": 4})])  # not additive
+    """
+    if isinstance(agents, ValuationMatrix):
+        return (agents._v, agents.objects())
+    if not isinstance(agents, list) or len(agents)==0:
+        return None
+    valuations = []
+    for agent in agents:
+        if isinstance(agent, fairpy.Agent):
+            if type(agent).value is not fairpy.Agent.value:
+                return None
+            agent = agent.valuation
+        if getattr(type(agent), "value", None) is not fairpy.AdditiveValuation.value:
+            return None
+        valuations.append(agent)
+    map_0 = valuations[0].map_good_to_value
+    if isinstance(map_0, dict):
+        items = list(map_0.keys())
+        item_set = set(items)
+        if any(not isinstance(v.map_good_to_value, dict) or v.map_good_to_value.keys() != item_set for v in valuations):
+            return None
+        values = np.array([v.value_vector(items) for v in valuations])
+    else:
+        num_of_items = len(map_0)
+        if any(isinstance(v.map_good_to_value, dict) or len(v.map_good_to_value) != num_of_items for v in valuations):
+            return None
+        items = range(num_of_items)
+        values = np.array([v.value_vector() for v in valuations])
+    return (values, items)
+
+
+def _item_values(agents:List[Any], items:List[Any]) -> np.ndarray:
+    """
+    :return: an (agents x items) array, where [i,j] is the value of agent i to the single item items[j].
+    For additive agents, the array is taken from their valuations without calling `value` for each item.
+
+    >>> _item_values(fairpy.agents_from({"Alice":{"x":1,"y":2,"z":3}, "George":{"x":4,"y":5,"z":6}}), ["z","x"])
+    array([[3, 1],
+           [6, 4]])
+    >>> _item_values([fairpy.MonotoneAgent({"x": 1, "y": 2, "xy": 4})], ["y","x"])
+    array([[2, 1]])
+    """
+    values_and_items = _additive_values_and_items(agents)
+    if values_and_items is not None:
+        (values, all_items) = values_and_items
+        column_of_item = {item: column for column, item in enumerate(all_items)}
+        if all(item in column_of_item for item in items):
+            return values[:, [column_of_item[item] for item in items]].reshape(len(agents), len(items))
+    return np.array([[agent.value(item) for item in items] for agent in agents]).reshape(len(agents), len(items))
+
+
+def _bundles_to_matrix(bundles, items, sparse:bool=False):
+    """
+    Converts a list of bundles to a (bundles x items) matrix, with the items ordered as in the given list.
+    Returns None if some bundle contains an unknown item.
+    If sparse is True, the matrix is a scipy.sparse CSR matrix.
+
+    >>> _bundles_to_matrix([["x","x"], None, FractionalBundle([0.5, 0], ["x","y"])], ["x","y"])
+    array([[2. , 0. ],
+           [0. , 0. ],
+           [0.5, 0. ]])
+    >>> _bundles_to_matrix([["x","x"], None, ["y"]], ["x","y"], sparse=True).toarray()
+    array([[2., 0.],
+           [0., 0.],
+           [0., 1.]])
+    >>> _bundles_to_matrix([["w"]], ["x","y"])
+    """
+    if isinstance(items, range):
+        item_index = items
+    else:
+        item_index = {item:index for index,item in enumerate(items)}
+    rows, cols, fractions = [], [], []
+    for i_bundle, bundle in enumerate(bundles):
+        if bundle is None:
+            continue
+        if isinstance(bundle, FractionalBundle):
+            enumerate_fractions = bundle.enumerate_fractions()
+        elif isinstance(bundle, str):   # A string is either a single item or a sequence of one-character items
+            enumerate_fractions = [(bundle,1)] if bundle in item_index else [(item,1) for item in bundle]
+        elif isinstance(bundle, Iterable):
+            enumerate_fractions = [(item,1) for item in bundle]
+        else:
+            return None
+        for item,fraction in enumerate_fractions:
+            if fraction == 0:
+                continue
+            if isinstance(item_index, range):
+                if not isinstance(item, (int, np.integer)) or not 0 <= item < len(item_index):
+                    return None
+                cols.append(item)
+            elif item in item_index:
+                cols.append(item_index[item])
+            else:
+                return None
+            rows.append(i_bundle)
+            fractions.append(fraction)
+    coordinates = (np.array(rows, dtype=int), np.array(cols, dtype=int))
+    if sparse:    # duplicate coordinates are summed, as in np.add.at
+        import scipy.sparse
+        return scipy.sparse.csr_matrix((np.array(fractions, dtype=float), coordinates), shape=(len(bundles), len(items)))
+    bundle_matrix = np.zeros([len(bundles), len(items)])
+    np.add.at(bundle_matrix, coordinates, np.array(fractions, dtype=float))
+    return bundle_matrix
+
+
 if __name__ == "__main__":
     import doctest
     (failures, tests) = doctest.testmod(report=True)
@@ -0,0 +1,2 @@
+from fairpy.benchmarks.generators import random_additive_instance, ordered_instance, binary_instance, additive_agents, binary_agents, piecewise_constant_cake, piecewise_uniform_cake, piecewise_linear_cake
+from fairpy.benchmarks.suite import Benchmark, BENCHMARKS, QUICK_BENCHMARKS, STORED_BASELINE, BenchmarkRegression, run_benchmark, run_benchmarks, select_benchmarks, save_report, load_report, compare_to_baseline, check_against_baseline
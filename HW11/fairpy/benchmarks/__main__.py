@@ -0,0 +1,70 @@
+#!python3
+"""
+Run the fairpy benchmarks from the command line.
+
+USAGE:
+
+    python -m fairpy.benchmarks --output results.json
+    python -m fairpy.benchmarks "items.max_*" "cake.*" --time-budget 5
+    python -m fairpy.benchmarks --baseline baseline.json    # exits with status 1 on regressions
+    python -m fairpy.benchmarks --check                     # the quick subset, against the stored fairpy/benchmarks/baseline.json
+
+The stored baseline was recorded on the reference machine; to re-record it (e.g. after an intended slowdown, or on a new machine):
+
+    python -m fairpy.benchmarks --check --output fairpy/benchmarks/baseline.json
+
+Since:  2022-06
+"""
+
+from fairpy.benchmarks.suite import QUICK_BENCHMARKS, STORED_BASELINE, select_benchmarks, run_benchmarks, save_report, load_report, compare_to_baseline
+
+import argparse, logging, sys
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m fairpy.benchmarks", description="Time the fairpy algorithms on random instances of growing size.")
+    parser.add_argument("patterns", nargs="*", help="shell-style patterns of benchmark names (default: all)")
+    parser.add_argument("--list", action="store_true", help="list the matching benchmarks and exit")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="number of timed runs per size; the fastest is recorded")
+    parser.add_argument("--time-budget", type=float, default=1.0, help="stop growing an instance once a run takes longer than this (seconds)")
+    parser.add_argument("--timeout", type=int, default=None, help="interrupt a run that takes longer than this (seconds)")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument("--baseline", help="compare the results to this JSON file, and exit with status 1 on regressions")
+    parser.add_argument("--check", action="store_true", help="run the quick benchmarks (unless patterns are given), and compare them to the stored baseline (unless --baseline is given)")
+    parser.add_argument("--time-tolerance", type=float, default=1.5)
+    parser.add_argument("--memory-tolerance", type=float, default=1.5)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    patterns = args.patterns or None
+    if args.check:
+        patterns = patterns or QUICK_BENCHMARKS
+        args.baseline = args.baseline or STORED_BASELINE
+    if args.list:
+        for benchmark in select_benchmarks(patterns):
+            print(benchmark)
+        return 0
+    if args.verbose:
+        logging.basicConfig(level=logging.INFO, stream=sys.stderr, format="%(message)s")
+
+    report = run_benchmarks(patterns, seed=args.seed, repeat=args.repeat, time_budget=args.time_budget, timeout=args.timeout)
+    for result in report["results"]:
+        outcome = result.get("error") or f"{result['seconds']:10.4f} s {result['peak_memory']/(1<<20):10.2f} MiB"
+        print(f"{result['benchmark']:60} n={result['num_of_agents']:<4} m={result['num_of_items']:<5} {outcome}")
+    if args.output:
+        save_report(report, args.output)
+
+    if args.baseline:
+        regressions = compare_to_baseline(report, load_report(args.baseline), time_tolerance=args.time_tolerance, memory_tolerance=args.memory_tolerance)
+        if regressions:
+            print(f"\n{len(regressions)} REGRESSIONS relative to {args.baseline}:", file=sys.stderr)
+            for regression in regressions:
+                print("  " + regression, file=sys.stderr)
+            return 1
+        print(f"\nNo regressions relative to {args.baseline}.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,157 @@
+#!python3
+"""
+Seeded generators of random instances for benchmarking fair-division algorithms.
+
+Every generator takes the size of the instance and a seed,
+and returns the same instance whenever it is called with the same arguments,
+so that timings of different versions of fairpy are comparable.
+
+Since:  2022-06
+"""
+
+from fairpy.agents import AdditiveAgent, BinaryAgent, PiecewiseConstantAgent, PiecewiseConstantAgentNormalized, PiecewiseUniformAgent, PiecewiseLinearAgent
+import numpy as np
+
+from typing import List, Any
+
+
+def random_additive_instance(num_of_agents:int, num_of_items:int, seed:int=None, max_value:int=100) -> np.ndarray:
+    """
+    A valuation matrix of random integer values between 1 and max_value.
+    :param num_of_agents: number of rows.
+    :param num_of_items:  number of columns.
+    :param seed: the seed of the random number generator.
+    :return: a numpy array with num_of_agents rows and num_of_items columns.
+
+    >>> random_additive_instance(2, 4, seed=1).shape
+    (2, 4)
+    >>> np.array_equal(random_additive_instance(3, 5, seed=1), random_additive_instance(3, 5, seed=1))
+    True
+    >>> int(random_additive_instance(3, 5, seed=1, max_value=1).sum())
+    15
+    """
+    rng = np.random.default_rng(seed)
+    return rng.integers(1, max_value, size=(num_of_agents, num_of_items), endpoint=True)
+
+
+def ordered_instance(num_of_agents:int, num_of_items:int, seed:int=None, max_value:int=100) -> np.ndarray:
+    """
+    A valuation matrix in which all agents rank the items in the same order:
+    for every agent, the value of item j is at least the value of item j+1.
+
+    >>> v = ordered_instance(3, 6, seed=2)
+    >>> bool(np.all(v[:, :-1] >= v[:, 1:]))
+    True
+    """
+    values = random_additive_instance(num_of_agents, num_of_items, seed=seed, max_value=max_value)
+    return -np.sort(-values, axis=1)
+
+
+def binary_instance(num_of_agents:int, num_of_items:int, seed:int=None, probability:float=0.5) -> np.ndarray:
+    """
+    A 0/1 valuation matrix: each agent wants each item independently with the given probability.
+    Every agent wants at least one item.
+
+    >>> v = binary_instance(4, 10, seed=3)
+    >>> sorted(set(v.flatten().tolist()))
+    [0, 1]
+    >>> bool(np.all(v.sum(axis=1) >= 1))
+    True
+    """
+    rng = np.random.default_rng(seed)
+    values = (rng.random(size=(num_of_agents, num_of_items)) < probability).astype(int)
+    for i in np.flatnonzero(values.sum(axis=1)==0):
+        values[i, rng.integers(num_of_items)] = 1
+    return values
+
+
+def additive_agents(values:Any) -> List[AdditiveAgent]:
+    """
+    Convert a valuation matrix to a list of AdditiveAgent objects, named "Agent #i", with items "v0", "v1", ...
+
+    >>> additive_agents([[1,2],[3,4]])[1]
+    Agent #1 is an agent with a Additive valuation: v0=3 v1=4.
+    """
+    return [
+        AdditiveAgent({f"v{j}": value for j,value in enumerate(row)}, name=f"Agent #{i}")
+        for i,row in enumerate(np.asarray(values).tolist())
+    ]
+
+
+def binary_agents(values:Any) -> List[BinaryAgent]:
+    """
+    Convert a 0/1 valuation matrix to a list of BinaryAgent objects, with items "v0", "v1", ...
+
+    >>> binary_agents([[1,0,1],[0,1,0]])[0].value({"v0","v1"})
+    1
+    """
+    return [
+        BinaryAgent({f"v{j}" for j in np.flatnonzero(row)}, name=f"Agent #{i}")
+        for i,row in enumerate(np.asarray(values))
+    ]
+
+
+def piecewise_constant_cake(num_of_agents:int, num_of_pieces:int, seed:int=None, max_value:int=100, normalized:bool=False) -> List[PiecewiseConstantAgent]:
+    """
+    Agents with random piecewise-constant valuations over the cake [0, num_of_pieces].
+    :param normalized: if True, return PiecewiseConstantAgentNormalized agents, whose cake is [0,1] and total value is 1.
+
+    >>> agents = piecewise_constant_cake(3, 5, seed=4)
+    >>> [agent.cake_length() for agent in agents]
+    [5, 5, 5]
+    >>> float(piecewise_constant_cake(2, 5, seed=4, normalized=True)[0].eval(0,1))
+    1.0
+    """
+    values = random_additive_instance(num_of_agents, num_of_pieces, seed=seed, max_value=max_value).tolist()
+    agent_class = PiecewiseConstantAgentNormalized if normalized else PiecewiseConstantAgent
+    return [agent_class(row, name=f"Agent #{i}") for i,row in enumerate(values)]
+
+
+def piecewise_uniform_cake(num_of_agents:int, num_of_pieces:int, seed:int=None, probability:float=0.5) -> List[PiecewiseUniformAgent]:
+    """
+    Agents with random piecewise-uniform valuations over the cake [0, num_of_pieces]:
+    each agent desires each unit interval [j, j+1] independently with the given probability.
+    Adjacent desired intervals are merged, and every agent desires at least one interval.
+
+    >>> agents = piecewise_uniform_cake(3, 6, seed=6)
+    >>> [agent.cake_length() > 0 for agent in agents]
+    [True, True, True]
+    """
+    desired = binary_instance(num_of_agents, num_of_pieces, seed=seed, probability=probability)
+    agents = []
+    for i,row in enumerate(desired):
+        regions = []
+        for j in np.flatnonzero(row).tolist():
+            if regions and regions[-1][1]==j:
+                regions[-1] = (regions[-1][0], j+1)
+            else:
+                regions.append((j, j+1))
+        agents.append(PiecewiseUniformAgent(regions, name=f"Agent #{i}"))
+    return agents
+
+
+def piecewise_linear_cake(num_of_agents:int, num_of_pieces:int, seed:int=None, max_value:int=100) -> List[PiecewiseLinearAgent]:
+    """
+    Agents with random piecewise-linear valuations over the cake [0, num_of_pieces].
+    Each slope is an integer whose absolute value is at most twice the value of its piece,
+    so that the value-density is non-negative everywhere.
+
+    >>> agents = piecewise_linear_cake(2, 4, seed=5)
+    >>> [agent.cake_length() for agent in agents]
+    [4, 4]
+    >>> all(agent.eval(x/10, (x+1)/10) >= 0 for agent in agents for x in range(40))
+    True
+    """
+    rng = np.random.default_rng(seed)
+    values = rng.integers(1, max_value, size=(num_of_agents, num_of_pieces), endpoint=True)
+    slopes = rng.integers(-2*values, 2*values, endpoint=True)
+    return [
+        PiecewiseLinearAgent(values[i].tolist(), slopes[i].tolist(), name=f"Agent #{i}")
+        for i in range(num_of_agents)
+    ]
+
+
+if __name__ == "__main__":
+    import doctest
+    (failures, tests) = doctest.testmod(report=True)
+    print("{} failures, {} tests".format(failures, tests))
@@ -0,0 +1,382 @@
+#!python3
+"""
+Timing and memory benchmarks of the algorithms in fairpy.items and fairpy.cake,
+and of the time it takes to import fairpy.
+
+Each benchmark runs one algorithm on seeded random instances of growing size,
+records the running time and the peak memory at each size,
+and stops growing once a single run takes longer than a given time budget
+(so the last size recorded shows where the algorithm stops scaling).
+
+The results are plain dicts that can be saved as JSON,
+and compared against the results of a previous version (a "baseline").
+
+Since:  2022-06
+"""
+
+from fairpy.benchmarks import generators
+from fairpy.time_limit import time_limit, TimeoutException
+import fairpy
+import numpy as np
+
+import fnmatch, json, os, platform, subprocess, sys, time, tracemalloc
+from typing import Any, Callable, Dict, List, Tuple
+
+import logging
+logger = logging.getLogger(__name__)
+
+
+class BenchmarkRegression(Exception):
+    """
+    Raised when benchmark results are worse than the baseline.
+    The list of regressions is in the attribute `regressions`.
+    """
+    def __init__(self, regressions:List[str]):
+        super().__init__(f"{len(regressions)} benchmark regressions:\n" + "\n".join(regressions))
+        self.regressions = regressions
+
+
+class Benchmark:
+    """
+    A benchmark of a single algorithm.
+
+    :param name: a unique name, e.g. "items.round_robin".
+    :param generator: a function (num_of_agents, num_of_items, seed) -> instance.
+        For cake algorithms, num_of_items is the number of pieces of each valuation.
+    :param algorithm: a function instance -> result, which runs the algorithm on the instance.
+    :param sizes: a list of pairs (num_of_agents, num_of_items), in increasing order of difficulty.
+
+    >>> benchmark = Benchmark("items.round_robin", generators.random_additive_instance, fairpy.items.round_robin, sizes=[(2,4),(4,8)])
+    >>> benchmark
+    items.round_robin: sizes [(2, 4), (4, 8)]
+    >>> benchmark.family
+    'items'
+    """
+    def __init__(self, name:str, generator:Callable, algorithm:Callable, sizes:List[Tuple[int,int]]):
+        self.name = name
+        self.family = name.split(".")[0]
+        self.generator = generator
+        self.algorithm = algorithm
+        self.sizes = sizes
+
+    def __repr__(self):
+        return f"{self.name}: sizes {self.sizes}"
+
+
+def _doubling(num_of_agents:int, num_of_items:int, steps:int) -> List[Tuple[int,int]]:
+    """
+    >>> _doubling(2, 3, 4)
+    [(2, 3), (4, 6), (8, 12), (16, 24)]
+    """
+    return [(num_of_agents << i, num_of_items << i) for i in range(steps)]
+
+
+def _fixed_agents(num_of_agents:int, num_of_items:int, steps:int) -> List[Tuple[int,int]]:
+    """
+    >>> _fixed_agents(2, 3, 4)
+    [(2, 3), (2, 6), (2, 12), (2, 24)]
+    """
+    return [(num_of_agents, num_of_items << i) for i in range(steps)]
+
+
+def _single_character_agents(values:np.ndarray) -> List[fairpy.AdditiveAgent]:
+    # fair_enough identifies items by their first character.
+    return [
+        fairpy.AdditiveAgent({chr(ord("A")+j): value for j,value in enumerate(row)}, name=f"Agent #{i}")
+        for i,row in enumerate(values.tolist())
+    ]
+
+
+def _fair_enough(values:np.ndarray):
+    from fairpy.items.fair_enough import fair_enough
+    agents = _single_character_agents(values)
+    return fair_enough(agents, set(agents[0].all_items()))
+
+
+def _three_quarters_mms(values:np.ndarray):
+    from fairpy.items.approximation_maximin_share import three_quarters_MMS_allocation_algorithm
+    return three_quarters_MMS_allocation_algorithm(generators.additive_agents(values))
+
+
+def _bidirectional_bag_filling(values:np.ndarray):
+    num_of_agents = values.shape[0]
+    return fairpy.items.bidirectional_bag_filling(values, thresholds=(values.sum(axis=1) / (2*num_of_agents)).tolist())
+
+
+def _normalized_cake(num_of_agents:int, num_of_pieces:int, seed:int=None):
+    return generators.piecewise_constant_cake(num_of_agents, num_of_pieces, seed=seed, normalized=True)
+
+
+def _ef4_cake(num_of_agents:int, num_of_pieces:int, seed:int=None, max_attempts:int=100):
+    # improve_ef4_protocol raises "No second mark" on about half of the random cakes (in the original implementation too),
+    # so the instance is the first cake, with seed, seed+1, seed+2, ..., on which the protocol succeeds.
+    # If there is none, the last cake is returned, and the benchmark records the error.
+    from fairpy.cake.improve_ef4 import improve_ef4_protocol
+    for attempt in range(max_attempts):
+        agents = generators.piecewise_constant_cake(num_of_agents, num_of_pieces, seed=None if seed is None else seed+attempt)
+        try:
+            improve_ef4_protocol(agents)
+            return agents
+        except ValueError:
+            pass
+    return agents
+
+
+def _cake_algorithm(module_name:str, function_name:str, *args) -> Callable:
+    # Cake modules are imported only when their benchmark runs, since some of them import heavy dependencies.
+    def algorithm(agents):
+        import importlib
+        function = getattr(importlib.import_module(f"fairpy.cake.{module_name}"), function_name)
+        return function(agents, *args)
+    algorithm.__name__ = function_name
+    return algorithm
+
+
+def _no_instance(num_of_agents:int, num_of_items:int, seed:int=None):
+    return None
+
+
+def _in_new_process(statement:str) -> Callable:
+    # Runs the statement in a fresh interpreter, to measure the cold-start cost of importing fairpy (the instance is ignored).
+    def algorithm(instance):
+        environment = dict(os.environ, PYTHONPATH=os.pathsep.join(path for path in sys.path if path))
+        subprocess.run([sys.executable, "-c", statement], check=True, env=environment)
+    algorithm.__name__ = statement
+    return algorithm
+
+
+BENCHMARKS:Dict[str,Benchmark] = {benchmark.name: benchmark for benchmark in [
+    ### import time
+    Benchmark("import.fairpy", _no_instance, _in_new_process("import fairpy"), [(0,0)]),
+    Benchmark("import.fairpy.items.max_welfare_allocation", _no_instance, _in_new_process("import fairpy; fairpy.items.max_welfare_allocation"), [(0,0)]),
+
+    ### fairpy.items
+    Benchmark("items.round_robin", generators.random_additive_instance, fairpy.items.round_robin, _doubling(2, 4, 10)),
+    Benchmark("items.round_robin[binary]", generators.binary_instance, fairpy.items.round_robin, _doubling(2, 4, 10)),
+    Benchmark("items.max_sum_allocation", generators.random_additive_instance, fairpy.items.max_sum_allocation, _doubling(2, 4, 7)),
+    Benchmark("items.max_product_allocation", generators.random_additive_instance, fairpy.items.max_product_allocation, _doubling(2, 4, 7)),
+    Benchmark("items.max_minimum_allocation", generators.random_additive_instance, fairpy.items.max_minimum_allocation, _doubling(2, 4, 7)),
+    Benchmark("items.leximin_optimal_allocation", generators.random_additive_instance, fairpy.items.leximin_optimal_allocation, _doubling(2, 4, 5)),
+    Benchmark("items.bidirectional_bag_filling", generators.ordered_instance, _bidirectional_bag_filling, _doubling(2, 4, 10)),
+    Benchmark("items.utilitarian_matching", generators.random_additive_instance, fairpy.items.utilitarian_matching, _doubling(2, 4, 7)),
+    Benchmark("items.utilitarian_matching[binary]", generators.binary_instance, fairpy.items.utilitarian_matching, _doubling(2, 4, 7)),
+    Benchmark("items.iterated_maximum_matching", generators.random_additive_instance, fairpy.items.iterated_maximum_matching, _doubling(2, 4, 7)),
+    Benchmark("items.proportional_allocation_with_min_sharing", generators.random_additive_instance, fairpy.items.proportional_allocation_with_min_sharing, [(2,3),(3,4),(3,6),(4,6),(4,8),(5,10)]),
+    Benchmark("items.envyfree_allocation_with_min_sharing", generators.random_additive_instance, fairpy.items.envyfree_allocation_with_min_sharing, [(2,3),(3,4),(3,6),(4,6),(4,8),(5,10)]),
+    Benchmark("items.maxproduct_allocation_with_min_sharing", generators.random_additive_instance, fairpy.items.maxproduct_allocation_with_min_sharing, [(2,3),(3,4),(3,6),(4,6),(4,8)]),
+    Benchmark("items.proportional_allocation_with_bounded_sharing", generators.random_additive_instance, fairpy.items.proportional_allocation_with_bounded_sharing, _doubling(2, 4, 6)),
+    Benchmark("items.efficient_envyfree_allocation_with_bounded_sharing", generators.random_additive_instance, fairpy.items.efficient_envyfree_allocation_with_bounded_sharing, _doubling(2, 4, 6)),
+    Benchmark("items.propm_allocation", generators.random_additive_instance, fairpy.items.propm_allocation, _doubling(2, 4, 7)),
+    Benchmark("items.fair_enough", generators.random_additive_instance, _fair_enough, [(3,6),(3,13),(4,16),(6,22),(8,28),(12,40),(16,52)]),
+    Benchmark("items.three_quarters_MMS_allocation", generators.random_additive_instance, _three_quarters_mms, _doubling(2, 4, 6)),
+
+    ### fairpy.cake
+    Benchmark("cake.last_diminisher", generators.piecewise_constant_cake, _cake_algorithm("last_diminisher", "last_diminisher"), _doubling(2, 4, 7)),
+    Benchmark("cake.asymmetric_protocol", generators.piecewise_constant_cake, _cake_algorithm("cut_and_choose", "asymmetric_protocol"), _fixed_agents(2, 4, 10)),
+    Benchmark("cake.symmetric_protocol", generators.piecewise_constant_cake, _cake_algorithm("cut_and_choose", "symmetric_protocol"), _fixed_agents(2, 4, 10)),
+    Benchmark("cake.opt_piecewise_constant", generators.piecewise_constant_cake, _cake_algorithm("optimal_ef_cake_cut", "opt_piecewise_constant"), _doubling(2, 2, 5)),
+    Benchmark("cake.opt_piecewise_linear", generators.piecewise_linear_cake, _cake_algorithm("optimal_ef_cake_cut", "opt_piecewise_linear"), _fixed_agents(2, 2, 6)),
+    Benchmark("cake.equally_sized_pieces", generators.piecewise_constant_cake, _cake_algorithm("time_auction_approximation", "equally_sized_pieces", 1), _doubling(2, 4, 6)),
+    Benchmark("cake.continuous_setting", generators.piecewise_constant_cake, _cake_algorithm("time_auction_approximation", "continuous_setting"), _doubling(2, 4, 5)),
+    Benchmark("cake.improve_ef4_protocol", _ef4_cake, _cake_algorithm("improve_ef4", "improve_ef4_protocol"), _fixed_agents(4, 4, 7)),
+    Benchmark("cake.algor1", _normalized_cake, _cake_algorithm("contiguous_approximately_envy_free", "algor1"), _fixed_agents(3, 4, 7)),
+    Benchmark("cake.elaborate_simplex_solution", _normalized_cake, _cake_algorithm("Deng_Qi_Saberi", "elaborate_simplex_solution", 1/16), _fixed_agents(3, 4, 6)),
+    Benchmark("cake.socially_efficient_divide", _normalized_cake, _cake_algorithm("socially_efficient_cake_divisions", "divide", 0.1), _doubling(2, 4, 5)),
+    Benchmark("cake.EFAllocate", generators.piecewise_uniform_cake, _cake_algorithm("piecewise_linear_cake_division", "EFAllocate"), _doubling(2, 4, 6)),
+    Benchmark("cake.fe_cake_division_connected_pieces", _normalized_cake, _cake_algorithm("fe_cake_division_connected_pieces", "ALG", 0.1), _doubling(2, 4, 5)),
+]}
+
+# A subset that runs in a few seconds, and its stored results (the baseline checked by `python -m fairpy.benchmarks --check`).
+QUICK_BENCHMARKS = ["import.fairpy", "items.round_robin", "items.max_sum_allocation", "items.bidirectional_bag_filling", "items.utilitarian_matching"]
+STORED_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def _peak_memory(algorithm:Callable, instance:Any) -> int:
+    """
+    The peak number of bytes allocated by Python objects (including numpy arrays) while running the algorithm.
+    Memory allocated inside external solvers is not counted.
+    """
+    tracemalloc.start()
+    try:
+        algorithm(instance)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_benchmark(benchmark:Benchmark, seed:int=0, repeat:int=3, time_budget:float=1.0, timeout:int=None) -> List[dict]:
+    """
+    Run a single benchmark on its sizes, until a single run takes more than `time_budget` seconds.
+
+    :param seed: the seed given to the generator at every size.
+    :param repeat: the number of timed runs at every size; the fastest one is recorded.
+    :param time_budget: stop growing the instance once a run takes longer than this number of seconds.
+    :param timeout: if given, a run that takes longer than this number of seconds is interrupted (Unix only).
+    :return: a list of dicts, one per size. Each dict contains the keys
+        "benchmark", "num_of_agents", "num_of_items", "seconds" and "peak_memory",
+        and, if the run did not complete, "error".
+
+    >>> benchmark = Benchmark("items.round_robin", generators.random_additive_instance, fairpy.items.round_robin, sizes=[(2,4),(4,8)])
+    >>> results = run_benchmark(benchmark, repeat=1)
+    >>> [(result["num_of_agents"], result["num_of_items"]) for result in results]
+    [(2, 4), (4, 8)]
+    >>> sorted(results[0].keys())
+    ['benchmark', 'num_of_agents', 'num_of_items', 'peak_memory', 'seconds']
+    >>> benchmark = Benchmark("items.broken", generators.random_additive_instance, lambda values: 1/0, sizes=[(2,4),(4,8)])
+    >>> run_benchmark(benchmark, repeat=1)
+    [{'benchmark': 'items.broken', 'num_of_agents': 2, 'num_of_items': 4, 'seconds': None, 'peak_memory': None, 'error': 'ZeroDivisionError: division by zero'}]
+    """
+    results = []
+    for num_of_agents, num_of_items in benchmark.sizes:
+        result = {"benchmark": benchmark.name, "num_of_agents": num_of_agents, "num_of_items": num_of_items, "seconds": None, "peak_memory": None}
+        results.append(result)
+        instance = benchmark.generator(num_of_agents, num_of_items, seed=seed)
+        try:
+            seconds = []
+            for _ in range(repeat):
+                start = time.perf_counter()
+                if timeout is None:
+                    benchmark.algorithm(instance)
+                else:
+                    with time_limit(timeout):
+                        benchmark.algorithm(instance)
+                seconds.append(time.perf_counter() - start)
+            result["seconds"] = min(seconds)
+            result["peak_memory"] = _peak_memory(benchmark.algorithm, instance)
+        except TimeoutException:
+            result["error"] = f"timeout after {timeout} seconds"
+        except Exception as error:
+            result["error"] = f"{type(error).__name__}: {error}"
+        logger.info("%s with %d agents and %d items: %s", benchmark.name, num_of_agents, num_of_items, result.get("error") or f"{result['seconds']:.4f} seconds")
+        if "error" in result or result["seconds"] > time_budget:
+            break
+    return results
+
+
+def select_benchmarks(patterns:List[str]=None) -> List[Benchmark]:
+    """
+    :param patterns: shell-style patterns of benchmark names; None means all benchmarks.
+
+    >>> [benchmark.name for benchmark in select_benchmarks(["items.max_*"])]
+    ['items.max_sum_allocation', 'items.max_product_allocation', 'items.max_minimum_allocation']
+    >>> len(select_benchmarks(["cake.*"])) == len(select_benchmarks()) - len(select_benchmarks(["items.*"])) - len(select_benchmarks(["import.*"]))
+    True
+    >>> [benchmark.name for benchmark in select_benchmarks(["import.*"])]
+    ['import.fairpy', 'import.fairpy.items.max_welfare_allocation']
+    """
+    if patterns is None:
+        return list(BENCHMARKS.values())
+    return [benchmark for name,benchmark in BENCHMARKS.items() if any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)]
+
+
+def run_benchmarks(patterns:List[str]=None, seed:int=0, repeat:int=3, time_budget:float=1.0, timeout:int=None) -> dict:
+    """
+    Run all benchmarks whose names match the given patterns.
+    :return: a JSON-serializable report: a dict with the environment details and a list of "results" (see run_benchmark).
+
+    >>> report = run_benchmarks(["items.round_robin"], repeat=1, time_budget=0)
+    >>> report["fairpy_version"] == fairpy.__version__
+    True
+    >>> [(result["benchmark"], result["num_of_agents"]) for result in report["results"]]
+    [('items.round_robin', 2)]
+    """
+    results = []
+    for benchmark in select_benchmarks(patterns):
+        results += run_benchmark(benchmark, seed=seed, repeat=repeat, time_budget=time_budget, timeout=timeout)
+    return {
+        "fairpy_version": fairpy.__version__,
+        "python_version": platform.python_version(),
+        "numpy_version": np.__version__,
+        "machine": platform.machine(),
+        "seed": seed,
+        "repeat": repeat,
+        "time_budget": time_budget,
+        "results": results,
+    }
+
+
+def save_report(report:dict, path:str):
+    with open(path, "w") as file:
+        json.dump(report, file, indent=1)
+
+
+def load_report(path:str) -> dict:
+    with open(path) as file:
+        return json.load(file)
+
+
+def compare_to_baseline(report:dict, baseline:dict, time_tolerance:float=1.5, memory_tolerance:float=1.5, min_seconds:float=0.01, min_memory:int=1<<20) -> List[str]:
+    """
+    Compare a benchmark report to a baseline report.
+    Only benchmarks that appear in both reports are compared.
+
+    :param time_tolerance: a run is a regression if it is slower than the baseline by more than this factor ...
+    :param min_seconds: ... and it takes more than this number of seconds (faster runs are too noisy to compare).
+    :param memory_tolerance, min_memory: the same, for the peak memory in bytes.
+    :return: a list of human-readable descriptions of the regressions; empty if there are none.
+
+    >>> def report(*results): return {"results": [dict(zip(["benchmark","num_of_agents","num_of_items","seconds","peak_memory"], r)) for r in results]}
+    >>> baseline = report(["x", 2, 4, 0.1, 1000], ["x", 4, 8, 0.5, 2000], ["y", 2, 4, 0.1, 1000])
+    >>> compare_to_baseline(report(["x", 2, 4, 0.12, 1000], ["x", 4, 8, 0.4, 2000]), baseline)
+    []
+    >>> compare_to_baseline(report(["x", 2, 4, 0.2, 1000], ["x", 4, 8, 0.6, 2000]), baseline)
+    ['x with 2 agents and 4 items: 0.2000 seconds instead of 0.1000']
+    >>> compare_to_baseline(report(["x", 2, 4, 0.1, 8<<20]), baseline)
+    ['x with 2 agents and 4 items: peak memory 8388608 bytes instead of 1000', 'x stopped scaling at 2 agents and 4 items instead of 4 agents and 8 items']
+    >>> regression = report(["x", 2, 4, 0.1, 1000], ["x", 4, 8, None, None])
+    >>> regression["results"][1]["error"] = "timeout after 1 seconds"
+    >>> compare_to_baseline(regression, baseline)
+    ['x with 4 agents and 8 items: timeout after 1 seconds']
+    """
+    def key(result): return (result["benchmark"], result["num_of_agents"], result["num_of_items"])
+    def size(result): return f"{result['num_of_agents']} agents and {result['num_of_items']} items"
+    current = {key(result): result for result in report["results"]}
+    benchmarks_run = {result["benchmark"] for result in report["results"]}
+    last_current_result = {result["benchmark"]: result for result in report["results"]}
+
+    regressions = []
+    stopped_early = {}
+    for old in baseline["results"]:
+        if old["benchmark"] not in benchmarks_run or "error" in old:
+            continue
+        description = f"{old['benchmark']} with {size(old)}"
+        new = current.get(key(old))
+        if new is None:
+            stopped_early[old["benchmark"]] = old
+        elif "error" in new:
+            regressions.append(f"{description}: {new['error']}")
+        else:
+            if new["seconds"] > time_tolerance * old["seconds"] and new["seconds"] > min_seconds:
+                regressions.append(f"{description}: {new['seconds']:.4f} seconds instead of {old['seconds']:.4f}")
+            if new["peak_memory"] > memory_tolerance * old["peak_memory"] and new["peak_memory"] > min_memory:
+                regressions.append(f"{description}: peak memory {new['peak_memory']} bytes instead of {old['peak_memory']}")
+    for name, old in stopped_early.items():
+        new = last_current_result[name]
+        if "error" not in new:
+            regressions.append(f"{name} stopped scaling at {size(new)} instead of {size(old)}")
+    return regressions
+
+
+def check_against_baseline(report:dict, baseline:dict, **tolerances):
+    """
+    Raise BenchmarkRegression if the report has any regressions relative to the baseline (see compare_to_baseline).
+
+    >>> baseline = {"results": [{"benchmark": "x", "num_of_agents": 2, "num_of_items": 4, "seconds": 0.1, "peak_memory": 1000}]}
+    >>> check_against_baseline(baseline, baseline)
+    >>> slower = {"results": [{"benchmark": "x", "num_of_agents": 2, "num_of_items": 4, "seconds": 1.0, "peak_memory": 1000}]}
+    >>> try:
+    ...     check_against_baseline(slower, baseline)
+    ... except BenchmarkRegression as error:
+    ...     print(error)
+    1 benchmark regressions:
+    x with 2 agents and 4 items: 1.0000 seconds instead of 0.1000
+    """
+    regressions = compare_to_baseline(report, baseline, **tolerances)
+    if regressions:
+        raise BenchmarkRegression(regressions)
+
+
+if __name__ == "__main__":
+    import doctest
+    (failures, tests) = doctest.testmod(report=True)
+    print("{} failures, {} tests".format(failures, tests))
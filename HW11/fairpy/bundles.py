@@ -69,8 +69,14 @@ class FractionalBundle(Bundle):
     { 11.11% of a, 44.44% of b, 55.55% of c}
     >>> bundle.round(2)
     { 11.0% of a, 44.0% of b, 56.0% of c}
+    >>> ### A sparse row (e.g. of a sparse allocation matrix); only its stored fractions are enumerated:
+    >>> import scipy.sparse
+    >>> FractionalBundle(fractions=scipy.sparse.csr_matrix([[0,0,1,0,0.5]]), object_names=["a","b","c","d","e"])
+    { 100.0% of c, 50.0% of e}
     """
     def __init__(self, fractions, object_names=None):
+        if hasattr(fractions, "tocsr"):   # a scipy.sparse row
+            fractions = fractions.tocsr()
         self.fractions = fractions
         self.object_names = object_names
         self._set_items()
@@ -84,12 +90,23 @@ class FractionalBundle(Bundle):
         ]
 
     def round(self, num_digits:int):
+        if self._is_sparse():
+            self.fractions.data = np.round(self.fractions.data, num_digits)
+            self._set_items()
+            return self
         for i,fraction in enumerate(self.fractions):
             self.fractions[i] = np.round(fraction, num_digits)
         self._set_items()
         return self
 
+    def _is_sparse(self)->bool:
+        return hasattr(self.fractions, "tocsr")
+
     def enumerate_fractions(self):
+        if self._is_sparse():
+            indices = self.fractions.indices.tolist()
+            items = indices if self.object_names is None else [self.object_names[j] for j in indices]
+            return zip(items, self.fractions.data)
         if self.object_names is None: 
             return enumerate(self.fractions)
         else:
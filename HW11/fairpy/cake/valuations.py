@@ -11,7 +11,6 @@ from abc import ABC, abstractmethod
 import numpy as np
 from typing import *
 
-from scipy import integrate
 
 
 class Valuation(ABC):
@@ -107,6 +106,8 @@ class PiecewiseConstantValuation(Valuation):
         self.values = np.array(values)
         self.length = len(values)
         self.total_value_cache = sum(values)
+        # cumulative_values[i] = the value of [0,i]; used to answer eval queries in O(1) and mark queries in O(log length).
+        self.cumulative_values = np.concatenate(([0], np.cumsum(self.values)))
 
     def __repr__(self):
         return f"Piecewise-constant valuation with values {self.values} and total value={self.total_value_cache}"
@@ -154,11 +155,34 @@ class PiecewiseConstantValuation(Valuation):
 
         val = 0.0
         val += (self.values[fromFloor] * fromFraction)
-        val += self.values[fromFloor + 1:toCeiling].sum()
+        if toCeiling > fromFloor + 1:
+            val += self.cumulative_values[toCeiling] - self.cumulative_values[fromFloor + 1]
         val -= (self.values[toCeiling - 1] * toCeilingRemovedFraction)
 
         return val
 
+    def eval_many(self, starts:np.ndarray, ends:np.ndarray)->np.ndarray:
+        """
+        Answer many Eval queries at once.
+
+        :param starts, ends: arrays of the same shape.
+        :return: an array with the value of each interval [starts[i],ends[i]].
+
+        >>> a = PiecewiseConstantValuation([11,22,33,44])
+        >>> a.eval_many([1, 1.5, 1, 1.5, 3, 3, -1], [3, 3, 3.25, 3.25, 3, 7, 7])
+        array([ 55.,  44.,  66.,  55.,   0.,  44., 110.])
+        """
+        starts = np.clip(np.asarray(starts, dtype=float), 0, self.length)
+        ends   = np.clip(np.asarray(ends,   dtype=float), 0, self.length)
+        return np.maximum(self._cumulative_value(ends) - self._cumulative_value(starts), 0.0)
+
+    def _cumulative_value(self, locations:np.ndarray)->np.ndarray:
+        """
+        :return: the values of [0,location] for each location in the given array (which must be in [0,length]).
+        """
+        floors = np.minimum(np.floor(locations).astype(int), self.length - 1)
+        return self.cumulative_values[floors] + self.values[floors] * (locations - floors)
+
     def mark(self, start:float, target_value:float):
         """
         Answer a Mark query: return "end" such that the value of the interval [start,end] is target_value.
@@ -201,14 +225,41 @@ class PiecewiseConstantValuation(Valuation):
         if value * start_fraction >= target_value:
             return start + (target_value / value)
         target_value -= (value * start_fraction)
-        for i in range(start_floor + 1, self.length):
-            value = self.values[i]
-            if target_value <= value:
-                return i + (target_value / value)
-            target_value -= value
+        # Find the first segment i such that the value of [start_floor+1, i+1] is at least target_value:
+        cumulative_target = self.cumulative_values[start_floor + 1] + target_value
+        i = int(np.searchsorted(self.cumulative_values, cumulative_target, side="left")) - 1
+        if i >= self.length:
+            # Value is too high: return None
+            return None
+        i = max(i, start_floor + 1)
+        target_value -= self.cumulative_values[i] - self.cumulative_values[start_floor + 1]
+        return i + (target_value / self.values[i])
 
-        # Value is too high: return None
-        return None
+    def mark_many(self, starts:np.ndarray, target_values:np.ndarray)->np.ndarray:
+        """
+        Answer many Mark queries at once.
+
+        :param starts, target_values: arrays of the same shape.
+        :return: an array with the mark of each pair (starts[i],target_values[i]), or nan where the target value is too high.
+
+        >>> a = PiecewiseConstantValuation([11,22,33,44])
+        >>> a.mark_many([1, 1.5, 1, 1.5, 1, 1, 1, 4], [55, 44, 66, 55, 99, 100, 0, 1])
+        array([3.  , 3.  , 3.25, 3.25, 4.  ,  nan, 1.  ,  nan])
+        """
+        starts = np.maximum(np.asarray(starts, dtype=float), 0)
+        target_values = np.asarray(target_values, dtype=float)
+        if np.any(target_values < 0):
+            raise ValueError(f"sum out of range (should be positive): {target_values}")
+        too_far = starts >= self.length
+        starts = np.minimum(starts, self.length)
+        cumulative_targets = self._cumulative_value(starts) + target_values
+        segments = np.searchsorted(self.cumulative_values, cumulative_targets, side="left") - 1
+        too_high = segments >= self.length
+        segments = np.clip(segments, np.minimum(np.floor(starts).astype(int), self.length - 1), self.length - 1)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            marks = segments + (cumulative_targets - self.cumulative_values[segments]) / self.values[segments]
+        marks = np.where(target_values == 0, starts, marks)
+        return np.where(too_far | too_high, np.nan, marks)
 
 
 
@@ -706,11 +757,15 @@ class PiecewiseLinearValuation(Valuation):
         if len(values) != len(slopes):
             raise ValueError(f'Values amount: {len(values)} not equal to slopes: {len(slopes)} ')
         super().__init__()
-        self.piece_poly = [set_poly_func(values[i], slopes[i], 0, 1) for i in range(len(values))]
-        self.values_integral = [set_integral_func(self.piece_poly[i], 0, 1) for i in range(len(values))]
         self.values = np.array(values)
+        self.slopes = np.array(slopes, dtype=float)
         self.length = len(values)
         self.total_value_cache = sum(values)
+        # In piece i, the density at x=i+t (0<=t<=1) is slopes[i]*t + intercepts[i], and its integral over the piece is values[i]:
+        self.intercepts = self.values - self.slopes / 2
+        self.piece_poly = [np.poly1d([self.slopes[i], self.intercepts[i]]) for i in range(self.length)]
+        # cumulative_values[i] = the value of [0,i]; used to answer eval queries in O(1) and mark queries in O(log length).
+        self.cumulative_values = np.concatenate(([0], np.cumsum(self.values)))
 
     def __repr__(self):
         return f"Piecewise-linear valuation with values {self.values} and total value={self.total_value_cache}"
@@ -740,25 +795,55 @@ class PiecewiseLinearValuation(Valuation):
         55.4375
         >>> a.eval(3,3)
         0.0
+        >>> a.eval(1.25,2)
+        16.6875
         """
         if start < 0 or end > self.length:
             raise ValueError(f'Interval range are invalid start={start}, end={end}, length={self.length}')
 
         if end <= start:
-            return 0.0  # special case not covered by loop below
+            return 0.0  # special case not covered by the formula below
 
-        fromFloor = int(np.floor(start))
-        fromFraction = (fromFloor + 1 - start) if start > fromFloor else 0.0
-        toCeiling = int(np.ceil(end))
-        toCeilingRemovedFraction = (toCeiling - end)
+        return float(self._cumulative_value(end) - self._cumulative_value(start))
 
-        val = 0.0
-        for func_i in range(fromFloor, toCeiling):
-            interval_start = fromFraction
-            interval_end = 1 if (func_i + 1) != toCeiling else 1 - toCeilingRemovedFraction
-            val += self.values_integral[func_i](interval_start, interval_end)
-            fromFraction = 0
-        return val
+    def eval_many(self, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+        """
+        Answer many Eval queries at once.
+
+        :param starts, ends: arrays of the same shape.
+        :return: an array with the value of each interval [starts[i],ends[i]].
+
+        >>> a = PiecewiseLinearValuation([11,22,33,44],[1,2,3,-2])
+        >>> a.eval_many([1, 1.5, 1, 1.5, 3], [3, 3, 3.25, 3.25, 3])
+        array([55.    , 44.25  , 66.1875, 55.4375,  0.    ])
+        """
+        starts = np.asarray(starts, dtype=float)
+        ends = np.asarray(ends, dtype=float)
+        if np.any(starts < 0) or np.any(ends > self.length):
+            raise ValueError(f'Interval range are invalid starts={starts}, ends={ends}, length={self.length}')
+        return np.where(ends <= starts, 0.0, self._cumulative_value(ends) - self._cumulative_value(starts))
+
+    def _cumulative_value(self, locations):
+        """
+        :return: the value of [0,location], for a location (or an array of locations) in [0,length].
+        """
+        pieces = np.minimum(np.floor(locations).astype(int), self.length - 1)
+        t = locations - pieces
+        return self.cumulative_values[pieces] + (self.slopes[pieces] / 2 * t + self.intercepts[pieces]) * t
+
+    def _position_in_pieces(self, pieces, remaining_values):
+        """
+        Solves, in closed form, slopes/2*t^2 + intercepts*t = remaining_values for t in [0,1] (in each given piece),
+        :return: pieces + t.
+        The root is computed as 2r / (b + sqrt(b^2 + 4ar)), which is numerically stable, and is also correct when the slope is 0.
+        """
+        a = self.slopes[pieces] / 2
+        b = self.intercepts[pieces]
+        discriminant = np.maximum(b * b + 4 * a * remaining_values, 0)
+        denominator = b + np.sqrt(discriminant)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = np.where(denominator > 0, 2 * remaining_values / denominator, 0.0)
+        return pieces + np.clip(t, 0, 1)
 
     def mark(self, start: float, target_value: float):
         """
@@ -771,30 +856,32 @@ class PiecewiseLinearValuation(Valuation):
 
         >>> a = PiecewiseLinearValuation([11,22,33,44],[1,2,0,-4])
         >>> a.mark(1, 55)
-        3
-        >>> a.mark(1.5, 44)
-        2.992
-        >>> a.mark(1, 66)
-        3.242
-        >>> a.mark(1.5, 55)
-        3.236
+        3.0
+        >>> round(a.mark(1.5, 44), 6)
+        2.992424
+        >>> round(a.mark(1, 66), 6)
+        3.24167
+        >>> round(a.mark(1.5, 55), 6)
+        3.23612
         >>> a.mark(1, 99)
-        4
+        4.0
         >>> a.mark(1, 100)
         >>> a.mark(1, 0)
         1.0
         >>> a = PiecewiseLinearValuation([2,2],[1,0])
-        >>> a.mark(0,1)
-        0.562
+        >>> round(a.mark(0,1), 6)
+        0.561553
         >>> a.mark(1,1)
         1.5
         >>> a.mark(1,2)
-        2
+        2.0
         >>> a.mark(0,3)
         1.5
         >>> a.mark(0,6) # returns none since no such value exists
-        >>> a.mark(0,0.2)
-        0.128
+        >>> round(a.mark(0,0.2), 6)
+        0.127882
+        >>> round(a.eval(0, a.mark(0,0.2)), 12)
+        0.2
         """
         # the cake to the left of 0 and to the right of length is considered worthless.
         start = max(0, start)
@@ -804,44 +891,40 @@ class PiecewiseLinearValuation(Valuation):
         if target_value < 0:
             raise ValueError("sum out of range (should be positive): {}".format(sum))
 
-        start_floor = int(np.floor(start))
-        if start_floor >= len(self.values):
-            raise ValueError(
-                f"mark({start},{target_value}): start_floor ({start_floor}) is >= length of values ({self.values})")
-
-        start_fraction = (start_floor + 1 - start) if start > start_floor else 0.0
-        current_value = self.values_integral[start_floor](start_fraction, 1)
-        if current_value == target_value:
-            return start_floor + 1
-        elif current_value < target_value:
-            return self.mark(start_floor + 1, target_value - current_value)
-        else:
-            inte_poly = np.polyint(self.piece_poly[start_floor])
-            if inte_poly.order > 1:
-                temp_poly = np.poly1d([target_value])
-                target_poly = inte_poly - temp_poly
-                for root in target_poly.r:
-                    if 0 <= root <= 1:
-                        return round(start_floor + root, 3)
-            else:
-                return round((target_value / current_value) + start_floor, 3)
-        # Value is too high: return None
-        return None
-
-
-def set_poly_func(value, slope, x_0, x_1):
-    value_0, _ = integrate.quad(func_x(slope), x_0, x_1)
-    const = (value - value_0)/(x_1 - x_0)
-    return np.poly1d([slope, const])
-
+        if target_value == 0:
+            return float(start)
+        cumulative_target = self._cumulative_value(start) + target_value
+        if cumulative_target > self.cumulative_values[-1]:
+            return None  # value is too high
+        # The first piece in which the cumulative value reaches the target:
+        piece = int(np.searchsorted(self.cumulative_values, cumulative_target, side="left")) - 1
+        piece = min(max(piece, int(np.floor(start))), self.length - 1)
+        return float(self._position_in_pieces(piece, cumulative_target - self.cumulative_values[piece]))
 
-def set_integral_func(poly, x_0, x_1):
-    integ = poly.integ()
-    return lambda start, end: ((integ(end) - integ(start)) if x_0 <= start and end <= x_1 else 0)
+    def mark_many(self, starts: np.ndarray, target_values: np.ndarray) -> np.ndarray:
+        """
+        Answer many Mark queries at once.
 
+        :param starts, target_values: arrays of the same shape.
+        :return: an array with the mark of each pair (starts[i],target_values[i]), or nan where the target value is too high.
 
-def func_x(m, c=0):
-    return lambda x: m * x + c
+        >>> a = PiecewiseLinearValuation([11,22,33,44],[1,2,0,-4])
+        >>> a.mark_many([1, 1.5, 1, 1, 1, 4], [55, 44, 99, 100, 0, 1]).round(6)
+        array([3.      , 2.992424, 4.      ,      nan, 1.      ,      nan])
+        """
+        starts = np.maximum(np.asarray(starts, dtype=float), 0)
+        target_values = np.asarray(target_values, dtype=float)
+        if np.any(target_values < 0):
+            raise ValueError(f"sum out of range (should be positive): {target_values}")
+        too_far = starts >= self.length
+        starts = np.minimum(starts, self.length)
+        cumulative_targets = self._cumulative_value(starts) + target_values
+        too_high = cumulative_targets > self.cumulative_values[-1]
+        pieces = np.searchsorted(self.cumulative_values, cumulative_targets, side="left") - 1
+        pieces = np.clip(pieces, np.minimum(np.floor(starts).astype(int), self.length - 1), self.length - 1)
+        marks = self._position_in_pieces(pieces, cumulative_targets - self.cumulative_values[pieces])
+        marks = np.where(target_values == 0, starts, marks)
+        return np.where(too_far | too_high, np.nan, marks)
 
 
 if __name__ == "__main__":
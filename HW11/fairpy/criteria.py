@@ -7,6 +7,10 @@ Programmer: Erel Segal-Halevi
 Since: 2021-04
 """
 
+import numpy as np
+import scipy.sparse
+import networkx
+
 def is_envyfree(agents, bundles, roundAcc:int=2)->bool:
 	"""
 	checks whether or not the allocation is envy free.
@@ -31,6 +35,159 @@ def is_envyfree(agents, bundles, roundAcc:int=2)->bool:
 				return False
 	return True
 
+
+def fairness_report(allocation, c:int=1, mms:bool=True)->dict:
+	"""
+	Evaluates the fairness criteria of an allocation of goods at once, from the agents x bundles utility matrix of the allocation.
+	For additive agents, the values of each agent's best and worst good in each bundle are computed
+	with one vectorized operation per bundle; other agents are queried through their valuation methods.
+
+	:param allocation: an Allocation, in which bundle i is given to agent i (e.g. the output of an allocation algorithm).
+	:param c: the number of best goods that are ignored in PROPc.
+	:param mms: whether to compute the 1-out-of-n maximin shares of the agents (for MMS_ratio); this requires solving a partition problem per agent.
+	:return: a dict with the following keys:
+	   * "EF", "EF1", "EFx", "PROP", "PROP1", "PROPc": whether the allocation satisfies the criterion for all agents;
+	   * "MMS_ratio": the smallest ratio, over all agents, between the agent's value and its 1-out-of-n MMS (None if mms is False);
+	   * "num_of_envy_edges", "num_of_envious_agents", "max_envy", "has_envy_cycle": statistics of the envy graph;
+	   * "agents": a dict that maps each criterion, and "envy" (the largest envy of each agent), to an array with its value for each agent.
+
+	>>> import fairpy
+	>>> agents = {"Alice": {"x":1, "y":2, "z":4}, "George": {"x":4, "y":2, "z":1}}
+	>>> report = fairness_report(fairpy.Allocation(agents, {"Alice":["z"], "George":["x","y"]}))
+	>>> [report[criterion] for criterion in ["EF", "EF1", "EFx", "PROP", "PROP1", "PROPc", "MMS_ratio"]]
+	[True, True, True, True, True, True, 1.3333333333333333]
+	>>> report = fairness_report(fairpy.Allocation(agents, {"Alice":["y"], "George":["x","z"]}))
+	>>> [report[criterion] for criterion in ["EF", "EF1", "EFx", "PROP", "PROP1", "PROPc"]]
+	[False, True, False, False, True, True]
+	>>> report["agents"]["EF"], report["num_of_envy_edges"], report["max_envy"], report["has_envy_cycle"]
+	(array([False,  True]), 1, 3.0, False)
+	>>> report = fairness_report(fairpy.Allocation(fairpy.ValuationMatrix([[1,2,4],[4,2,1]]), [[0],[2]]))
+	>>> report["EF"], report["has_envy_cycle"], report["agents"]["MMS_ratio"]
+	(False, True, array([0.33333333, 0.33333333]))
+	"""
+	num_of_agents = allocation.num_of_agents
+	utilities = allocation.utility_profile_matrix()
+	if scipy.sparse.issparse(utilities):
+		utilities = utilities.toarray()
+	utilities = np.asarray(utilities, dtype=float)
+	own_values = np.diag(utilities).copy()
+
+	tables = _additive_criteria_tables(allocation.agents, allocation.bundles, utilities, c, mms)
+	if tables is None:
+		tables = _general_criteria_tables(allocation.agents, allocation.bundles, own_values, c, mms)
+	(except_best, except_worst, total_values, total_values_except_c, best_outside, maximin_shares) = tables
+
+	envy = utilities - own_values[:,None]
+	envy_edges = envy > 0
+	per_agent = {
+		"EF": ~envy_edges.any(axis=1),
+		"EF1": (except_best <= own_values[:,None]).all(axis=1),
+		"EFx": (except_worst <= own_values[:,None]).all(axis=1),
+		"PROP": own_values * num_of_agents >= total_values,
+		"PROP1": (own_values + best_outside) * num_of_agents >= total_values,
+		"PROPc": own_values * num_of_agents >= total_values_except_c,
+	}
+	report = {criterion: bool(satisfied.all()) for criterion,satisfied in per_agent.items()}
+	if maximin_shares is not None:
+		with np.errstate(divide="ignore", invalid="ignore"):
+			per_agent["MMS_ratio"] = np.where(maximin_shares > 0, own_values / maximin_shares, np.inf)
+		report["MMS_ratio"] = float(per_agent["MMS_ratio"].min())
+	else:
+		report["MMS_ratio"] = None
+	per_agent["envy"] = envy.max(axis=1).clip(min=0)
+	report["num_of_envy_edges"] = int(envy_edges.sum())
+	report["num_of_envious_agents"] = int(envy_edges.any(axis=1).sum())
+	report["max_envy"] = float(per_agent["envy"].max())
+	envy_graph = networkx.DiGraph(list(zip(*np.nonzero(envy_edges))))
+	report["has_envy_cycle"] = not networkx.is_directed_acyclic_graph(envy_graph)
+	report["agents"] = per_agent
+	return report
+
+
+def _additive_criteria_tables(agents, bundles, utilities:np.ndarray, c:int, mms:bool):
+	"""
+	Computes the arrays needed by fairness_report when all agents are additive over the same items; otherwise returns None.
+	"""
+	from fairpy.allocations import _additive_values_and_items, _bundles_to_matrix
+	from fairpy.items.valuations import AdditiveValuation
+	additive = _additive_values_and_items(agents)
+	if additive is None:
+		return None
+	(values, items) = additive
+	sparse = scipy.sparse.issparse(values)
+	bundle_matrix = _bundles_to_matrix(bundles, items, sparse=sparse)
+	if bundle_matrix is None:
+		return None
+	bundle_matrix = scipy.sparse.csr_matrix(bundle_matrix)
+	if sparse:
+		values = values.tocsc()
+	(num_of_agents, num_of_bundles) = utilities.shape
+
+	# The values of the best and worst good of each bundle, for each agent:
+	best_goods = np.zeros([num_of_agents, num_of_bundles])
+	worst_goods = np.zeros([num_of_agents, num_of_bundles])
+	bundle_sizes = np.diff(bundle_matrix.indptr)
+	for bundle in range(num_of_bundles):
+		if bundle_sizes[bundle] > 0:
+			bundle_values = values[:, bundle_matrix.indices[bundle_matrix.indptr[bundle]:bundle_matrix.indptr[bundle+1]]]
+			best_goods[:,bundle] = _dense(bundle_values.max(axis=1))
+			worst_goods[:,bundle] = _dense(bundle_values.min(axis=1))
+	except_best = np.where(bundle_sizes > 1, utilities - best_goods, 0)    # value_except_best_c_goods with c=1
+	except_worst = np.where(bundle_sizes > 1, utilities - worst_goods, 0)  # value_except_worst_c_goods with c=1
+
+	total_values = _dense(values.sum(axis=1)).astype(float)
+	values_by_agent = values.tocsr() if sparse else values
+	best_outside = np.zeros(num_of_agents)     # the value of the best good outside the agent's own bundle
+	best_c_values = np.zeros(num_of_agents)    # the sum of values of the agent's best c goods
+	for agent in range(num_of_agents):
+		own_items = bundle_matrix.indices[bundle_matrix.indptr[agent]:bundle_matrix.indptr[agent+1]]
+		if sparse:
+			row = values_by_agent[agent]
+			(row_items, row_values) = (row.indices, row.data)
+		else:
+			row_values = values_by_agent[agent]
+			row_items = np.arange(len(row_values))
+		outside_values = row_values[~np.isin(row_items, own_items)]
+		best_outside[agent] = max(outside_values.max(initial=0), 0)
+		if c > 0:
+			best_c_values[agent] = np.sort(row_values)[::-1][:c].clip(min=0).sum()
+
+	maximin_shares = None
+	if mms:
+		if isinstance(agents, list):
+			valuations = agents
+		elif sparse:
+			valuations = [AdditiveValuation(dict(zip(values_by_agent[agent].indices.tolist(), values_by_agent[agent].data.tolist()))) for agent in range(num_of_agents)]
+		else:
+			valuations = [AdditiveValuation(values[agent].tolist()) for agent in range(num_of_agents)]
+		maximin_shares = np.array([float(valuation.value_1_of_c_MMS(num_of_agents)) for valuation in valuations])
+	return (except_best, except_worst, total_values, total_values - best_c_values, best_outside, maximin_shares)
+
+
+def _general_criteria_tables(agents, bundles, own_values:np.ndarray, c:int, mms:bool):
+	"""
+	Computes the arrays needed by fairness_report by querying the valuation methods of each agent.
+	"""
+	num_of_agents = len(agents)
+	except_best = np.array([[agent.value_except_best_c_goods(set(bundle or []), 1) for bundle in bundles] for agent in agents], dtype=float)
+	except_worst = np.array([[agent.value_except_worst_c_goods(set(bundle or []), 1) for bundle in bundles] for agent in agents], dtype=float)
+	total_values = np.array([agent.value_proportional_except_c(num_of_agents, 0) * num_of_agents for agent in agents], dtype=float)
+	total_values_except_c = np.array([agent.value_proportional_except_c(num_of_agents, c) * num_of_agents for agent in agents], dtype=float)
+	best_outside = np.array([
+		max([agent.value({item}) for item in agent.all_items() if item not in set(bundle or [])], default=0)
+		for agent,bundle in zip(agents, bundles)
+	], dtype=float)
+	maximin_shares = np.array([float(agent.value_1_of_c_MMS(num_of_agents)) for agent in agents]) if mms else None
+	return (except_best, except_worst, total_values, total_values_except_c, best_outside, maximin_shares)
+
+
+def _dense(array)->np.ndarray:
+	"""
+	Converts the result of a numpy or scipy.sparse row reduction to a 1-dimensional array.
+	"""
+	return np.asarray(array.todense() if scipy.sparse.issparse(array) else array).ravel()
+
+
 if __name__ == "__main__":
     import doctest
     (failures,tests) = doctest.testmod(report=True)
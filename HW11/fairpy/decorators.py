@@ -7,12 +7,52 @@ Programmer: Erel Segal-Halevi
 Since: 2021-11
 """
 import numpy as np
-from typing import Any, Callable, List
+from typing import Any, Callable, List, Tuple
 from fairpy import ValuationMatrix, AllocationMatrix, Allocation
 from fairpy.bundles import FractionalBundle
+from fairpy.items.valuations import _issparse
 from functools import wraps
 
 
+def input_to_valuation_matrix(input) -> Tuple[ValuationMatrix, List[str], List[str]]:
+    """
+    Converts any of the input formats accepted by `convert_input_to_valuation_matrix` to a ValuationMatrix.
+    :return: (valuation_matrix, agent_names, object_names); the names are None when the input does not specify them.
+
+    >>> input_to_valuation_matrix({"a": {"x":1,"y":2}, "b": {"x":3,"y":4}})
+    ([[1 2]
+     [3 4]], ['a', 'b'], ['x', 'y'])
+    >>> input_to_valuation_matrix([[1,2],[3,4]])
+    ([[1 2]
+     [3 4]], None, None)
+    >>> v = ValuationMatrix([[1,2],[3,4]])
+    >>> (v.agent_names, v.object_names) = (["a","b"], ["x","y"])
+    >>> input_to_valuation_matrix(v)[1:]
+    (['a', 'b'], ['x', 'y'])
+    """
+    agent_names = object_names = None
+    if isinstance(input, ValuationMatrix): # instance is already a valuation matrix (possibly memory-mapped) - use it as is
+        valuation_matrix = input
+        (agent_names, object_names) = (input.agent_names, input.object_names)
+    elif isinstance(input, np.ndarray):    # instance is a numpy valuation matrix (or np.memmap); it is not copied
+        valuation_matrix = ValuationMatrix(input)
+    elif isinstance(input, list) and isinstance(input[0], list):            # list of lists
+        valuation_matrix = ValuationMatrix(input)
+    elif isinstance(input, dict):
+        agent_names = list(input.keys())
+        list_of_valuations = list(input.values())
+        if isinstance(list_of_valuations[0], dict): # maps agent names to dicts of valuations
+            object_names = list(list_of_valuations[0].keys())
+            list_of_valuations = [
+                [valuation[object] for object in object_names]
+                for valuation in list_of_valuations
+            ]
+        valuation_matrix = ValuationMatrix(list_of_valuations)
+    else:
+        raise TypeError(f"Unsupported input type: {type(input)}")
+    return (valuation_matrix, agent_names, object_names)
+
+
 def convert_input_to_valuation_matrix(algorithm: Callable)->Allocation:
     """
     Adapts an algorithm, that accepts as input a ValuationMatrix object,
@@ -83,31 +123,29 @@ def convert_input_to_valuation_matrix(algorithm: Callable)->Allocation:
     b gets { 100.0% of y} with value 5.
     a gets { 100.0% of x, 100.0% of z} with value 10.
     <BLANKLINE>
+
+    >>> import os, tempfile       # a memory-mapped valuation matrix is passed to the algorithm untouched (not copied); its agent names are used in the output.
+    >>> path = os.path.join(tempfile.mkdtemp(), "instance.npy")
+    >>> ValuationMatrix([[1,4,7],[6,3,0]]).save(path, agent_names=["a","b"])
+    >>> convert_input_to_valuation_matrix(dummy_matrix_list_algorithm)(ValuationMatrix.open(path))
+    a gets {0,2} with value 8.
+    b gets {1} with value 3.
+    <BLANKLINE>
+    >>> ValuationMatrix([[1,4,7],[6,3,0]]).save(path, agent_names=["a","b"], object_names=["x","y","z"])    # and so are its object names
+    >>> convert_input_to_valuation_matrix(dummy_matrix_list_algorithm)(ValuationMatrix.open(path))
+    a gets {x,z} with value 8.
+    b gets {y} with value 3.
+    <BLANKLINE>
+    >>> convert_input_to_valuation_matrix(dummy_matrix_matrix_algorithm)(ValuationMatrix.open(path))
+    a gets { 100.0% of x, 100.0% of z} with value 8.
+    b gets { 100.0% of y} with value 3.
+    <BLANKLINE>
     """
     @wraps(algorithm)
     def adapted_algorithm(input, *args, **kwargs):
 
         # Step 1. Adapt the input:
-        valuation_matrix = list_of_valuations = object_names = agent_names = None
-        if isinstance(input, ValuationMatrix): # instance is already a valuation matrix
-            valuation_matrix = input
-        elif isinstance(input, np.ndarray):    # instance is a numpy valuation matrix
-            valuation_matrix = ValuationMatrix(input)
-        elif isinstance(input, list) and isinstance(input[0], list):            # list of lists
-            list_of_valuations = input
-            valuation_matrix = ValuationMatrix(list_of_valuations)
-        elif isinstance(input, dict):  
-            agent_names = list(input.keys())
-            list_of_valuations = list(input.values())
-            if isinstance(list_of_valuations[0], dict): # maps agent names to dicts of valuations
-                object_names = list(list_of_valuations[0].keys())
-                list_of_valuations = [
-                    [valuation[object] for object in object_names]
-                    for valuation in list_of_valuations
-                ]
-            valuation_matrix = ValuationMatrix(list_of_valuations)
-        else:
-            raise TypeError(f"Unsupported input type: {type(input)}")
+        (valuation_matrix, agent_names, object_names) = input_to_valuation_matrix(input)
 
         # Step 2. Run the algorithm:
         output = algorithm(valuation_matrix, *args, **kwargs)
@@ -119,12 +157,12 @@ def convert_input_to_valuation_matrix(algorithm: Callable)->Allocation:
         if agent_names is None:
             agent_names = [f"Agent #{i}" for i in valuation_matrix.agents()]
 
-        if isinstance(output, np.ndarray) or isinstance(output, AllocationMatrix):  # allocation matrix
+        if isinstance(output, np.ndarray) or isinstance(output, AllocationMatrix) or _issparse(output):  # allocation matrix
             allocation_matrix = AllocationMatrix(output)
-            if isinstance(input, dict):
+            if isinstance(input, dict) or object_names is not None:
                 list_of_bundles = [FractionalBundle(allocation_matrix[i], object_names) for i in allocation_matrix.agents()]
                 dict_of_bundles = dict(zip(agent_names,list_of_bundles))
-                return Allocation(input, dict_of_bundles, matrix=allocation_matrix)
+                return Allocation(input if isinstance(input,dict) else valuation_matrix, dict_of_bundles, matrix=allocation_matrix)
             else:
                 return Allocation(valuation_matrix, allocation_matrix)
         elif isinstance(output, list):
@@ -8,14 +8,18 @@ Since: 2021-02
 """
 
 from typing import *
+from collections.abc import MutableMapping
 
-from numpy import char
+import numpy as np
+from fairpy import ValuationMatrix
 from fairpy.agents import AdditiveAgent, Bundle
+from fairpy.allocations import AllocationMatrix
 
 
 '''
 A class that represents a fractional allocation, that is, an allocation in which several agents can be given parts of 
 the same object.
+The fractions are kept in a dense agents*items matrix, and the agents and items are mapped to row and column indices once, at construction.
 '''
 class FractionalAllocation:
     """
@@ -67,20 +71,117 @@ class FractionalAllocation:
     """
 
     # constructor
-    def __init__(self, agents: List[AdditiveAgent], map_item_to_fraction: List[dict]):
+    def __init__(self, agents: List[AdditiveAgent], map_item_to_fraction: Union[List[dict], np.ndarray], items: List = None):
+        """
+        :param agents: the agents, in the order of the rows.
+        :param map_item_to_fraction: either a list of dicts (one per agent) mapping each item to its fraction,
+                                     or an agents*items matrix of fractions (which is used as is, without copying).
+        :param items: the items, in the order of the columns. Default: the order of the dicts; for a matrix, range(num of columns).
+        """
         if len(agents) != len(map_item_to_fraction):
             raise Exception("The amount of agents differs from the dictionaries that represent how much each agent received from each item.")
         # elif check_input(map_item_to_fraction):
         self.agents = agents
-        self.map_item_to_fraction = map_item_to_fraction
+        if isinstance(map_item_to_fraction, np.ndarray):
+            self.items = list(range(map_item_to_fraction.shape[1]) if items is None else items)
+            self.matrix = map_item_to_fraction
+        else:
+            if items is None:
+                items = list(dict.fromkeys(item for fractions in map_item_to_fraction for item in fractions))
+            self.items = list(items)
+            self.matrix = np.zeros((len(agents), len(self.items)))
+        self.agent_index = {agent: i_agent for i_agent, agent in enumerate(agents)}
+        self.item_index = {item: i_item for i_item, item in enumerate(self.items)}
+        if not isinstance(map_item_to_fraction, np.ndarray):
+            for i_agent, fractions in enumerate(map_item_to_fraction):
+                for item, fraction in fractions.items():
+                    self.matrix[i_agent, self.item_index[item]] = fraction
+        self._values = None
+
+    @staticmethod
+    def from_allocation_matrix(agents: List[AdditiveAgent], allocation_matrix: AllocationMatrix, items: List = None) -> "FractionalAllocation":
+        """
+        Creates a FractionalAllocation that shares its fractions with the given AllocationMatrix (no copy).
+
+        >>> agent1 = AdditiveAgent({'x':1, 'y':2}, name="agent1")
+        >>> agent2 = AdditiveAgent({'x':3, 'y':2}, name="agent2")
+        >>> z = AllocationMatrix(np.array([[0.25, 1.0], [0.75, 0.0]]))
+        >>> A = FractionalAllocation.from_allocation_matrix([agent1, agent2], z, items=['x','y'])
+        >>> A.get_agent_fraction(agent2, 'x')
+        0.75
+        >>> A.to_allocation_matrix()._z is z._z
+        True
+        """
+        return FractionalAllocation(agents, AllocationMatrix(allocation_matrix)._z, items)
+
+    @staticmethod
+    def from_valuation_matrix(valuation_matrix: ValuationMatrix, allocation_matrix: AllocationMatrix) -> "FractionalAllocation":
+        """
+        Creates a FractionalAllocation for additive agents with the given valuation matrix.
+        The agents are named "Agent #i" and the items are 0,...,m-1, as in the ValuationMatrix.
+        Both matrices are shared (no copy).
+
+        >>> v = ValuationMatrix(np.array([[1., 2.], [3., 2.]]))
+        >>> A = FractionalAllocation.from_valuation_matrix(v, [[0.25, 1.0], [0.75, 0.0]])
+        >>> A.utilities()
+        array([2.25, 2.25])
+        >>> A.to_valuation_matrix()._v is v._v
+        True
+        """
+        valuation_matrix = ValuationMatrix(valuation_matrix)
+        agents = [AdditiveAgent(list(valuation_matrix[i]), name=f"Agent #{i}") for i in valuation_matrix.agents()]
+        allocation = FractionalAllocation.from_allocation_matrix(agents, allocation_matrix)
+        allocation._values = valuation_matrix._v
+        return allocation
+
+    def to_allocation_matrix(self) -> AllocationMatrix:
+        """
+        :return: an AllocationMatrix that shares the fractions of this allocation (no copy).
+        """
+        return AllocationMatrix(self.matrix)
+
+    def to_valuation_matrix(self) -> ValuationMatrix:
+        """
+        :return: the ValuationMatrix of the agents, with the items in the order of the columns. It is computed once and cached.
+
+        >>> agent1 = AdditiveAgent({'x':1, 'y':2, 'z':3}, name="agent1")
+        >>> agent2 = AdditiveAgent({'x':3, 'y':2, 'z':1}, name="agent2")
+        >>> FractionalAllocation([agent1, agent2], [{'z':0.5, 'x':0.5, 'y':0.5},{'x':0.5, 'y':0.5, 'z':0.5}]).to_valuation_matrix()
+        [[3 1 2]
+         [1 3 2]]
+        """
+        if self._values is None:
+            self._values = np.array([[_value_of_item(agent, item) for item in self.items] for agent in self.agents])
+        return ValuationMatrix(self._values)
+
+    @property
+    def map_item_to_fraction(self) -> List["AgentFractions"]:
+        """
+        A list with a dict-like view of the fractions of each agent. Writing to a view changes the allocation.
+        """
+        return [AgentFractions(self, i_agent) for i_agent in range(len(self.agents))]
 
     # A method that calculates the value of the whole allocation. Returns float number.
     def value_of_fractional_allocation(self) -> float:
-        result = 0
-        for i_agent, agent in enumerate(self.agents):
-                agent_value = get_value_of_agent_in_alloc(self.agents[i_agent].valuation.map_good_to_value, self.map_item_to_fraction[i_agent])
-                result += agent_value
-        return result
+        return float(self.utilities().sum())
+
+    def utilities(self) -> np.ndarray:
+        """
+        :return: a vector with the utility of each agent from his fractions.
+
+        >>> agent1 = AdditiveAgent({'x':1, 'y':2, 'z':3}, name="agent1")
+        >>> agent2 = AdditiveAgent({'x':3, 'y':2, 'z':1}, name="agent2")
+        >>> FractionalAllocation([agent1, agent2], [{'x':0.4, 'y':0, 'z':0.5},{'x':0.6, 'y':1, 'z':0.5}]).utilities().round(2)
+        array([1.9, 4.3])
+        """
+        return np.einsum("ij,ij->i", self.to_valuation_matrix()._v, self.matrix)
+
+    def utility(self, agent: AdditiveAgent) -> float:
+        """
+        :return: the utility of the given agent from his fractions.
+        """
+        i_agent = self.agent_index[agent]
+        return float(self.to_valuation_matrix()._v[i_agent] @ self.matrix[i_agent])
 
     def get_agent_fraction(self, agent: AdditiveAgent, item: str) -> float:
         """
@@ -92,17 +193,14 @@ class FractionalAllocation:
         Returns:
             float: the part of the current item allocation from 0 to 1
         """
-        for i_agent, cur_agent in enumerate(self.agents):
-            if cur_agent == agent:
-                return self.map_item_to_fraction[i_agent][item]
+        return float(self.matrix[self.agent_index[agent], self.item_index[item]])
+
+    def set_agent_fraction(self, agent: AdditiveAgent, item: str, fraction: float) -> None:
+        self.matrix[self.agent_index[agent], self.item_index[item]] = fraction
 
     # A method that tests whether the allocation is complete (since all fractions are 0.0 or 1.0)
     def is_complete_allocation(self) -> bool:
-        for d in self.map_item_to_fraction:
-            for val in d.values():
-                if val != 0.0 and val != 1.0:
-                    return False
-        return True
+        return bool(np.all((self.matrix == 0) | (self.matrix == 1)))
 
     # to string
     def __repr__(self):
@@ -110,14 +208,62 @@ class FractionalAllocation:
             return ""
         else:
             result = ""
+            values = self.to_valuation_matrix()._v
             for i_agent, agent in enumerate(self.agents):
-                # agent_bundle = stringify_bundle(get_items_of_agent_in_alloc(self.map_item_to_fraction[i_agent]))
-                agent_bundle = stringify_bundle2(self.map_item_to_fraction[i_agent])
-                agent_value = get_value_of_agent_in_alloc(self.agents[i_agent].valuation.map_good_to_value, self.map_item_to_fraction[i_agent])
+                agent_fractions = dict(self.map_item_to_fraction[i_agent])
+                # agent_bundle = stringify_bundle(get_items_of_agent_in_alloc(agent_fractions))
+                agent_bundle = stringify_bundle2(agent_fractions)
+                agent_value = get_value_of_agent_in_alloc(dict(zip(self.items, values[i_agent].tolist())), agent_fractions)
                 result += "{}'s bundle: {},  value: {}\n".format(agent.name(),  agent_bundle, agent_value)
             return result
 
 
+class AgentFractions(MutableMapping):
+    """
+    A dict-like view of the fractions of a single agent in a FractionalAllocation: maps each item to its fraction.
+
+    >>> agent1 = AdditiveAgent({'x':1, 'y':2}, name="agent1")
+    >>> A = FractionalAllocation([agent1], [{'x':0.5, 'y':1.0}])
+    >>> fractions = A.map_item_to_fraction[0]
+    >>> fractions['x']
+    0.5
+    >>> fractions['x'] = 1.0
+    >>> A.is_complete_allocation()
+    True
+    >>> dict(fractions)
+    {'x': 1.0, 'y': 1.0}
+    """
+    def __init__(self, allocation: FractionalAllocation, i_agent: int):
+        self._allocation = allocation
+        self._row = allocation.matrix[i_agent]
+
+    def __getitem__(self, item):
+        return float(self._row[self._allocation.item_index[item]])
+
+    def __setitem__(self, item, fraction):
+        self._row[self._allocation.item_index[item]] = fraction
+
+    def __delitem__(self, item):
+        raise TypeError("Items cannot be removed from a FractionalAllocation")
+
+    def __iter__(self):
+        return iter(self._allocation.items)
+
+    def __len__(self):
+        return len(self._allocation.items)
+
+    def __repr__(self):
+        return repr(dict(self))
+
+
+def _value_of_item(agent: AdditiveAgent, item) -> float:
+    valuation = getattr(agent, "valuation", None)
+    map_good_to_value = getattr(valuation, "map_good_to_value", None)
+    if isinstance(map_good_to_value, dict):
+        return map_good_to_value[item]
+    return agent.value({item})
+
+
 # -------------------------Help functions for the Fractional Allocation class--------------------------------------------
 """
 The function checks the input value of the allocation.
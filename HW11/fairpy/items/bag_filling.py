@@ -9,6 +9,7 @@ Since:  2021-04
 """
 
 from fairpy import Allocation, ValuationMatrix
+from fairpy.items.valuations import _issparse
 from typing import List
 import numpy as np
 
@@ -46,6 +47,12 @@ class Bag:
 	>>> bag.append([0,1])
 	>>> print(bag)
 	Bag objects: [0, 1], values: [44. 66.]
+
+	>>> import scipy.sparse    # a sparse valuation matrix is used without converting it to a dense one
+	>>> bag = Bag(ValuationMatrix(scipy.sparse.csr_matrix([[11,33,5],[44,22,0],[50,0,1]])), thresholds=[30,30,30])
+	>>> bag.append(0)
+	>>> print(bag)
+	Bag objects: [0], values: [11. 44. 50.]
 	"""
 
 	def __init__(self, values:ValuationMatrix, thresholds:List[float]):
@@ -55,7 +62,12 @@ class Bag:
 		:param thresholds: determines, for each agent, the minimum value that should be in a bag before the agent accepts it.
 		"""
 		self.values = ValuationMatrix(values)
-		self.thresholds = thresholds
+		self.thresholds = np.asarray(thresholds)
+		# a row for each object, so that appending an object adds a single row.
+		if _issparse(self.values._v):
+			self.map_object_to_agent_values = self.values._v.T.tocsr()
+		else:
+			self.map_object_to_agent_values = np.ascontiguousarray(np.asarray(self.values._v).T)
 		self.reset()
 
 	def reset(self): 
@@ -76,20 +88,30 @@ class Bag:
 			return
 		logger.info("   Appending object %s.", object)
 		self.objects.append(object)
-		for agent in self.values.agents():
-			self.map_agent_to_bag_value[agent] += self.values[agent][object]
+		object_values = self.map_object_to_agent_values
+		if _issparse(object_values):   # add only the stored values of the object's row
+			start, end = object_values.indptr[object], object_values.indptr[object+1]
+			self.map_agent_to_bag_value[object_values.indices[start:end]] += object_values.data[start:end]
+		else:
+			self.map_agent_to_bag_value += object_values[object]
 		logger.debug("      Bag values: %s.", self.map_agent_to_bag_value)
 
 	def willing_agent(self, remaining_agents)->int:
 		"""
+		:param remaining_agents: a list of agent indices, or a boolean mask of the remaining agents.
 		:return the index of an arbitrary agent, from the list of remaining agents, who is willing to accept the bag 
 		 (i.e., the bag's value is above the agent's threshold).
 		 If no remaining agent is willing to accept the bag, None is returned.
+
+		>>> bag = Bag([[11,33],[44,22],[50,0]], thresholds=[30,30,30])
+		>>> bag.append(0)
+		>>> bag.willing_agent([2,1]), bag.willing_agent(np.array([True,False,False])), bag.willing_agent([])
+		(2, None, None)
 		"""
-		for agent in remaining_agents:
-			logger.debug("      Checking if agent %d is willing to take the bag", agent)
-			if self.map_agent_to_bag_value[agent] >= self.thresholds[agent]:
-				return agent
+		remaining_agents = _agent_indices(remaining_agents)
+		willing = self.map_agent_to_bag_value[remaining_agents] >= self.thresholds[remaining_agents]
+		if willing.any():
+			return int(remaining_agents[np.argmax(willing)])
 		return None
 
 
@@ -117,6 +139,7 @@ class Bag:
 		>>> bag.fill(remaining_objects=[1], remaining_agents=[0])
 		(0, [0])
 		"""
+		remaining_agents = _agent_indices(remaining_agents)
 		if len(remaining_agents)==0:
 			return (None, None)
 		willing_agent = self.willing_agent(remaining_agents)
@@ -133,6 +156,16 @@ class Bag:
 		return f"Bag objects: {self.objects}, values: {self.map_agent_to_bag_value}"
 
 
+def _agent_indices(agents)->np.ndarray:
+	"""
+	Converts a list of agent indices, or a boolean mask of agents, to an array of indices.
+	"""
+	agents = np.asarray(agents)
+	if agents.dtype == bool:
+		return np.flatnonzero(agents)
+	return agents.astype(int)
+
+
 
 #####################
 
@@ -142,21 +175,35 @@ class SequentialAllocation:
 	"""
 	A class that handles the process of sequentially allocating bundles to agents, e.g., 
 	  in a bag-filling procedure.
+	The remaining agents and objects are kept as boolean masks.
+
+	>>> allocation = SequentialAllocation(range(3), range(5), logger)
+	>>> allocation.let_agent_get_objects(1, [0,3])
+	>>> allocation.remaining_agents, allocation.remaining_objects, allocation.bundles
+	([0, 2], [1, 2, 4], [None, [0, 3], None])
 	"""
 
 	def __init__(self, agents:list, objects:list, logger):
-		self.remaining_agents = list(agents)
-		self.remaining_objects = list(objects)
+		self.is_remaining_agent = np.ones(len(agents), dtype=bool)
+		self.is_remaining_object = np.ones(len(objects), dtype=bool)
 		self.bundles = len(agents)*[None]
 		self.logger = logger
 
+	@property
+	def remaining_agents(self)->List[int]:
+		return np.flatnonzero(self.is_remaining_agent).tolist()
+
+	@property
+	def remaining_objects(self)->List[int]:
+		return np.flatnonzero(self.is_remaining_object).tolist()
+
 	def let_agent_get_objects(self, i_agent, allocated_objects):
 		self.bundles[i_agent] = allocated_objects
-		self.remaining_agents.remove(i_agent)
-		for o in allocated_objects: 
-			self.remaining_objects.remove(o)
-		self.logger.info("Agent %d takes the bag with objects %s. Remaining agents: %s. Remaining objects: %s.", 
-			i_agent, allocated_objects, self.remaining_agents, self.remaining_objects)
+		self.is_remaining_agent[i_agent] = False
+		self.is_remaining_object[np.asarray(allocated_objects, dtype=int)] = False
+		if self.logger.isEnabledFor(logging.INFO):
+			self.logger.info("Agent %d takes the bag with objects %s. Remaining agents: %s. Remaining objects: %s.", 
+				i_agent, allocated_objects, self.remaining_agents, self.remaining_objects)
 
 
 
@@ -182,6 +229,12 @@ def one_directional_bag_filling(values, thresholds:List[float]):
 	Agent #0 gets {} with value 0.
 	Agent #1 gets {0} with value 44.
 	<BLANKLINE>
+	>>> import scipy.sparse
+	>>> one_directional_bag_filling(values=scipy.sparse.csr_matrix([[11,33,5],[44,22,0],[50,0,1]]), thresholds=[30,30,30])
+	Agent #0 gets {1} with value 33.
+	Agent #1 gets {0} with value 44.
+	Agent #2 gets {} with value 0.
+	<BLANKLINE>
 	"""
 	values = ValuationMatrix(values)
 	if len(thresholds) != values.num_of_agents:
@@ -190,7 +243,7 @@ def one_directional_bag_filling(values, thresholds:List[float]):
 	allocation = SequentialAllocation(values.agents(), values.objects(), logger)
 	bag = Bag(values, thresholds)
 	while True:
-		(willing_agent, allocated_objects) = bag.fill(allocation.remaining_objects, allocation.remaining_agents)
+		(willing_agent, allocated_objects) = bag.fill(allocation.remaining_objects, allocation.is_remaining_agent)
 		if willing_agent is None:  break
 		allocation.let_agent_get_objects(willing_agent, allocated_objects)
 		bag.reset()
@@ -12,6 +12,7 @@ import cvxpy, logging, numpy as np
 from fairpy import convert_input_to_valuation_matrix, Allocation, ValuationMatrix
 from fairpy.solve import solve
 from fairpy.items.max_welfare import max_product_allocation
+from fairpy.items.problem_templates import dominating_template
 
 logger = logging.getLogger(__name__)
 
@@ -45,34 +46,13 @@ def dominating_allocation_with_bounded_sharing(instance:Any, thresholds:List) ->
     """
     # logger.info("Finding an allocation with thresholds %s", thresholds)
     v = ValuationMatrix(instance)
-    allocation_vars = cvxpy.Variable((v.num_of_agents, v.num_of_objects))
-    feasibility_constraints = [
-        sum([allocation_vars[i][o] for i in v.agents()])==1
-        for o in v.objects()
-    ]
-    positivity_constraints = [
-        allocation_vars[i][o] >= 0 for i in v.agents()
-        for o in v.objects()
-    ]
-    utilities = [sum([allocation_vars[i][o]*v[i][o] for o in v.objects()]) for i in v.agents()]
-    utility_constraints = [
-        utilities[i] >= thresholds[i] for i in range(v.num_of_agents-1)
-    ]
-    constraints = feasibility_constraints+positivity_constraints+utility_constraints
-    problem = cvxpy.Problem(cvxpy.Maximize(utilities[v.num_of_agents-1]), constraints)
-    logger.info("constraints: %s", constraints)
-    solvers = [
-        (cvxpy.SCIPY, {'method': 'highs-ds'}),        # Always finds a BFS
-        (cvxpy.MOSEK, {"bfs":True}),                  # Always finds a BFS
-        (cvxpy.OSQP, {}),                             # Default - not sure it returns a BFS
-        (cvxpy.SCIPY, {}),                            # Default - not sure it returns a BFS
-    ]
-    solve(problem, solvers=solvers)
-    if problem.status=="optimal":
-        allocation_matrix = allocation_vars.value
+    template = dominating_template(v.num_of_agents, v.num_of_objects)
+    logger.info("thresholds: %s", thresholds)
+    (allocation_matrix, status, _) = template.solve(valuations=v._v, thresholds=thresholds[:v.num_of_agents-1])
+    if status=="optimal":
         return allocation_matrix
     else:
-        raise cvxpy.SolverError(f"No optimal solution found: status is {problem.status}")
+        raise cvxpy.SolverError(f"No optimal solution found: status is {status}")
 
 
 
@@ -0,0 +1,201 @@
+#!python3
+
+"""
+A utility class EnvyGraph for envy-cycle elimination --- a subroutine in
+    various algorithms for fair allocation of indivisible items
+    (e.g. Lipton, Markakis, Mossel and Saberi (2004), and the 'Fair Enough' algorithm).
+
+The graph is kept up to date incrementally: when bundles change hands,
+only the rows and columns of the agents involved are updated.
+
+Since:  2022-05
+"""
+
+from fairpy.agents import Agent
+from typing import Any, List, Optional
+import numpy as np
+
+import logging
+logger = logging.getLogger(__name__)
+
+Item = Any
+Bundle = List[Item]
+
+
+class EnvyGraph:
+    """
+    Represents the envy graph of an allocation:
+    there is an edge i->j iff agent i values the bundle of agent j more than his own bundle.
+
+    utilities[i,j] is the value of agent i to the bundle currently held by agent j;
+    envies[i,j] is True iff agent i envies agent j.
+
+    >>> from fairpy.agents import AdditiveAgent
+    >>> Alice = AdditiveAgent({"a": 1, "b": 1, "c": 1, "d": 4, "e": 1}, name="Alice")
+    >>> Bob = AdditiveAgent({"a": 1, "b": 1, "c": 2, "d": 1, "e": 5}, name="Bob")
+    >>> Eve = AdditiveAgent({"a": 3, "b": 1, "c": 1, "d": 1, "e": 2}, name="Eve")
+    >>> graph = EnvyGraph([Alice,Bob,Eve], [['a','b'], ['c','d'], ['e']])
+    >>> graph.edges()
+    [(0, 1), (1, 2), (2, 0)]
+    >>> graph.unenvied_agent() is None
+    True
+    >>> graph.find_cycle()
+    [0, 1, 2]
+    >>> graph.rotate([0, 1, 2])
+    >>> graph.bundles
+    [['c', 'd'], ['e'], ['a', 'b']]
+    >>> graph.edges()
+    []
+    >>> graph.find_cycle() is None
+    True
+    >>> graph.unenvied_agent()
+    0
+    >>> graph.set_bundle(0, ['c'])
+    >>> graph.edges()
+    [(0, 2)]
+    >>> graph.unenvied_agent()
+    0
+    >>> graph.find_cycle() is None
+    True
+    """
+
+    def __init__(self, agents: List[Agent], bundles: List[Bundle]):
+        """
+        :param agents: the agents; each agent must have a method value(bundle).
+        :param bundles: bundles[i] is the bundle currently held by agents[i].
+        """
+        if len(agents) != len(bundles):
+            raise ValueError(f"There are {len(agents)} agents but {len(bundles)} bundles")
+        self.agents = list(agents)
+        self.bundles = list(bundles)
+        num_of_agents = len(self.agents)
+        self.utilities = np.zeros([num_of_agents, num_of_agents])
+        for j, bundle in enumerate(self.bundles):
+            self.utilities[:, j] = self._values_of(bundle)
+        self.envies = np.zeros([num_of_agents, num_of_agents], dtype=bool)
+        self._update_envies(np.arange(num_of_agents))
+        # False only when the graph is known to be acyclic, so that find_cycle can return at once.
+        self._may_have_cycle = True
+
+    def _values_of(self, bundle: Bundle) -> np.ndarray:
+        return np.array([agent.value(bundle) for agent in self.agents], dtype=float)
+
+    def _update_envies(self, changed: np.ndarray) -> None:
+        """
+        Recomputes the rows and columns of the envy bitmap of the given agents,
+        whose bundles (and hence whose own utilities) have changed.
+        """
+        own_utilities = np.diagonal(self.utilities)
+        self.envies[changed, :] = self.utilities[changed, :] > own_utilities[changed, np.newaxis]
+        self.envies[:, changed] = self.utilities[:, changed] > own_utilities[:, np.newaxis]
+
+    def _reaches(self, source: int, target: int) -> bool:
+        """
+        :return: True iff there is a non-empty path from source to target in the envy graph.
+        """
+        reached = self.envies[source].copy()
+        frontier = reached
+        while frontier.any() and not reached[target]:
+            frontier = self.envies[frontier].any(axis=0) & ~reached
+            reached |= frontier
+        return bool(reached[target])
+
+    def edges(self) -> List[tuple]:
+        """
+        :return: the edges of the envy graph, as pairs of agent indices.
+        """
+        return [(int(i), int(j)) for i, j in np.argwhere(self.envies)]
+
+    def set_bundle(self, agent_index: int, bundle: Bundle) -> None:
+        """
+        Gives the given bundle to the given agent instead of his current bundle.
+        Only the column of the new bundle is re-evaluated (one value query per agent).
+
+        :param agent_index: the index of the agent whose bundle changes.
+        :param bundle: the new bundle of that agent.
+        """
+        self.bundles[agent_index] = bundle
+        self.utilities[:, agent_index] = self._values_of(bundle)
+        self._update_envies(np.array([agent_index]))
+        if not self._may_have_cycle:
+            # All new edges touch agent_index, so a new cycle must pass through it.
+            self._may_have_cycle = self._reaches(agent_index, agent_index)
+
+    def find_cycle(self) -> Optional[List[int]]:
+        """
+        Looks for an envy-cycle by a depth-first search that visits the agents in index order
+        (the same cycle that networkx.find_cycle returns on the corresponding DiGraph).
+
+        :return: a list of agent indices [i_0, i_1, ..., i_k], where each agent envies the next one
+                 and i_k envies i_0; or None if the graph is acyclic.
+        """
+        if not self._may_have_cycle:
+            return None
+        num_of_agents = len(self.agents)
+        state = np.zeros(num_of_agents, dtype=np.int8)   # 0: unvisited, 1: on the current path, 2: finished
+        next_child = np.zeros(num_of_agents, dtype=int)
+        for root in range(num_of_agents):
+            if state[root]:
+                continue
+            state[root] = 1
+            path = [root]
+            while path:
+                node = path[-1]
+                first = int(next_child[node])
+                children = np.flatnonzero(self.envies[node, first:] & (state[first:] != 2))
+                if len(children) == 0:
+                    state[node] = 2
+                    path.pop()
+                    continue
+                child = first + int(children[0])
+                next_child[node] = child + 1
+                if state[child] == 1:
+                    return path[path.index(child):]
+                state[child] = 1
+                path.append(child)
+        self._may_have_cycle = False
+        return None
+
+    def rotate(self, cycle: List[int]) -> None:
+        """
+        Eliminates the given envy-cycle: each agent in the cycle gets the bundle of the agent he envies.
+        The utility matrix is only permuted, so no value queries are needed.
+
+        :param cycle: a list of agent indices, as returned by find_cycle.
+        """
+        receivers = np.asarray(cycle)
+        givers = np.roll(receivers, -1)
+        new_bundles = [self.bundles[giver] for giver in givers]
+        for receiver, bundle in zip(receivers, new_bundles):
+            self.bundles[receiver] = bundle
+        self.utilities[:, receivers] = self.utilities[:, givers]
+        self._update_envies(receivers)
+        self._may_have_cycle = True
+
+    def eliminate_cycles(self) -> int:
+        """
+        Rotates bundles along envy-cycles until the envy graph is acyclic.
+
+        :return: the number of cycles that were eliminated.
+        """
+        num_of_cycles = 0
+        cycle = self.find_cycle()
+        while cycle is not None:
+            logger.info("\tBundles were exchanged in cycle %s", cycle)
+            self.rotate(cycle)
+            num_of_cycles += 1
+            cycle = self.find_cycle()
+        return num_of_cycles
+
+    def unenvied_agent(self) -> Optional[int]:
+        """
+        :return: the smallest index of an agent whom no other agent envies, or None if every agent is envied.
+        """
+        candidates = np.flatnonzero(~self.envies.any(axis=0))
+        return int(candidates[0]) if len(candidates) > 0 else None
+
+
+if __name__ == "__main__":
+    import doctest
+    (failures, tests) = doctest.testmod(report=True)
+    print("{} failures, {} tests".format(failures, tests))
@@ -16,6 +16,7 @@ Since:  2021-02
 from fairpy.allocations import Allocation
 
 from fairpy.items.fair_enough_utils import *
+from fairpy.items.envy_graph import EnvyGraph
 
 import networkx as nx
 
@@ -170,16 +171,32 @@ def fair_enough(agents: List[AdditiveAgent], items: Bundle) -> Allocation:
     items_remaining.sort()  # For testing purposes
     # Stage 6-7
     logger.info("Stage 6-7")
+    # The envy graph is built once, and then updated only in the rows and columns of the agents whose bundles change.
+    agents_left = list(agents_dict.values())
+    envy_graph = EnvyGraph(agents_left, [agn.aq_items for agn in agents_left])
     iter_count = 0
     while items_remaining:
         logger.info("Iteration: {}".format(iter_count))
         iter_count += 1
 
-        envy_graph = create_envy_graph(agents_dict)
-        had_cycle = handle_cycles(envy_graph, agents_dict)
-        if not had_cycle:
-            hand_item_to_non_envy(envy_graph, agents_dict, agents, items_remaining, allocations)
-
+        cycle = envy_graph.find_cycle()
+        if cycle is not None:
+            envy_graph.rotate(cycle)
+            for i in cycle:
+                agents_left[i].aq_items = envy_graph.bundles[i]
+            logger.info("\tItems where exchanged in cycle {}".format(
+                '<-'.join([agents_left[i].name() for i in cycle + cycle[:1]])))
+        else:
+            i = envy_graph.unenvied_agent()
+            agnt = agents_left[i]
+            pop_item = items_remaining.pop()
+            agnt.aq_items.append(pop_item)
+            envy_graph.set_bundle(i, agnt.aq_items)
+            logger.info("\tAgent {} received item {}".format(agnt.name(), pop_item))
+
+    # Bundles may have moved along envy-cycles, so the allocation is read from the final bundles.
+    for agnt in agents_left:
+        allocations[agents.index(agnt)] = set(agnt.aq_items)
     return Allocation(agents, allocations)
 
 
@@ -19,7 +19,6 @@ from typing import *
 Item = Any
 Bundle = List[Item]
 
-import networkx as nx
 import logging
 
 logger = logging.getLogger(__name__)
@@ -44,38 +43,6 @@ def calc_gamma(c: int) -> float:
     return (2 * n_odd) / (3 * n_odd - 1)
 
 
-def create_envy_graph(agents: Dict[str, AdditiveAgent]) -> nx.DiGraph:
-    """
-    Creates an Envy Graph from the agents and their bundles.
-    An Envy Graph, is a directed graph, which each node represents an agent. For every two nodes represeting
-    agent u and v, there will be an edge from u to v if agent u belives agent v's bundle is worth more then his.
-    @param agents: The list of agents
-    @return: The Envy Graph
-    >>> Alice = AdditiveAgent({"a": 1, "b": 1, "c": 1, "d": 4, "e": 1}, name="Alice")
-    >>> Alice.aq_items = ['a','b']
-    >>> Bob = AdditiveAgent({"a": 1, "b": 1, "c": 2, "d": 1, "e": 5}, name="Bob")
-    >>> Bob.aq_items = ['c', 'd']
-    >>> Eve = AdditiveAgent({"a": 3, "b": 1, "c": 1, "d": 1, "e": 2}, name="Eve")
-    >>> Eve.aq_items = ['e']
-    >>> agents_dict = {x.name():x for x in [Alice,Bob,Eve]}
-    >>> list(create_envy_graph(agents_dict).edges)
-    [('Alice', 'Bob'), ('Bob', 'Eve'), ('Eve', 'Alice')]
-    """
-
-    di_graph = nx.DiGraph()
-    for p in agents.values():
-        di_graph.add_node(p.name())
-        p_value = p.value(p.aq_items)
-        for p2 in agents.values():
-            if p is p2:
-                continue
-            p2_value = p.value(p2.aq_items)
-            if p2_value > p_value:
-                di_graph.add_edge(p.name(), p2.name())
-                logger.info("\t{}->{},".format(p.name(), p2.name()))
-    return di_graph
-
-
 def get_gmm_item(agent: AdditiveAgent, items: List[str], gamma: float) -> Optional[str]:
     """
     Finds an item that is has a value of at least GMM for the given agent.
@@ -105,77 +72,6 @@ def get_gmm_item(agent: AdditiveAgent, items: List[str], gamma: float) -> Option
     return None
 
 
-def handle_cycles(envy_graph: nx.DiGraph, agents_dict: Dict[str, AdditiveAgent]) -> bool:
-    """
-    Handles the cycles in the Envy Graph, replaces the bundles 'down-the stream'.
-    @param envy_graph: The Envy-Graph
-    @param agents_dict: The Agents in the Graph
-    @return: True if there was a cycle, o.w. False.
-
-    >>> Alice = AdditiveAgent({"a": 1, "b": 1, "c": 1, "d": 4, "e": 1}, name="Alice")
-    >>> Alice.aq_items = ['a','b']
-    >>> Bob = AdditiveAgent({"a": 1, "b": 1, "c": 2, "d": 1, "e": 5}, name="Bob")
-    >>> Bob.aq_items = ['c', 'd']
-    >>> Eve = AdditiveAgent({"a": 3, "b": 1, "c": 1, "d": 1, "e": 2}, name="Eve")
-    >>> Eve.aq_items = ['e']
-    >>> agents_dict = {x.name():x for x in [Alice,Bob,Eve]}
-    >>> envy_graph = create_envy_graph(agents_dict)
-    >>> handle_cycles(envy_graph, agents_dict)
-    True
-    >>> [(x.name(),x.aq_items) for x in agents_dict.values()]
-    [('Alice', ['c', 'd']), ('Bob', ['e']), ('Eve', ['a', 'b'])]
-    """
-    # Looking for Envy-cycles
-    try:
-        cycle = nx.find_cycle(envy_graph, orientation="original")
-        for edge in cycle[:-1]:
-            to_p, from_p = edge[0], edge[1]
-            agents_dict[to_p].aq_items, agents_dict[from_p].aq_items = [agents_dict[from_p].aq_items,
-                                                                        agents_dict[to_p].aq_items]
-        logger.info("\tItems where exchanged in cycle {}".format('<-'.join([x[0] for x in cycle + cycle[:1]])))
-
-        return True
-
-    except nx.NetworkXNoCycle:
-        logger.info("\tNo envy-cycles")
-        return False
-
-
-def hand_item_to_non_envy(envy_graph: nx.DiGraph, agents_dict: Dict[str, AdditiveAgent],
-                          all_agents: List[AdditiveAgent], items_remaining: List[str], allocations: List[List[Any]]) -> None:
-    """
-    Finds an agent that no-one is envy of, and allocates an item to him.
-    @param envy_graph: The Envy-Graph
-    @param agents_dict: The agents in the Graph
-    @param all_agents: A list of the agents
-    @param items_remaining: A list of all the items that have not been allocated
-    @param allocations: The allocation of items
-
-    >>> Alice = AdditiveAgent({"a": 1, "b": 1, "c": 1, "d": 4, "e": 1}, name="Alice")
-    >>> Alice.aq_items = ['a']
-    >>> Bob = AdditiveAgent({"a": 1, "b": 1, "c": 2, "d": 1, "e": 5}, name="Bob")
-    >>> Bob.aq_items = ['c']
-    >>> Eve = AdditiveAgent({"a": 3, "b": 1, "c": 1, "d": 1, "e": 2}, name="Eve")
-    >>> Eve.aq_items = ['b']
-    >>> agents_dict = {x.name():x for x in [Alice,Bob,Eve]}
-    >>> envy_graph = create_envy_graph(agents_dict)
-    >>> items_remaining = list('de')
-    >>> alloc = [None,None,None]
-    >>> hand_item_to_non_envy(envy_graph,agents_dict,[Alice,Bob,Eve],items_remaining,alloc)
-    >>> sorted(list(alloc[1]))
-    ['c', 'e']
-    """
-    rev_di_graph = envy_graph.reverse()
-    for n in rev_di_graph.nodes():
-        if len(rev_di_graph.edges(n)) == 0:
-            pop_item = items_remaining.pop()
-            agnt = agents_dict[n]
-            agnt.aq_items.append(pop_item)
-            allocations[all_agents.index(agnt)] = set(agnt.aq_items)
-            logger.info("\tAgent {} received item {}".format(agnt.name(), pop_item))
-            return
-
-
 def get_highest_value(agent: AdditiveAgent, items_list: List[str]) -> (float, Set[str]):
     """
     Finds the two highest valued items for the agent that have not been allocated and returns the combined value.
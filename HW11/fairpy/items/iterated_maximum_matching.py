@@ -14,12 +14,13 @@ Since : 2021-05
 
 import fairpy
 
-import networkx
+import numpy as np
 from typing import *
-from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 from dicttools import stringify
 from fairpy.allocations import Allocation
 from fairpy.items.utilitarian_matching import *
+from fairpy.items.utilitarian_matching import _assignment, _min_cost_flow
 
 
 import logging
@@ -61,33 +62,49 @@ def iterated_maximum_matching(agents: AgentsDict, item_capacities: Dict[str,int]
     Agent #0 gets {0,1} with value 9.
     Agent #1 gets {2,3} with value 9.
     <BLANKLINE>
+    >>> iterated_maximum_matching({"avi": {"x":5, "y":0}, "beni": {"x":2, "y":0}})    # items that no agent wants are not allocated
+    avi gets {x} with value 5.
+    beni gets {} with value 0.
+    <BLANKLINE>
+
+    The edges of the bipartite graph are built once (by instance_to_edges); every round matches each agent to at most one unit
+    (as an assignment problem, or a min-cost-flow problem when some item has several units), and decrements the capacities in place.
     """
-    agents_list = fairpy.agents_from(agents)
-    agent_names = fairpy.agent_names_from(agents)
-    all_items = agents_list[0].all_items()
-    if item_capacities is None:
-        item_capacities = {item:1 for item in all_items}
-    map_agent_to_final_bundle = {agent.name(): [] for agent in agents_list}
-    while len(item_capacities)>0:
-        graph = instance_to_graph(agents, agent_weights=agent_weights, item_capacities=item_capacities)
-        logger.info("Graph edges: %s", list(graph.edges.data()))
-        matching = networkx.max_weight_matching(graph, maxcardinality=False)
-        logger.info("Matching: %s", matching)
-        map_agent_to_bundle = matching_to_allocation(matching, agent_names=agent_names)
-        for agent,bundle in map_agent_to_bundle.items():
-            map_agent_to_final_bundle[agent] += bundle
-        allocated_items = sum([bundle for bundle in map_agent_to_bundle.values()], [])
-        item_capacities = remove_items(item_capacities, allocated_items)
-    return Allocation(agents_list, map_agent_to_final_bundle)
-
-
-
-def iterated_maximum_matching_categories(agents: AgentsDict, categories: List[List[str]], agent_weights: Dict[str, int]=None):
+    (agent_names, items, agent_of_edge, item_of_edge, weight_of_edge) = instance_to_edges(agents, agent_weights)
+    positive = weight_of_edge > 0     # in each round, only edges with positive weight may increase the weight of the matching
+    (agent_of_edge, item_of_edge, weight_of_edge) = (agent_of_edge[positive], item_of_edge[positive], weight_of_edge[positive])
+    item_capacity = np.array([1 if item_capacities is None else item_capacities.get(item,0) for item in items], dtype=int)
+    agent_capacity = np.ones(len(agent_names), dtype=int)
+    bundles = [[] for _ in agent_names]
+    round = 0
+    while True:
+        edges = np.flatnonzero(item_capacity[item_of_edge] > 0)
+        if len(edges) == 0:
+            break
+        if np.all(item_capacity <= 1):
+            flow_of_edge = _assignment(len(agent_names), len(items), agent_of_edge[edges], item_of_edge[edges], weight_of_edge[edges], maxcardinality=False)
+        else:
+            flow_of_edge = _min_cost_flow(agent_capacity, item_capacity, agent_of_edge[edges], item_of_edge[edges], weight_of_edge[edges], maxcardinality=False)
+        matched_edges = edges[flow_of_edge > 0]
+        logger.info("Round %d: matched %d agents to items %s", round, len(matched_edges), [items[item] for item in item_of_edge[matched_edges]])
+        if len(matched_edges) == 0:
+            break
+        for edge in matched_edges:
+            bundles[agent_of_edge[edge]].append(items[item_of_edge[edge]])
+        np.subtract.at(item_capacity, item_of_edge[matched_edges], 1)
+        round += 1
+    map_agent_to_final_bundle = {name: sorted(bundle) for name,bundle in zip(agent_names, bundles)}
+    return Allocation(ValuationMatrix(agents) if isinstance(agents, np.ndarray) else agents, map_agent_to_final_bundle)
+
+
+
+def iterated_maximum_matching_categories(agents: AgentsDict, categories: List[List[str]], agent_weights: Dict[str, int]=None, num_of_workers:int=1):
     """
     Finds a maximum-weight matching with the given preferences and agent_weights, where the items are pre-divided into categories. Each agent gets at most a single item from each category.
     :param agents: maps each agent to a map from an item's name to its value for the agent.
     :param categories: a list of lists; each list is a category of items.
     :param agent_weights [optional]: maps each agent to an integer priority. The weights of each agent are multiplied by WEIGHT_BASE^priority.
+    :param num_of_workers: the number of processes that match the (independent) categories in parallel. Default is 1 (no parallelism).
 
     >>> agents = {"agent1": {"t1+": 0, "t1-": -3,   "t2+": 0, "t2-": -9,   "t3+": 0, "t3-": -2},	"agent2": {"t1+": 0, "t1-": -6,   "t2+": 0, "t2-": -9,   "t3+": 0, "t3-": -1}}
     >>> categories = [["t1+","t1-"],["t2+","t2-"],["t3+","t3-"]]
@@ -95,9 +112,9 @@ def iterated_maximum_matching_categories(agents: AgentsDict, categories: List[Li
     agent1 gets {t1+,t2+,t3+} with value 0.
     agent2 gets {t1-,t2-,t3-} with value -16.
     <BLANKLINE>
-    >>> iterated_maximum_matching_categories(agents, categories, agent_weights={"agent1":1,"agent2":1})
-    agent1 gets {t1-,t2-,t3+} with value -12.
-    agent2 gets {t1+,t2+,t3-} with value -1.
+    >>> iterated_maximum_matching_categories(agents, categories, agent_weights={"agent1":1,"agent2":1})   # in category t2 there is a tie
+    agent1 gets {t1-,t2+,t3+} with value -3.
+    agent2 gets {t1+,t2-,t3-} with value -10.
     <BLANKLINE>
     >>> iterated_maximum_matching_categories(agents, categories, agent_weights={"agent1":0,"agent2":1})
     agent1 gets {t1-,t2-,t3-} with value -14.
@@ -109,25 +126,37 @@ def iterated_maximum_matching_categories(agents: AgentsDict, categories: List[Li
     Agent #0 gets {0,2} with value 88.
     Agent #1 gets {1,3} with value 88.
     <BLANKLINE>
-    >>> iterated_maximum_matching_categories(agents, categories= [[0,2],[1,3]])
+    >>> iterated_maximum_matching_categories(agents, categories= [[0,2],[1,3]], num_of_workers=2)
     Agent #0 gets {0,1} with value 99.
     Agent #1 gets {2,3} with value 99.
     <BLANKLINE>
     """
-    agents_list = fairpy.agents_from(agents)
-    agent_names = fairpy.agent_names_from(agents)
-    map_agent_to_final_bundle = {agent.name(): [] for agent in agents_list}
-    for index,category in enumerate(categories):
-        graph = instance_to_graph(agents, agent_weights=agent_weights, item_capacities={item:1 for item in category})
-        logger.info("Category %d:",index)
-        logger.info("  Graph edges: %s", list(graph.edges.data()))
-        matching = networkx.max_weight_matching(graph, maxcardinality=True)
-        logger.info("  Matching: %s", matching)
-        map_agent_to_bundle = matching_to_allocation(matching, agent_names=agent_names)
-        for name in agent_names:
-            if map_agent_to_bundle[name] is not None:
-                map_agent_to_final_bundle[name] += map_agent_to_bundle[name]
-    return Allocation(agents_list, map_agent_to_final_bundle)
+    (agent_names, items, agent_of_edge, item_of_edge, weight_of_edge) = instance_to_edges(agents, agent_weights)
+    item_index = {item:index for index,item in enumerate(items)}
+    category_edges = [
+        np.flatnonzero(np.isin(item_of_edge, [item_index[item] for item in category if item in item_index]))
+        for category in categories
+    ]
+    tasks = [(len(agent_names), len(items), agent_of_edge[edges], item_of_edge[edges], weight_of_edge[edges]) for edges in category_edges]
+    if num_of_workers > 1:
+        with ProcessPoolExecutor(max_workers=num_of_workers) as executor:
+            flows = list(executor.map(_match_category, *zip(*tasks)))
+    else:
+        flows = [_match_category(*task) for task in tasks]
+
+    bundles = [[] for _ in agent_names]
+    for index,(edges,flow_of_edge) in enumerate(zip(category_edges, flows)):
+        matched_edges = edges[flow_of_edge > 0]
+        logger.info("Category %d: matched items %s", index, [items[item] for item in item_of_edge[matched_edges]])
+        for edge in matched_edges:
+            bundles[agent_of_edge[edge]].append(items[item_of_edge[edge]])
+    map_agent_to_final_bundle = {name: bundle for name,bundle in zip(agent_names, bundles)}
+    return Allocation(ValuationMatrix(agents) if isinstance(agents, np.ndarray) else agents, map_agent_to_final_bundle)
+
+
+def _match_category(num_of_agents:int, num_of_items:int, agent_of_edge:np.ndarray, item_of_edge:np.ndarray, weight_of_edge:np.ndarray)->np.ndarray:
+    # A module-level function, so that it can be sent to worker processes.
+    return _assignment(num_of_agents, num_of_items, agent_of_edge, item_of_edge, weight_of_edge, maxcardinality=True)
 
 
 iterated_maximum_matching.logger = logger
@@ -93,17 +93,10 @@ def leximin_optimal_allocation(instance: Any, **solver_options) -> Allocation:
     """
     v = ValuationMatrix(instance)
     allocation_vars = cvxpy.Variable((v.num_of_agents, v.num_of_objects))
-    feasibility_constraints = [
-        sum([allocation_vars[i][o] for i in v.agents()]) == 1
-        for o in v.objects()
-    ]
-    positivity_constraints = [
-        allocation_vars[i][o] >= 0 for i in v.agents() for o in v.objects()
-    ]
-    utilities = [
-        sum([allocation_vars[i][o] * v[i][o] for o in v.objects()])
-        for i in v.agents()
-    ]
+    feasibility_constraints = [cvxpy.sum(allocation_vars, axis=0) == 1]
+    positivity_constraints = [allocation_vars >= 0]
+    utility_vector = cvxpy.sum(cvxpy.multiply(allocation_vars, v._v), axis=1)
+    utilities = [utility_vector[i] for i in v.agents()]
     problem = Problem(
         Leximin(utilities),
         constraints=feasibility_constraints + positivity_constraints,
@@ -154,24 +147,12 @@ def leximin_optimal_allocation_for_families(
     agent_to_family = map_agent_to_family(families, num_of_agents)
     logger.info("map_agent_to_family = %s", agent_to_family)
     allocation_vars = cvxpy.Variable((num_of_families, num_of_objects))
-    feasibility_constraints = [
-        sum([allocation_vars[f][o] for f in range(num_of_families)]) == 1
-        for o in range(num_of_objects)
-    ]
-    positivity_constraints = [
-        allocation_vars[f][o] >= 0
-        for f in range(num_of_families)
-        for o in range(num_of_objects)
-    ]
-    utilities = [
-        sum(
-            [
-                allocation_vars[agent_to_family[i]][o] * v[i][o]
-                for o in range(num_of_objects)
-            ]
-        )
-        for i in range(num_of_agents)
-    ]
+    feasibility_constraints = [cvxpy.sum(allocation_vars, axis=0) == 1]
+    positivity_constraints = [allocation_vars >= 0]
+    utility_vector = cvxpy.sum(
+        cvxpy.multiply(allocation_vars[agent_to_family], v._v), axis=1
+    )
+    utilities = [utility_vector[i] for i in range(num_of_agents)]
     problem = Problem(
         Leximin(utilities),
         constraints=feasibility_constraints + positivity_constraints,
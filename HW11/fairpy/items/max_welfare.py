@@ -11,10 +11,11 @@ Author: Erel Segal-Halevi
 Since:  2021-05
 """
 
-import cvxpy
-from fairpy import ValuationMatrix, Allocation, AllocationToFamilies, convert_input_to_valuation_matrix
-from fairpy.solve import maximize
-from typing import Any
+import cvxpy, numpy as np, scipy.sparse
+from fairpy import ValuationMatrix, SparseValuationMatrix, Allocation, AllocationToFamilies, convert_input_to_valuation_matrix
+from fairpy.solve import maximize, solve
+from fairpy.items.problem_templates import welfare_template, welfare_expression, welfare_solvers
+from typing import Any, Tuple, List
 
 import logging
 logger = logging.getLogger(__name__)
@@ -32,26 +33,117 @@ def max_welfare_allocation(instance:Any, welfare_function, welfare_constraint_fu
     For usage examples, see the functions max_sum_allocation, max_product_allocation, max_minimum_allocation.
     """
     v = ValuationMatrix(instance)
-    allocation_vars = cvxpy.Variable((v.num_of_agents, v.num_of_objects))
-    feasibility_constraints = [
-        sum([allocation_vars[i][o] for i in v.agents()])==1
-        for o in v.objects()
-    ]
-    positivity_constraints = [
-        allocation_vars[i][o] >= 0 for i in v.agents()
-        for o in v.objects()
-    ]
-    utilities = [sum([allocation_vars[i][o]*v[i][o] for o in v.objects()]) for i in v.agents()]
+    if isinstance(v, SparseValuationMatrix):
+        allocation_vars, feasibility_constraints, utility_vector = _sparse_allocation_program(v)
+        positivity_constraints = []
+    else:
+        allocation_vars = cvxpy.Variable((v.num_of_agents, v.num_of_objects))
+        feasibility_constraints = [cvxpy.sum(allocation_vars, axis=0)==1]
+        positivity_constraints = [allocation_vars >= 0]
+        utility_vector = cvxpy.sum(cvxpy.multiply(allocation_vars, v._v), axis=1)
+    utilities = [utility_vector[i] for i in v.agents()]
     if welfare_constraint_function is not None:
         welfare_constraints = [welfare_constraint_function(utility) for utility in utilities]
     else:
         welfare_constraints = []
     max_welfare = maximize(welfare_function(utilities), feasibility_constraints+positivity_constraints+welfare_constraints)
     logger.info("Maximum welfare is %g",max_welfare)
+    if isinstance(v, SparseValuationMatrix):
+        return _sparse_allocation_matrix(v, allocation_vars.value)
     allocation_matrix = allocation_vars.value
     return allocation_matrix
 
 
+@convert_input_to_valuation_matrix
+def compiled_max_welfare_allocation(instance:Any, welfare_kind:str, power:float=None) -> Allocation:
+    """
+    Find an allocation maximizing one of the common social welfare functions,
+    using a problem template that is compiled once per (num_of_agents, num_of_objects, welfare_kind).
+    Repeated calls with same-shaped instances only re-bind the valuation matrix, and skip the canonicalization.
+
+    :param instance: a matrix v in which each row represents an agent, each column represents an object, and v[i][j] is the value of agent i to object j.
+    :param welfare_kind: one of "sum", "product", "minimum", "power" (see problem_templates.welfare_template).
+    :param power: the power of the utilities, when welfare_kind=="power".
+
+    :return allocation_matrix:  a matrix alloc of a similar shape in which alloc[i][j] is the fraction allocated to agent i from object j.
+
+    >>> compiled_max_welfare_allocation([ [3,2] , [1,4] ], "product").round(3).matrix
+    [[1. 0.]
+     [0. 1.]]
+    >>> compiled_max_welfare_allocation([ [1,4] , [3,2] ], "product").round(3).matrix  # same shape - same template
+    [[0. 1.]
+     [1. 0.]]
+
+    A sparse valuation matrix is solved directly, with a variable for each non-zero value only,
+    and the allocation matrix is sparse too:
+    >>> a = compiled_max_welfare_allocation(SparseValuationMatrix([ [3,0,0] , [1,4,0] ]), "product").round(3)
+    >>> a.matrix
+    [[1. 0. 1.]
+     [0. 1. 0.]]
+    >>> type(a.matrix._z).__name__
+    'csr_matrix'
+    """
+    v = ValuationMatrix(instance)
+    if isinstance(v, SparseValuationMatrix):
+        allocation_vars, constraints, utilities = _sparse_allocation_program(v)
+        problem = cvxpy.Problem(cvxpy.Maximize(welfare_expression(utilities, welfare_kind, power)), constraints + [utilities >= 0])
+        solve(problem, solvers=welfare_solvers(welfare_kind))
+        logger.info("Maximum welfare is %g", problem.value)
+        return _sparse_allocation_matrix(v, allocation_vars.value)
+    template = welfare_template(v.num_of_agents, v.num_of_objects, welfare_kind, power)
+    (allocation_matrix, _, max_welfare) = template.solve(valuations=v._v)
+    logger.info("Maximum welfare is %g", max_welfare)
+    return allocation_matrix
+
+
+
+def _sparse_allocation_program(v:SparseValuationMatrix) -> Tuple[cvxpy.Variable, List[cvxpy.Constraint], cvxpy.Expression]:
+    """
+    Builds the feasibility constraints of a fractional allocation, with a variable for each non-zero value of v.
+    Each object is allocated at most once among the agents who value it; the rest of it goes,
+    by _sparse_allocation_matrix, to an agent who values it at zero. If all agents value it, it is allocated exactly once.
+    :return: the variables (one per stored value, in CSR order), the constraints, and the vector of utilities.
+    """
+    matrix = v._v.tocoo()
+    entry_vars = cvxpy.Variable(matrix.nnz)
+    entries = np.arange(matrix.nnz)
+    object_entries = scipy.sparse.csr_matrix((np.ones(matrix.nnz), (matrix.col, entries)), shape=(v.num_of_objects, matrix.nnz))
+    agent_values = scipy.sparse.csr_matrix((matrix.data.astype(float), (matrix.row, entries)), shape=(v.num_of_agents, matrix.nnz))
+    fully_valued = np.diff(v._v.tocsc().indptr) == v.num_of_agents
+    constraints = [entry_vars >= 0, object_entries @ entry_vars <= 1]
+    if fully_valued.any():
+        constraints.append(object_entries[fully_valued] @ entry_vars == 1)
+    return (entry_vars, constraints, agent_values @ entry_vars)
+
+
+def _sparse_allocation_matrix(v:SparseValuationMatrix, entry_values:np.ndarray) -> scipy.sparse.csr_matrix:
+    """
+    Converts the solution of a _sparse_allocation_program to a sparse (CSR) allocation matrix,
+    giving the unallocated fraction of each object to the first agent who values it at zero.
+    The result has at most one entry per non-zero value and one per object, so it is never allocated densely.
+
+    >>> z = _sparse_allocation_matrix(SparseValuationMatrix([[3,0],[0,0]]), np.array([0.5]))
+    >>> z.toarray()
+    array([[0.5, 1. ],
+           [0.5, 0. ]])
+    >>> int(z.nnz)
+    3
+    """
+    matrix = v._v.tocoo()
+    fractions = np.clip(entry_values, 0, 1)
+    remainders = 1 - np.bincount(matrix.col, weights=fractions, minlength=v.num_of_objects)
+    columns = v._v.tocsc()
+    rows, cols, values = [matrix.row], [matrix.col], [fractions]
+    for object in np.flatnonzero(remainders > 1e-9):
+        valued_by = columns.indices[columns.indptr[object]:columns.indptr[object+1]]
+        free_agents = np.setdiff1d(np.arange(min(len(valued_by)+1, v.num_of_agents)), valued_by)
+        if len(free_agents) > 0:
+            rows.append(free_agents[:1])
+            cols.append([object])
+            values.append([remainders[object]])
+    coordinates = (np.concatenate(rows).astype(int), np.concatenate(cols).astype(int))
+    return scipy.sparse.csr_matrix((np.concatenate(values).astype(float), coordinates), shape=(v.num_of_agents, v.num_of_objects))
+
 
 from fairpy.families import AllocationToFamilies, map_agent_to_family
 
@@ -72,15 +164,10 @@ def max_welfare_allocation_for_families(instance, families:list, welfare_functio
     agent_to_family = map_agent_to_family(families, v.num_of_agents)
 
     alloc = cvxpy.Variable((num_of_families, v.num_of_objects))
-    feasibility_constraints = [
-        sum([alloc[f][o] for f in range(num_of_families)])==1
-        for o in v.objects()
-    ]
-    positivity_constraints = [
-        alloc[f][o] >= 0 for f in range(num_of_families)
-        for o in v.objects()
-    ]
-    utilities = [sum([alloc[agent_to_family[i]][o]*v[i][o] for o in v.objects()]) for i in v.agents()]
+    feasibility_constraints = [cvxpy.sum(alloc, axis=0)==1]
+    positivity_constraints = [alloc >= 0]
+    utility_vector = cvxpy.sum(cvxpy.multiply(alloc[agent_to_family], v._v), axis=1)
+    utilities = [utility_vector[i] for i in v.agents()]
 
     if welfare_constraint_function is not None:
         welfare_constraints = [welfare_constraint_function(utility) for utility in utilities]
@@ -110,9 +197,7 @@ def max_sum_allocation(instance) -> Allocation:
     [[1. 0.]
      [0. 1.]]
     """
-    return max_welfare_allocation(instance,
-        welfare_function=lambda utilities: sum(utilities),
-        welfare_constraint_function=lambda utility: utility >= 0)
+    return compiled_max_welfare_allocation(instance, "sum")
 
 
 def max_power_sum_allocation(instance, power:float) -> Allocation:
@@ -141,15 +226,10 @@ def max_power_sum_allocation(instance, power:float) -> Allocation:
     [[0.564]
      [0.436]]
     """
-    if power>0:
-        welfare_function=lambda utilities: sum([utility**power for utility in utilities])
-    elif power<0:
-        welfare_function=lambda utilities: -sum([utility**power for utility in utilities])
+    if power==0:
+        return compiled_max_welfare_allocation(instance, "product")
     else:
-        welfare_function=lambda utilities: sum([cvxpy.log(utility) for utility in utilities])
-    return max_welfare_allocation(instance,
-        welfare_function=welfare_function,
-        welfare_constraint_function=lambda utility: utility >= 0)
+        return compiled_max_welfare_allocation(instance, "power", power)
 
 
 def max_product_allocation(instance) -> Allocation:
@@ -169,9 +249,7 @@ def max_product_allocation(instance) -> Allocation:
     [[1. 0.]
      [0. 1.]]
     """
-    return max_welfare_allocation(instance,
-        welfare_function=lambda utilities: sum([cvxpy.log(utility) for utility in utilities]),
-        welfare_constraint_function=lambda utility: utility >= 0)
+    return compiled_max_welfare_allocation(instance, "product")
 
 
 def max_minimum_allocation(instance) -> Allocation:
@@ -203,9 +281,7 @@ def max_minimum_allocation(instance) -> Allocation:
     >>> print(a.utility_profile())
     [3.2 3.2]
     """
-    return max_welfare_allocation(instance,
-        welfare_function=lambda utilities: cvxpy.min(cvxpy.hstack(utilities)),
-        welfare_constraint_function=lambda utility: utility >= 0)
+    return compiled_max_welfare_allocation(instance, "minimum")
 
 
 
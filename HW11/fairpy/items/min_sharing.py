@@ -18,9 +18,10 @@ from fairpy.items.min_sharing_impl.FairEnvyFreeAllocationProblem import FairEnvy
 from fairpy.items.min_sharing_impl.FairMaxProductAllocationProblem import FairMaxProductAllocationProblem
 
 @convert_input_to_valuation_matrix
-def proportional_allocation_with_min_sharing(instance:Any, num_of_decimal_digits=3)->Allocation:
+def proportional_allocation_with_min_sharing(instance:Any, num_of_decimal_digits=3, num_of_workers:int=1)->Allocation:
     """
     Finds a proportional allocation with a minimum number of sharings.
+    :param num_of_workers: the number of processes that search the consumption graphs in parallel.
 
     >>> proportional_allocation_with_min_sharing([ [3] , [5] ]).round(2).matrix   # single item
     [[0.5]
@@ -30,14 +31,17 @@ def proportional_allocation_with_min_sharing(instance:Any, num_of_decimal_digits
      [0. 1.]]
     >>> proportional_allocation_with_min_sharing([ [10,18,1,1] , [10,18,1,1] , [10,10,5,5] ]).num_of_sharings()   # three items
     0
+    >>> proportional_allocation_with_min_sharing([ [10,18,1,1] , [10,18,1,1] , [10,10,5,5] ], num_of_workers=2).num_of_sharings()   # in parallel
+    0
     """
-    return FairProportionalAllocationProblem(instance).find_allocation_with_min_sharing(num_of_decimal_digits)
+    return FairProportionalAllocationProblem(instance).find_allocation_with_min_sharing(num_of_decimal_digits, num_of_workers)
 
 
 @convert_input_to_valuation_matrix
-def envyfree_allocation_with_min_sharing(instance:Any, num_of_decimal_digits=3)->Allocation:
+def envyfree_allocation_with_min_sharing(instance:Any, num_of_decimal_digits=3, num_of_workers:int=1)->Allocation:
     """
     Finds an envy-free allocation with a minimum number of sharings.
+    :param num_of_workers: the number of processes that search the consumption graphs in parallel.
 
     >>> envyfree_allocation_with_min_sharing([ [3] , [5] ]).round(2).matrix   # single item
     [[0.5]
@@ -47,15 +51,18 @@ def envyfree_allocation_with_min_sharing(instance:Any, num_of_decimal_digits=3)-
      [0. 1.]]
     >>> envyfree_allocation_with_min_sharing([ [10,18,1,1] , [10,18,1,1] , [10,10,5,5] ]).num_of_sharings()   # three items
     1
+    >>> envyfree_allocation_with_min_sharing([ [10,18,1,1] , [10,18,1,1] , [10,10,5,5] ], num_of_workers=2).num_of_sharings()   # in parallel
+    1
     """
-    return FairEnvyFreeAllocationProblem(instance).find_allocation_with_min_sharing(num_of_decimal_digits)
+    return FairEnvyFreeAllocationProblem(instance).find_allocation_with_min_sharing(num_of_decimal_digits, num_of_workers)
 
 
 @convert_input_to_valuation_matrix
-def maxproduct_allocation_with_min_sharing(instance, tolerance:float=0.01, num_of_decimal_digits=3)->Allocation:
+def maxproduct_allocation_with_min_sharing(instance, tolerance:float=0.01, num_of_decimal_digits=3, num_of_workers:int=1)->Allocation:
     """
     Finds an approximate max-product (aka max Nash welfare) allocation with a minimum number of sharings.
     The utility of each agent will be at least (1-tolerance) of his utility in the max Nash welfare allocation.
+    :param num_of_workers: the number of processes that search the consumption graphs in parallel.
 
     >>> maxproduct_allocation_with_min_sharing([ [3] , [5] ]).round(2).matrix   # single item
     [[0.5]
@@ -66,7 +73,7 @@ def maxproduct_allocation_with_min_sharing(instance, tolerance:float=0.01, num_o
     >>> maxproduct_allocation_with_min_sharing([ [10,18,1,1] , [10,18,1,1] , [10,10,5,5] ]).num_of_sharings()   # three items
     2
     """
-    return FairMaxProductAllocationProblem(instance,tolerance).find_allocation_with_min_sharing(num_of_decimal_digits)
+    return FairMaxProductAllocationProblem(instance,tolerance).find_allocation_with_min_sharing(num_of_decimal_digits, num_of_workers)
 
 
 
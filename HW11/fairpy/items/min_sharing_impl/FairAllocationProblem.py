@@ -16,7 +16,8 @@ from fairpy.items.min_sharing_impl.time_limit import time_limit, TimeoutExceptio
 
 import numpy as np
 from abc import ABC, abstractmethod
-import datetime, cvxpy
+import datetime, cvxpy, contextlib, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 import logging
 logger = logging.getLogger(__name__)
@@ -50,36 +51,91 @@ class FairAllocationProblem():
         """
         return None
 
+    def compile_template(self):
+        """
+        Builds the compiled linear program used by `find_allocation_for_graph`, if any.
+        Called after unpickling in a worker process, since the compiled program is not sent between processes.
+        """
+        pass
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop("template", None)
+        return state
 
-    def find_allocation_for_all_graphs_with_numsharings(self, allowed_num_of_sharings:int)->AllocationMatrix:
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self.compile_template()
+
+
+    def find_allocation_for_all_graphs_with_numsharings(self, allowed_num_of_sharings:int, shard_index:int=0, num_of_shards:int=1, stop_event=None)->AllocationMatrix:
+        """
+        Looks for a fair allocation in all consumption graphs with exactly the given number of sharings.
+        :param shard_index, num_of_shards: look only in the given shard of the graphs (see GraphGenerator.generate_all_consumption_graph).
+        :param stop_event: an optional multiprocessing.Event; the search stops when it is set (e.g. by another worker that found an allocation).
+        :return the allocation, or None if none found.
+        """
         allocation = None
         logger.info("Looking for %s allocations with %d sharings", self.fairness_adjective(), allowed_num_of_sharings)
         self.graph_generator.set_maximum_allowed_num_of_sharings(allowed_num_of_sharings)
-        for consumption_graph in self.graph_generator.generate_all_consumption_graph():
+        for consumption_graph in self.graph_generator.generate_all_consumption_graph(shard_index, num_of_shards):
             if consumption_graph.get_num_of_sharing() != allowed_num_of_sharings:
                 continue
+            if stop_event is not None and stop_event.is_set():
+                break
             allocation = self.find_allocation_for_graph(consumption_graph)
             if allocation is not None:
                 logger.info(" -- Found an allocation with %d sharings, for consumption graph: \n%s", allowed_num_of_sharings, consumption_graph)
                 logger.debug("-- Unrounded allocation:\n%s", allocation)
+                if stop_event is not None:
+                    stop_event.set()
                 break
         return allocation
 
 
-    def find_allocation_with_min_sharing(self, num_of_decimal_digits:int=3)->AllocationMatrix:
+    def find_allocation_for_all_graphs_with_numsharings_in_parallel(self, allowed_num_of_sharings:int, executor:ProcessPoolExecutor, stop_event, num_of_workers:int)->AllocationMatrix:
+        """
+        Like `find_allocation_for_all_graphs_with_numsharings`, but splits the graphs into shards,
+        and searches each shard in a different worker process of the given executor.
+        :param executor, stop_event: a pool and the stop event shared by its workers, as created by `_process_pool`.
+        As soon as one worker finds an allocation, it sets the stop event, and all other workers stop.
+        NOTE: if several shards contain a fair allocation, the returned one may differ from the one found by the serial search,
+              but it has the same number of sharings.
+        """
+        stop_event.clear()
+        futures = [
+            executor.submit(_find_allocation_in_shard, allowed_num_of_sharings, shard_index, num_of_workers)
+            for shard_index in range(num_of_workers)
+        ]
+        allocation = None
+        for future in as_completed(futures):
+            shard_allocation = future.result()
+            if allocation is None and shard_allocation is not None:
+                allocation = shard_allocation
+        return allocation
+
+
+    def find_allocation_with_min_sharing(self, num_of_decimal_digits:int=3, num_of_workers:int=1)->AllocationMatrix:
         """
         Runs the min-sharing algorithm on this valuation matrix.
 
+        :param num_of_workers: the number of processes that search the consumption graphs in parallel. Default is 1 (no parallelism).
         :return the allocation with min sharing satisfying the criterion of `find_allocation_for_graph`.
         """
         allowed_num_of_sharings = 0
         logger.info("")
         allocation = None
-        while (allowed_num_of_sharings < self.valuation.num_of_agents) and (not self.find):
-            allocation = self.find_allocation_for_all_graphs_with_numsharings(allowed_num_of_sharings)
-            if allocation is not None:
-                break
-            allowed_num_of_sharings += 1
+        with contextlib.ExitStack() as stack:
+            if num_of_workers > 1:
+                (executor, stop_event) = stack.enter_context(_process_pool(self, num_of_workers))
+            while (allowed_num_of_sharings < self.valuation.num_of_agents) and (not self.find):
+                if num_of_workers > 1:
+                    allocation = self.find_allocation_for_all_graphs_with_numsharings_in_parallel(allowed_num_of_sharings, executor, stop_event, num_of_workers)
+                else:
+                    allocation = self.find_allocation_for_all_graphs_with_numsharings(allowed_num_of_sharings)
+                if allocation is not None:
+                    break
+                allowed_num_of_sharings += 1
         if allocation is None:
             raise AssertionError("No allocation found")
         allocation.round(num_of_decimal_digits)
@@ -88,7 +144,7 @@ class FairAllocationProblem():
         return allocation
 
 
-    def find_min_sharing_allocation_with_time_limit(self, num_of_decimal_digits:int=3, time_limit_in_seconds=999)->(str,float,AllocationMatrix,float):
+    def find_min_sharing_allocation_with_time_limit(self, num_of_decimal_digits:int=3, time_limit_in_seconds=999, num_of_workers:int=1)->(str,float,AllocationMatrix,float):
         """
         Wraps the above algorithm with a time-limit.
 
@@ -97,7 +153,7 @@ class FairAllocationProblem():
         start = datetime.datetime.now()
         try:
             with time_limit(time_limit_in_seconds):
-                allocation_matrix = self.find_allocation_with_min_sharing()
+                allocation_matrix = self.find_allocation_with_min_sharing(num_of_workers=num_of_workers)
                 status = "OK" if allocation_matrix.num_of_sharings() < self.valuation.num_of_agents else "Bug"
         except TimeoutException:
             status = "TimeOut"
@@ -117,6 +173,39 @@ class FairAllocationProblem():
 
 
 
+##### Parallel search: each worker process holds its own copy of the problem, and the stop event of its pool.
+##### The globals below are set only inside the worker processes (by `_init_worker`); the parent keeps the event of each pool it creates.
+
+_worker_problem = None
+_worker_stop_event = None
+
+def _init_worker(problem:FairAllocationProblem, stop_event):
+    global _worker_problem, _worker_stop_event
+    _worker_problem = problem
+    _worker_stop_event = stop_event
+
+def _find_allocation_in_shard(allowed_num_of_sharings:int, shard_index:int, num_of_shards:int)->AllocationMatrix:
+    return _worker_problem.find_allocation_for_all_graphs_with_numsharings(
+        allowed_num_of_sharings, shard_index, num_of_shards, stop_event=_worker_stop_event)
+
+@contextlib.contextmanager
+def _process_pool(problem:FairAllocationProblem, num_of_workers:int):
+    """
+    A pool of worker processes, each of which holds a copy of the given problem.
+    :return (yields) a pair (executor, stop_event), where stop_event is shared by the workers of this pool only,
+       so that concurrent pools (e.g. in different threads) do not stop each other.
+    On exit (including a time-out), the workers are told to stop, and the pending tasks are cancelled.
+    """
+    stop_event = multiprocessing.Event()
+    executor = ProcessPoolExecutor(max_workers=num_of_workers, initializer=_init_worker, initargs=(problem, stop_event))
+    try:
+        yield (executor, stop_event)
+    finally:
+        stop_event.set()
+        executor.shutdown(wait=True, cancel_futures=True)
+
+
+
 class ErrorAllocationMatrix(AllocationMatrix):
     """
     An allocation matrix that denotes time-out or another error in the algorithm.
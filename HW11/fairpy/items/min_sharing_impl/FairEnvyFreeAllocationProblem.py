@@ -8,11 +8,11 @@
 
 
 import numpy as np
-import cvxpy
 
 from fairpy import AllocationMatrix
 from fairpy.items.min_sharing_impl.ConsumptionGraph import ConsumptionGraph
 from fairpy.items.min_sharing_impl.FairAllocationProblem import FairAllocationProblem
+from fairpy.items.problem_templates import consumption_graph_template
 
 import logging
 logger = logging.getLogger(__name__)
@@ -31,6 +31,12 @@ class FairEnvyFreeAllocationProblem(FairAllocationProblem):
 
     def __init__(self, valuation):
         super().__init__(valuation)
+        self.compile_template()
+
+    def compile_template(self):
+        # The program is compiled once; each consumption graph only re-binds the "graph" parameter.
+        self.template = consumption_graph_template(self.valuation.num_of_agents, self.valuation.num_of_objects, "envy-free")
+        self.template.bind(valuations=self.valuation._v)
 
     def fairness_adjective(self)->str:
         return "envy-free"
@@ -95,43 +101,11 @@ class FairEnvyFreeAllocationProblem(FairAllocationProblem):
          [0.34 0.   1.   0.  ]
          [0.32 0.   0.   1.  ]]
         """
-        mat = cvxpy.Variable((self.valuation.num_of_agents, self.valuation.num_of_objects))
-        constraints = []
-        # every var >=0 and if there is no edge the var is zero
-        # and envy_free condition
-        for i in self.valuation.agents():
-            agent_sum = 0
-            for j in self.valuation.objects():
-                agent_sum += mat[i][j] * self.valuation[i][j]
-                if (consumption_graph.get_graph()[i][j] == 0):
-                    constraints.append(mat[i][j] == 0)
-                else:
-                    constraints.append(mat[i][j] >= 0)
-            anther_agent_sum = 0
-            for j in self.valuation.agents():
-                anther_agent_sum = 0
-                for k in self.valuation.objects():
-                    anther_agent_sum += mat[j][k] * self.valuation[i][k]
-                constraints.append(agent_sum >= anther_agent_sum)
-        # the sum of each column is 1 (the property on each object is 100%)
-        for i in self.valuation.objects():
-            constraints.append(sum(mat[:, i]) == 1)
-        objective = cvxpy.Maximize(1)
-        prob = cvxpy.Problem(objective, constraints)
-        solver1 = "ECOS"
-        solver2 = "SCS"
-        # See here https://www.cvxpy.org/tutorial/advanced/index.html for a list of supported solvers
-        try:
-            prob.solve(solver=solver1)
-        except cvxpy.SolverError:
-            prob.solve(solver=solver2)
-        if prob.status == 'optimal':
-            if mat.value is None:
-                raise ValueError("mat.value is None! prob.status="+prob.status)
-            logger.info("Found an envy-free allocation")
-            return AllocationMatrix(mat.value)
-        else:
+        (allocation_matrix, _, _) = self.template.try_solve(graph=consumption_graph.get_graph())
+        if allocation_matrix is None:
             return None
+        logger.info("Found an envy-free allocation")
+        return AllocationMatrix(allocation_matrix)
 
 
 
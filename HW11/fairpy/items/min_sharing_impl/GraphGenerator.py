@@ -11,7 +11,7 @@ from fairpy.items.min_sharing_impl.ConsumptionGraph import ConsumptionGraph
 from fairpy.items.min_sharing_impl.ValueRatio import ValueRatio
 from fairpy import ValuationMatrix
 import numpy as np
-import math
+import math, itertools
 
 
 class GraphGenerator():
@@ -24,16 +24,25 @@ class GraphGenerator():
         self.valuation_matrix = ValuationMatrix(valuation_matrix)
         self.valuation_ratios = ValueRatio(valuation_matrix)
         self.num_of_sharing_is_allowed = self.valuation_matrix.num_of_agents
+        # The value that each agent must be able to get in a proportional allocation (same computation as ConsumptionGraph.is_single_proportional):
+        self.proportional_shares = [
+            sum(self.valuation_matrix[i][o] for o in self.valuation_matrix.objects()) / self.valuation_matrix.num_of_agents
+            for i in self.valuation_matrix.agents()
+        ]
 
     def set_maximum_allowed_num_of_sharings(self, n:int):
         self.num_of_sharing_is_allowed = n
 
 
-    def generate_all_consumption_graph(self):
+    def generate_all_consumption_graph(self, shard_index:int=0, num_of_shards:int=1):
         """
         Generates consumption graphs for the given valuation matrix.
         Each graph is represented by a ConsumptionGraph object.
         Returns only graphs that may correspond to fractionally-Pareto-efficient and proportional allocations.
+        :param shard_index, num_of_shards: for running in parallel. 
+           The complete graphs are numbered in order, 
+           and only the graphs whose number modulo num_of_shards equals shard_index are returned.
+           The union of the shards 0,...,num_of_shards-1 is the set of all graphs.
         :return: a generator of all possibly fPO+PROP consumption graphs.
 
         >>> v = [[20,10],[6,4]]   # first agent must get at least 15; second agent at least 5
@@ -88,15 +97,22 @@ class GraphGenerator():
         [[1, 0.0, 0.0], [1, 1, 0.0], [1, 1, 1]]
         [[1, 0.0, 0.0], [1, 0.0, 0.0], [1, 1, 1]]
         [[1, 0.0, 0.0], [1, 0.0, 0.0], [1, 1, 1]]
+        >>> shards = [list(map(str, gg.generate_all_consumption_graph(shard_index=k, num_of_shards=4))) for k in range(4)]
+        >>> [len(shard) for shard in shards]
+        [9, 8, 8, 8]
+        >>> sorted(sum(shards, [])) == sorted(map(str, gg.generate_all_consumption_graph()))
+        True
         """
         a = (0)
         genenretor = self.add_agent(a, 0)
         for i in range(1, self.valuation_matrix.num_of_agents - 1):
             temp_generator = self.add_agent(genenretor, i)
             genenretor = temp_generator
+        graph_indices = itertools.count()
         for i in genenretor:
             for j in self.add_agent_to_graph(i):
-                yield j
+                if next(graph_indices) % num_of_shards == shard_index:
+                    yield j
 
     def add_agent(self, genneretor,i):
         """
@@ -126,6 +142,10 @@ class GraphGenerator():
 
     def add_agent_to_graph(self, consumption_graph: ConsumptionGraph):
         """
+        Generates the graphs for all the codes of the given graph (see code_to_consumption_graph), in the order of generate_all_codes,
+        that can be proportional and have at most the allowed number of sharings.
+        The code is built one agent at a time (branch-and-bound), and a partial code is abandoned as soon as
+        the sharings or the proportionality of the new agent cannot be satisfied by any completion.
         :param consumption_graph: some given ConsumptionGraph that represents agents and their allocated objects.
         :return: generator for the all the  graphs from adding agent i to the given graph
         >>> matv = [[40,30,20],[40,30,20],[10,10,10]]
@@ -156,10 +176,60 @@ class GraphGenerator():
         >>> for x in g.add_agent_to_graph(cg):
         ...     print(x.get_graph())
         """
-        for code in consumption_graph.generate_all_codes():
-            g = self.code_to_consumption_graph(consumption_graph, code)
-            if(g.can_be_proportional(self.valuation_matrix)) and (g.get_num_of_sharing() <= self.num_of_sharing_is_allowed):
-                yield g
+        graph = consumption_graph.get_graph()
+        num_of_agents = len(graph)
+        num_of_objects = len(graph[0])
+        i_new_agent = num_of_agents
+        values = self.valuation_matrix
+
+        # The row of agent i in the new graph depends only on code[i], so its proportionality is checked once per value of code[i].
+        options = []    # options[i] = list of (objects kept by agent i, objects given to the new agent), for all proportional values of code[i], in increasing order.
+        for i in range(num_of_agents):
+            arr = self.valuation_ratios.create_the_value_ratio_for_2(consumption_graph, i, i_new_agent)
+            num_of_properties = len(arr)
+            agent_options = []
+            for x in range(2*num_of_properties+1):
+                kept = sorted(arr[j][0] for j in range(num_of_properties - x//2))
+                given = [arr[j][0] for j in range(num_of_properties - (x+1)//2, num_of_properties)]
+                if sum(values[i][o] for o in kept) >= self.proportional_shares[i]:
+                    agent_options.append((kept, given))
+            if len(agent_options)==0:
+                return
+            options.append(agent_options)
+
+        # Bounds on the agents that are not yet coded:
+        max_given_from = [set() for _ in range(num_of_agents+1)]  # objects that agents i,...,n-1 can give to the new agent (the last option gives the most).
+        min_kept_from = [0] * (num_of_agents+1)                  # edges that agents i,...,n-1 must keep.
+        for i in reversed(range(num_of_agents)):
+            max_given_from[i] = max_given_from[i+1].union(options[i][-1][1])
+            min_kept_from[i] = min_kept_from[i+1] + min(len(kept) for kept,_ in options[i])
+        max_num_of_edges = num_of_objects + self.num_of_sharing_is_allowed
+        new_agent_share = self.proportional_shares[i_new_agent]
+
+        def new_agent_value(objects):
+            return sum(values[i_new_agent][o] for o in sorted(objects))
+
+        def complete_codes(i:int, chosen:list, new_agent_objects:set, num_of_kept:int):
+            if i == num_of_agents:
+                if new_agent_value(new_agent_objects) >= new_agent_share:
+                    yield chosen, new_agent_objects
+                return
+            for kept,given in options[i]:
+                objects = new_agent_objects.union(given)
+                if num_of_kept + len(kept) + min_kept_from[i+1] + len(objects) > max_num_of_edges:
+                    continue   # too many sharings, whatever the other agents do
+                if new_agent_value(objects.union(max_given_from[i+1])) < new_agent_share:
+                    continue   # the new agent cannot be proportional, whatever the other agents do
+                yield from complete_codes(i+1, chosen+[kept], objects, num_of_kept+len(kept))
+
+        for chosen, new_agent_objects in complete_codes(0, [], set(), 0):
+            mat = np.zeros((num_of_agents + 1, num_of_objects)).tolist()
+            for i,kept in enumerate(chosen):
+                for o in kept:
+                    mat[i][o] = 1
+            for o in new_agent_objects:
+                mat[i_new_agent][o] = 1
+            yield ConsumptionGraph(mat)
 
     def code_to_consumption_graph(self, consumption_graph: ConsumptionGraph, code) -> ConsumptionGraph:
         """
@@ -22,6 +22,7 @@ class ValueRatio():
         valuation_matrix = ValuationMatrix(valuation_matrix)
         self.valuation_matrix = valuation_matrix
         self.all_ratios = compute_all_ratios(valuation_matrix)
+        self._sorted_ratios = {}   # (x,y) -> all objects, sorted from large to small ratio; computed once and reused for all graphs.
 
     def create_the_value_ratio_for_2(self, consumption_graph:ConsumptionGraph, x:int, y:int):
         """
@@ -77,13 +78,24 @@ class ValueRatio():
         [(0, 1.0), (2, 1.0)]
         """
         graph = consumption_graph.get_graph()
-        ratios_for_x_and_y = self.all_ratios[x][y]
-        ans = []
-        for o in self.valuation_matrix.objects():
-            if(graph[x][o]==1):
-                ans.append(ratios_for_x_and_y[o])
-        ans.sort(key=second, reverse=True)  # sort from large to small ratio
-        return ans
+        # The sort is stable, so filtering the sorted list of all objects gives the same order as sorting the filtered list.
+        return [pair for pair in self.sorted_ratios(x, y) if graph[x][pair[0]]==1]
+
+    def sorted_ratios(self, x:int, y:int):
+        """
+        :return: the array of tuples (object index, ratio between agents x and y) for all objects, sorted from large to small ratio.
+        The array is computed once for each pair of agents.
+
+        >>> v = ValueRatio([[20,30,40,10],[10,60,10,20]])
+        >>> [o for o,ratio in v.sorted_ratios(0,1)]
+        [2, 0, 1, 3]
+        >>> v.sorted_ratios(0,1) is v.sorted_ratios(0,1)
+        True
+        """
+        key = (x,y)
+        if key not in self._sorted_ratios:
+            self._sorted_ratios[key] = sorted(self.all_ratios[x][y], key=second, reverse=True)  # sort from large to small ratio
+        return self._sorted_ratios[key]
 
 def second(pair):
     return pair[1]
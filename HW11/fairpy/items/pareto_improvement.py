@@ -15,14 +15,20 @@ Programmer: Shmuel Lavian
 Since:  2022-04
 """
 
-import cvxpy
+import numpy as np
 from fairpy import ValuationMatrix
-import matplotlib.pyplot as plt
 import networkx as nx
 from fairpy.agents import AdditiveAgent, Bundle
 from fairpy.items.allocations_fractional import FractionalAllocation
+from fairpy.items.problem_templates import pareto_improvement_template
 from networkx.algorithms import find_cycle
-from networkx.classes.function import create_empty_copy
+from networkx.utils import UnionFind
+
+import logging
+logger = logging.getLogger(__name__)
+
+# Fractions smaller than this are considered zero (the LP solvers return tiny non-zero values instead of zeros).
+FRACTION_TOLERANCE = 1e-9
 
 
 class ParetoImprovement:
@@ -38,11 +44,17 @@ class ParetoImprovement:
         """
         self.former_allocation = fr_allocation
         self.agents = fr_allocation.agents
-        self.items = items
-        self.Gx_complete = None
+        # A fixed order of the items (the order of the allocation's columns, which is deterministic, unlike the order of a set):
+        self.items = [item for item in fr_allocation.items if item in items]
+        missing_items = [item for item in items if item not in fr_allocation.item_index]
         self.result_T = None
-        self.current_iteration_cycle = None
-        self.val_mat = convert_FractionalAllocation_to_ValuationMatrix(self.former_allocation)
+        columns = [fr_allocation.item_index[item] for item in self.items]
+        self.former_mat = np.hstack([fr_allocation.matrix[:, columns], np.zeros((len(self.agents), len(missing_items)))])
+        self.val_mat = ValuationMatrix(np.hstack([
+            fr_allocation.to_valuation_matrix()._v[:, columns],
+            np.array([[agent.value({item}) for item in missing_items] for agent in self.agents]).reshape(len(self.agents), len(missing_items)),
+        ]))
+        self.items += missing_items
 
 
     def find_pareto_improvement(self) -> FractionalAllocation:
@@ -57,196 +69,212 @@ class ParetoImprovement:
 
         OUTPUT:
         * Fractional-Pareto-Optimal (fPO) that improves the former given allocation instance for which
-            the allocation graph Gx is acyclic
-
-        # Example 1 (One agent - positive/negative/mixed object allocation, will get everything):
-        # >>> agent1 = AdditiveAgent({"x": 1, "y": 2, "z": 4}, name="agent1")
-        # >>> agents = [agent1]
-        # >>> items_for_func ={'x','y','z'}
-        # >>> allocations = FractionalAllocation(agents, [{'x':1.0,'y':1.0, 'z':1.0}])
-        # >>> pi = ParetoImprovement(allocations, items_for_func)
-        # >>> pi.find_pareto_improvement().is_complete_allocation()
-        # True
-
-        # >>> agent1 = AdditiveAgent({"x": -1, "y": -2, "z": -4}, name="agent1")
-        # >>> agents = [agent1]
-        # >>> items_for_func ={'x','y','z'}
-        # >>> allocations = FractionalAllocation(agents, [{'x':1.0,'y':1.0, 'z':1.0}])
-        # >>> pi = ParetoImprovement(allocations, items_for_func)
-        # >>> pi.find_pareto_improvement().is_complete_allocation()
-        # True
-
-        # >>> agent1 = AdditiveAgent({"x": -1, "y": 2, "z": -4}, name="agent1")
-        # >>> agents = [agent1]
-        # >>> items_for_func ={'x','y','z'}
-        # >>> allocations = FractionalAllocation(agents, [{'x':1.0,'y':1.0, 'z':1.0}])
-        # >>> pi = ParetoImprovement(allocations, items_for_func)
-        # >>> pi.find_pareto_improvement().is_complete_allocation()
-        # True
-
-        # Example 2 (3rd example from the article)
-        # >>> agent1 = AdditiveAgent({"a": 10, "b": 100, "c": 80, "d": -100}, name="agent1")
-        # >>> agent2 = AdditiveAgent({"a": 20, "b": 100, "c": -40, "d": 10}, name="agent2")
-        # >>> G = nx.Graph()
-        # >>> items = {'a', 'b', 'c', 'd'}
-        # >>> allocations = FractionalAllocation(agents, [{'a':0.0,'b':0.3,'c':1.0,'d':0.0},{'a':1.0,'b':0.7,'c':0.0,'d':1.0}])
-        # >>> pi = ParetoImprovement(allocations, items)
-        # >>> pi.find_pareto_improvement().is_complete_allocation()
-        # True
-        
-        # Main algorithm 1 developer test
-        # >>> agent1 = AdditiveAgent({"a": 10, "b": 100, "c": 80, "d": -100}, name="agent1")
-        # >>> agent2 = AdditiveAgent({"a": 20, "b": 100, "c": -40, "d": 10}, name="agent2")
-        # >>> all_items  = {'a', 'b', 'c', 'd'}
-        # >>> all_agents = [agent1, agent2]
-        # >>> initial_allocation = FractionalAllocation(all_agents, [{'a':0.0,'b': 0.3,'c':1.0,'d':0.0},{'a':1.0,'b':0.7,'c':0.0,'d':1.0}])
-        # >>> pi = ParetoImprovement(initial_allocation, all_items)
-        # >>> pi.find_pareto_improvement().is_complete_allocation()
-        # True
+            the allocation graph Gx is acyclic. The graph itself is stored in self.result_T.
+
+        The fPO allocation is found by a single linear program (maximum sum of utilities, subject to every agent
+        getting at least his former utility), and then the cycles in its consumption graph are removed
+        by exchanges along each cycle that do not harm any agent (see eliminate_cycles).
+
+        Example 1 (One agent - will get everything):
+        >>> agent1 = AdditiveAgent({"x": 1, "y": 2, "z": 4}, name="agent1")
+        >>> agents = [agent1]
+        >>> items_for_func ={'x','y','z'}
+        >>> allocations = FractionalAllocation(agents, [{'x':1.0,'y':1.0, 'z':1.0}])
+        >>> pi = ParetoImprovement(allocations, items_for_func)
+        >>> pi.find_pareto_improvement().is_complete_allocation()
+        True
+
+        Example 2 (3rd example from the article):
+        >>> agent1 = AdditiveAgent({"a": 10, "b": 100, "c": 80, "d": -100}, name="agent1")
+        >>> agent2 = AdditiveAgent({"a": 20, "b": 100, "c": -40, "d": 10}, name="agent2")
+        >>> items = {'a', 'b', 'c', 'd'}
+        >>> allocations = FractionalAllocation([agent1, agent2], [{'a':0.0,'b':0.3,'c':1.0,'d':0.0},{'a':1.0,'b':0.7,'c':0.0,'d':1.0}])
+        >>> pi = ParetoImprovement(allocations, items)
+        >>> improved = pi.find_pareto_improvement()
+        >>> [{item: round(fraction, 3) for item, fraction in fractions.items()} for fractions in improved.map_item_to_fraction]
+        [{'a': 0.0, 'b': 0.3, 'c': 1.0, 'd': 0.0}, {'a': 1.0, 'b': 0.7, 'c': 0.0, 'd': 1.0}]
+
+        Example 3 (identical agents sharing everything - the cycle is removed):
+        >>> agent1 = AdditiveAgent({"x": 1, "y": 1}, name="agent1")
+        >>> agent2 = AdditiveAgent({"x": 1, "y": 1}, name="agent2")
+        >>> pi = ParetoImprovement(FractionalAllocation([agent1, agent2], [{'x':0.5,'y':0.5},{'x':0.5,'y':0.5}]), {'x','y'})
+        >>> pi.find_pareto_improvement().is_complete_allocation()
+        True
+        >>> is_acyclic(pi.result_T)
+        True
+
+        Example 4 (goods and chores):
+        >>> agent1= AdditiveAgent({"a": -100, "b": 10, "c": 50, "d": -100 ,"e": 70,"f": 100, "g": -300, "h": -40, "i": 30}, name="agent1")
+        >>> agent2= AdditiveAgent({"a": 20, "b": 20, "c": -40, "d": 90 ,"e": -90,"f": -100, "g": 30, "h": 80, "i": 90}, name="agent2")
+        >>> agent3= AdditiveAgent({"a": 10, "b": -30, "c": 30, "d": 40 ,"e": 180,"f": 100, "g": 300, "h": 20, "i": -90}, name="agent3")
+        >>> agent4= AdditiveAgent({"a": -200, "b": 40, "c": -20, "d": 80 ,"e": -300,"f": 100, "g": 30, "h": 60, "i": -180}, name="agent4")
+        >>> agent5= AdditiveAgent({"a": 50, "b": 50, "c": 10, "d": 60 ,"e": 90,"f": -100, "g": 300, "h": -120, "i": 180}, name="agent5")
+        >>> allocation = FractionalAllocation([agent1, agent2, agent3, agent4, agent5], [
+        ...     {'a':0.0,'b':1.0,'c':0.0,'d':0.0,'e':1.0,'f':1.0,'g':0.0,'h':0.0,'i':0.4},
+        ...     {'a':0.0,'b':0.0,'c':0.0,'d':1.0,'e':0.0,'f':0.0,'g':0.0,'h':1.0,'i':0.0},
+        ...     {'a':0.0,'b':0.0,'c':1.0,'d':0.0,'e':0.0,'f':0,'g':1.0,'h':0.0,'i':0.0},
+        ...     {'a':0.0,'b':0.0,'c':0.0,'d':0.0,'e':0.0,'f':0.0,'g':0.0,'h':0.0,'i':0.0},
+        ...     {'a':1.0,'b':0.0,'c':0.0,'d':0.0,'e':0.0,'f':0.0,'g':0.0,'h':0.0,'i':0.6}])
+        >>> pi = ParetoImprovement(allocation, {'a','b','c','d','e','f','g','h','i'})
+        >>> improved = pi.find_pareto_improvement()
+        >>> is_acyclic(pi.result_T)
+        True
+        >>> def utilities(alloc): return [sum(agent.value({item})*fraction for item,fraction in fractions.items()) for agent,fractions in zip(alloc.agents, alloc.map_item_to_fraction)]
+        >>> [round(new_value - old_value, 6) >= 0 for new_value, old_value in zip(utilities(improved), utilities(allocation))]
+        [True, True, True, True, True]
         """
         if len(self.agents) == 1:
             return self.former_allocation
-        self.__initiate_algorithm_graphs()
-        while not self.__is_acyclic():
-            for edge in self.current_iteration_cycle:
-                tmp_edge, tmp_opt = self.__linear_prog_solve(edge, self.result_T)
-                if tmp_edge is None or tmp_opt is None:
-                    continue
-                else:
-                    tmp_T = self.result_T
-                    tmp_T.add_edge(*edge)
-                    tmp_edge, tmp_opt2 = self.__linear_prog_solve(edge, tmp_T)
-                    if tmp_opt == tmp_opt2:
-                        self.result_T.add_edge(*edge)
-                        self.Gx_complete.remove_edge(*edge)
-        # plot_graph(self.result_T)
-        return self.__convert_result_graph_to_FractionalAllocation()
+        former_utilities = (self.val_mat._v * self.former_mat).sum(axis=1)
+        template = pareto_improvement_template(self.val_mat.num_of_agents, self.val_mat.num_of_objects)
+        (allocation_matrix, _, _) = template.solve(valuations=self.val_mat._v, thresholds=former_utilities)
+        allocation_matrix = eliminate_cycles(self.val_mat._v, allocation_matrix)
+        self.result_T = self.__allocation_matrix_to_graph(allocation_matrix)
+        return self.__allocation_matrix_to_FractionalAllocation(allocation_matrix)
 
 
-    def __linear_prog_solve(self, edge, result_graph):
-        """
-        Main linear programming help function which will receive the current allocation
-        and find an optimal set for the current states results according to four mathematical
-        conditions represented in Algorithms 2.
-
-        OUTPUT:
-        * A tuple containing (edge, optimal_value).
-            The edge will be used to create and test the result graph for cycles with or without it
+    def __allocation_matrix_to_graph(self, allocation_matrix:np.ndarray) -> nx.Graph:
         """
-        if type(edge[0]) is AdditiveAgent:
-            tmp_alloc = self.__generate_allocation_from_cycle_edge(edge)
-            tmp_mat = convert_FractionalAllocation_to_ValuationMatrix(tmp_alloc)
-            # Creates [agents, object] constrained matrix for variable input
-            allocation_vars = cvxpy.Variable((tmp_mat.num_of_agents, tmp_mat.num_of_objects))
-
-            # need allocation vars for each allocation
-            # can pass y as an argument
-
-            # line 5 in the algorithm, the max condition
-            sum_x = sum(allocation_vars[i][o] * tmp_mat[i][o] for o in tmp_mat.objects() for i in tmp_mat.agents())
-            sum_y = sum(allocation_vars[i][o] * self.val_mat[i][o] for o in self.val_mat.objects() for i in self.val_mat.agents())
-
-            first_constraints = [sum_x >= sum_y]
-            positivity_constraints = [
-                allocation_vars[i][o] >= 0 for i in tmp_mat.agents()
-                for o in tmp_mat.objects()
-            ]
-            feasibility_constraints = [
-                sum([allocation_vars[i][o] for i in tmp_mat.agents()])==1
-                for o in tmp_mat.objects()
-            ]
-
-            # turn t to set() 
-            result_fragmentation_constraints = [
-                not is_acyclic(result_graph)
-            ]
-            constraints = first_constraints + positivity_constraints + feasibility_constraints + result_fragmentation_constraints
-            problem = cvxpy.Problem(cvxpy.Maximize(sum_x), constraints)
-            opt = problem.solve(
-                #Uncomment next line in order to see all solving comments
-                # verbose=True
-                )
-
-            # don't need edge
-            # from allocation vars we can create new GX
-            return edge, opt
-        return None, None
-
-    
-    def __generate_allocation_from_cycle_edge(self, edge):
+        Converts the allocation matrix to its consumption graph: a bipartite graph with an edge between
+        each agent and each item he consumes.
         """
-        Converts a bipartite graph to a FractionalAllocation object
-        This function will be used to prepare the allocation for linear programming
-        calculation.
+        graph = nx.Graph()
+        graph.add_nodes_from(self.agents)
+        graph.add_nodes_from(self.items)
+        for i_agent, i_item in zip(*np.nonzero(allocation_matrix)):
+            graph.add_edge(self.agents[i_agent], self.items[i_item])
+        return graph
 
-        This function also makes sure that the result is not fragmented 
-        as required by the linear solving algorithm conditions
-        """
-        former_alloc_map = self.former_allocation.map_item_to_fraction
-        for agent in self.agents:
-            if agent == edge[0]:
-                for i_agent, alloc_agent in enumerate(self.agents):
-                    if alloc_agent == agent:
-                        former_alloc_map[i_agent][edge[1]] = 1.0
-                    else:
-                        former_alloc_map[i_agent][edge[1]] = 0
-        return FractionalAllocation(self.agents, former_alloc_map)
-
-
-    def __is_acyclic(self) -> bool:
+
+    def __allocation_matrix_to_FractionalAllocation(self, allocation_matrix:np.ndarray) -> FractionalAllocation:
         """
-        A helper function which checks if a given bipartite graph has cycles
-        it will be used in every iteration in the main algorithms core while loop
-        this class method is especially used in order to save each iteration cycle
-        for edge testing in the algorithm
+        Converts the resulting allocation matrix to a FractionalAllocation
+        object for the main articles algorithm to work on
         """
-        try:
-            self.current_iteration_cycle = find_cycle(self.Gx_complete)
-            return False
-        except nx.NetworkXNoCycle:
-            return True
+        return FractionalAllocation(self.agents, allocation_matrix, items=self.items)
 
 
-    def __initiate_algorithm_graphs(self):
-        """
-        A helper function that receives the current item allocation between agents and 
-        creates a complete bipartite graph from them connection all agents with all 
-        resources. 
-        This function will be used for initializing the main class function.
-        """
-        Gx_complete = nx.Graph()
-        for agent in self.agents:
-            Gx_complete.add_node(agent)
-        for object in self.items:
-            Gx_complete.add_node(object)
-        for agent in self.agents:
-            for object in self.items:
-                Gx_complete.add_edge(agent, object)
-        self.Gx_complete = Gx_complete
-        self.result_T = create_empty_copy(self.Gx_complete, with_data=True)
-
-
-    def __convert_result_graph_to_FractionalAllocation(self) -> FractionalAllocation:
-        """
-        Converts the resulting allocation graph T to a FractionalAllocation
-        object for the main articles algorithm to work on
+def eliminate_cycles(valuations:np.ndarray, allocation_matrix:np.ndarray) -> np.ndarray:
+    """
+    Removes the cycles from the consumption graph of a fractionally-Pareto-optimal allocation,
+    without decreasing the utility of any agent.
+
+    The forest of edges scanned so far is kept in a union-find structure, so an edge closes a cycle
+    iff both its endpoints are already in the same component. The cycle is then removed by moving fractions along it:
+    each agent on the cycle gives some of one item to the next agent, and the amounts are chosen such that
+    the utilities of all agents but one are unchanged, and the utility of that agent does not decrease.
+    The amounts are increased until some edge of the cycle disappears.
+    Each exchange removes at least one edge, so there are at most n*m exchanges.
+
+    :param valuations: a matrix of values, valuations[i,o] = the value of agent i to item o.
+    :param allocation_matrix: a matrix of fractions, allocation_matrix[i,o] = the fraction of item o given to agent i.
+    :return: an allocation matrix with an acyclic consumption graph, in which every agent weakly prefers his bundle.
+
+    >>> eliminate_cycles(np.array([[1,1],[1,1]]), np.array([[0.5,0.5],[0.5,0.5]]))
+    array([[0., 1.],
+           [1., 0.]])
+    >>> eliminate_cycles(np.array([[2,1],[1,2]]), np.array([[1.,0.],[0.,1.]]))
+    array([[1., 0.],
+           [0., 1.]])
+    >>> eliminate_cycles(np.array([[1,0],[1,2]]), np.array([[0.5,0.5],[0.5,0.5]]))   # the agent who values y at 0 gives it away
+    array([[0.5, 0. ],
+           [0.5, 1. ]])
+    """
+    allocation_matrix = np.array(allocation_matrix, dtype=float)
+    allocation_matrix[allocation_matrix < FRACTION_TOLERANCE] = 0
+    allocation_matrix[np.abs(allocation_matrix - 1) < FRACTION_TOLERANCE] = 1
+    num_of_agents = allocation_matrix.shape[0]
+    forest_is_valid = False
+    while not forest_is_valid:
+        # Scan the edges, building a forest; agent i is node i, and item o is node num_of_agents+o.
+        forest_is_valid = True
+        components = UnionFind()
+        forest = {}   # node -> set of neighbors in the forest
+        for i_agent, i_item in zip(*np.nonzero(allocation_matrix)):
+            if allocation_matrix[i_agent, i_item] == 0:   # removed by a previous exchange in this scan
+                continue
+            agent_node, item_node = int(i_agent), num_of_agents + int(i_item)
+            if components[agent_node] != components[item_node]:
+                components.union(agent_node, item_node)
+                forest.setdefault(agent_node, set()).add(item_node)
+                forest.setdefault(item_node, set()).add(agent_node)
+                continue
+            path = _path_in_forest(forest, item_node, agent_node)
+            cycle_agents = [agent_node] + [node for node in path[1::2]][:-1]
+            cycle_items = [node - num_of_agents for node in path[0::2]]
+            removed_edges = _exchange_along_cycle(valuations, allocation_matrix, cycle_agents, cycle_items)
+            logger.debug("Removed the edges %s of the cycle agents=%s items=%s", removed_edges, cycle_agents, cycle_items)
+            if (i_agent, i_item) not in removed_edges:
+                forest_is_valid = False   # an edge of the forest was removed - the scan must start over.
+                break
+    return allocation_matrix
+
+
+def _path_in_forest(forest:dict, source, target) -> list:
+    """
+    :return: the list of nodes on the unique path from source to target in the given forest (both ends included).
 
-        This method will be called at the end of the parteo improvement
-        algorithm in order to convert the receiving graph T to an allocation object
-        """
-        # for edge in self.result_T.edges():
-        #     print(edge)
-        #     print()
-        result_allocation_list = []
-        for agent in self.agents:
-            tmp_agent_allocation_map = {}
-            for item in self.items:
-                tmp_agent_allocation_map[item] = 0
-            for item in self.result_T.neighbors(agent):
-                tmp_agent_allocation_map[item] = 1
-            result_allocation_list.append(tmp_agent_allocation_map)
-        alloc = FractionalAllocation(self.agents, result_allocation_list)
-        return alloc
+    >>> _path_in_forest({0:{1}, 1:{0,2}, 2:{1}}, 0, 2)
+    [0, 1, 2]
+    """
+    parents = {source: None}
+    stack = [source]
+    while target not in parents:
+        node = stack.pop()
+        for neighbor in forest[node]:
+            if neighbor not in parents:
+                parents[neighbor] = node
+                stack.append(neighbor)
+    path = [target]
+    while path[-1] != source:
+        path.append(parents[path[-1]])
+    return path[::-1]
+
+
+def _exchange_along_cycle(valuations:np.ndarray, allocation_matrix:np.ndarray, cycle_agents:list, cycle_items:list) -> list:
+    """
+    Moves fractions along the cycle a[0], o[0], a[1], o[1], ..., a[k-1], o[k-1], a[0],
+    where agent a[j] consumes items o[j-1] and o[j], such that no agent loses, and at least one edge of the cycle disappears.
+    Changes allocation_matrix in place.
+    :return: the list of removed edges (agent, item).
+    """
+    k = len(cycle_agents)
+    givers = cycle_agents                                  # a[j] gives o[j] ...
+    receivers = cycle_agents[1:] + cycle_agents[:1]        # ... to a[j+1].
+    # An item that one of its consumers values at 0 can be moved entirely without harming anyone:
+    for giver, receiver, item in zip(givers, receivers, cycle_items):
+        for (zero_agent, other_agent) in [(giver, receiver), (receiver, giver)]:
+            if valuations[zero_agent, item] == 0:
+                if valuations[other_agent, item] >= 0:
+                    (source, destination) = (zero_agent, other_agent)
+                else:
+                    (source, destination) = (other_agent, zero_agent)
+                allocation_matrix[destination, item] += allocation_matrix[source, item]
+                allocation_matrix[source, item] = 0
+                return [(source, item)]
+    # amounts[j] = the amount of o[j] that a[j] gives to a[j+1] per unit of exchange (may be negative).
+    # The amounts keep the utilities of a[1], ..., a[k-1] unchanged.
+    amounts = np.ones(k)
+    for j in range(1, k):
+        amounts[j] = amounts[j-1] * valuations[givers[j], cycle_items[j-1]] / valuations[givers[j], cycle_items[j]]
+    gain_of_first_agent = valuations[givers[0], cycle_items[k-1]] * amounts[k-1] - valuations[givers[0], cycle_items[0]] * amounts[0]
+    if gain_of_first_agent < 0:
+        amounts = -amounts
+    # For each item, the agent whose fraction decreases, and how fast:
+    sources = [giver if amount > 0 else receiver for giver, receiver, amount in zip(givers, receivers, amounts)]
+    speeds = np.abs(amounts)
+    steps = [allocation_matrix[source, item] / speed for source, item, speed in zip(sources, cycle_items, speeds)]
+    step = min(steps)
+    removed_edges = []
+    for giver, receiver, item, amount, source, item_step in zip(givers, receivers, cycle_items, amounts, sources, steps):
+        allocation_matrix[giver, item] -= step * amount
+        allocation_matrix[receiver, item] += step * amount
+        if item_step <= step * (1 + FRACTION_TOLERANCE) or allocation_matrix[source, item] < FRACTION_TOLERANCE:
+            destination = receiver if source == giver else giver
+            allocation_matrix[destination, item] += allocation_matrix[source, item]
+            allocation_matrix[source, item] = 0
+            removed_edges.append((source, item))
+    return removed_edges
 
 
 def plot_graph(graph):
@@ -254,6 +282,7 @@ def plot_graph(graph):
     Draws the received networkx graph, this function is used for visual 
     testing during development
     """
+    import matplotlib.pyplot as plt   # imported here, since matplotlib is needed only for this development aid
     nx.draw(graph, with_labels = True)
     plt.show()
 
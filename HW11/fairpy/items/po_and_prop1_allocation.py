@@ -14,6 +14,7 @@ Since:  2021-02
 
 
 import queue
+import numpy as np
 import networkx as nx
 from fairpy.agents import AdditiveAgent, Bundle, List
 from fairpy.items.allocations_fractional import FractionalAllocation
@@ -441,15 +442,15 @@ def get_dict_of_items_curr_agent_share(curr_agent:  AdditiveAgent, fpo_alloc: Fr
     {'f': ['agent1', 'agent2', 'agent3']}
     """
     result = {}
-    index_of_agent = fpo_alloc.agents.index(curr_agent)
-    for item, val in fpo_alloc.map_item_to_fraction[index_of_agent].items():
-        if val > 0 and val != 1.0:
-            list_of_agent_that_share_item = []
-            for agent in fpo_alloc.agents:
-                index_of_agent = fpo_alloc.agents.index(agent)
-                if agent != curr_agent and fpo_alloc.map_item_to_fraction[index_of_agent][item] >0:
-                    list_of_agent_that_share_item.append(agent)
-            result[item] = list_of_agent_that_share_item
+    index_of_agent = fpo_alloc.agent_index[curr_agent]
+    fractions = fpo_alloc.matrix[index_of_agent]
+    for index_of_item in np.flatnonzero((fractions > 0) & (fractions != 1.0)):
+        list_of_agent_that_share_item = [
+            fpo_alloc.agents[index_of_other_agent]
+            for index_of_other_agent in np.flatnonzero(fpo_alloc.matrix[:, index_of_item] > 0)
+            if index_of_other_agent != index_of_agent
+        ]
+        result[fpo_alloc.items[index_of_item]] = list_of_agent_that_share_item
     return result
 
 '''
@@ -487,12 +488,10 @@ def update_fpo_alloc_and_Gx(curr_agent: AdditiveAgent, item: str, list_of_agent_
     <BLANKLINE>
 
     """
-    index_of_agent = fpo_alloc.agents.index(curr_agent)
-    fpo_alloc.map_item_to_fraction[index_of_agent][item] = 1.0
+    fpo_alloc.set_agent_fraction(curr_agent, item, 1.0)
     for agent in list_of_agent_share_item:
-        index_of_agent = fpo_alloc.agents.index(agent)
         remove_edge(item, agent, Gx)
-        fpo_alloc.map_item_to_fraction[index_of_agent][item] = 0.0
+        fpo_alloc.set_agent_fraction(agent, item, 0.0)
 '''
 The function receives the two vertices that make up the side, which are: item and agent
 And the graph.
@@ -0,0 +1,304 @@
+#!python3
+
+"""
+Pre-compiled cvxpy problems for fractional allocation of objects among agents with additive valuations.
+
+Each template is built once per problem shape (number of agents, number of objects, kind),
+using vectorized matrix expressions and cvxpy Parameters for the input data (valuations, thresholds, consumption graph).
+Solving a new instance of the same shape only re-binds the parameters,
+so cvxpy can skip the canonicalization step, which dominates the running time for large instances.
+
+Thread safety: a template is a mutable object (its parameters are re-bound, and its solver list re-ordered, on each solve),
+and the cached templates are shared by all threads of the process (e.g. the request handlers of a threaded web server).
+Each template therefore has a lock, which `solve` and `try_solve` hold from binding the parameters until reading the result;
+they return the variable value together with the status and objective value, so callers never read `template.problem` after the lock is released.
+Concurrent solves of the same shape run one at a time, while different shapes are solved in parallel.
+A lock was chosen over a thread-local cache so that each shape is compiled once per process rather than once per thread.
+Code that calls `bind` separately should hold `template.lock` around its bind-and-solve sequence.
+
+Since:  2022-05
+"""
+
+import cvxpy, functools, threading, numpy as np
+from fairpy.solve import solve, DEFAULT_SOLVERS
+from typing import List, Tuple, Dict
+
+import logging
+logger = logging.getLogger(__name__)
+
+WELFARE_KINDS = ["sum", "product", "minimum", "power"]
+
+# Above this total parameter size, the templates are solved with ignore_dpp, i.e., re-canonicalized on each solve like a one-off problem.
+# cvxpy's DPP compilation builds a tensor that grows quadratically with the parameter size
+# (about 1.5 seconds for 64x128 valuations, and an 8 GiB allocation for 128x256), while re-solving is no faster than a one-off problem at that size.
+MAX_DPP_PARAMETER_SIZE = 4096
+
+# Solvers for the non-linear welfare functions (product, power). The interior-point solvers come first,
+# since they return the "central" optimal solution when there are several
+# (warm-starting from the previous instance would move it away from the center).
+CONIC_SOLVERS = [
+    (cvxpy.CLARABEL, {"warm_start": False}),
+    (cvxpy.ECOS, {}),
+    (cvxpy.SCS, {}),
+]
+
+# Solvers that always return a Basic Feasible Solution, which has at most n-1 sharings.
+BFS_SOLVERS = [
+    (cvxpy.SCIPY, {'method': 'highs-ds'}),
+    (cvxpy.MOSEK, {"bfs":True}),
+    (cvxpy.OSQP, {}),                             # Default - not sure it returns a BFS
+    (cvxpy.SCIPY, {}),                            # Default - not sure it returns a BFS
+]
+
+# Solvers for the consumption-graph feasibility programs of the min-sharing algorithms.
+# OSQP violates the ==0 constraints, so it is not used.
+CONSUMPTION_GRAPH_SOLVERS = [
+    (cvxpy.ECOS, {}),
+    (cvxpy.CLARABEL, {}),
+    (cvxpy.SCS, {}),
+]
+
+
+class ProblemTemplate:
+    """
+    A cvxpy problem whose data is given by Parameters, that can be solved many times with different data.
+
+    >>> x = cvxpy.Variable(2)
+    >>> p = cvxpy.Parameter(2)
+    >>> template = ProblemTemplate(cvxpy.Problem(cvxpy.Maximize(cvxpy.sum(x)), [x <= p]), x, {"p": p})
+    >>> (value, status, objective) = template.solve(p=[1,2])
+    >>> value.round(3) + 0, status, round(float(objective), 3)
+    (array([1., 2.]), 'optimal', 3.0)
+    >>> template.solve(p=[3,4])[0].round(3) + 0
+    array([3., 4.])
+
+    Concurrent solves of a shared template do not mix their data:
+    >>> from concurrent.futures import ThreadPoolExecutor
+    >>> with ThreadPoolExecutor(4) as executor:
+    ...     results = list(executor.map(lambda i: template.solve(p=[i,-i])[0], range(20)))
+    >>> all(np.allclose(result, [i,-i], atol=1e-6) for i,result in enumerate(results))
+    True
+
+    Large templates skip the DPP compilation:
+    >>> (template.ignore_dpp, welfare_template(2, 5000, "sum").ignore_dpp)
+    (False, True)
+    """
+
+    def __init__(self, problem:cvxpy.Problem, variable:cvxpy.Variable, parameters:Dict[str,cvxpy.Parameter], solvers:List[Tuple[str, Dict]]=DEFAULT_SOLVERS):
+        """
+        :param problem: a DPP-compliant cvxpy problem.
+        :param variable: the variable whose value is returned by `solve`.
+        :param parameters: maps a name to each parameter of the problem.
+        :param solvers: a list of (solver, kwargs) pairs, to try in order.
+        """
+        self.problem = problem
+        self.variable = variable
+        self.parameters = parameters
+        self.solvers = list(solvers)
+        self.ignore_dpp = sum(parameter.size for parameter in parameters.values()) > MAX_DPP_PARAMETER_SIZE
+        self.lock = threading.RLock()   # held from binding the parameters until the result is read; see the module docstring.
+
+    def solve(self, **parameter_values)->Tuple[np.ndarray, str, float]:
+        """
+        Binds the given values to the parameters with the same names, and solves the problem.
+        :return a tuple (value, status, objective), all read under the lock: a copy of the value of the variable,
+           the problem status and the optimal objective value. Raises an exception if the problem is infeasible or unbounded.
+        """
+        with self.lock:
+            self.bind(**parameter_values)
+            succeeded = solve(self.problem, solvers=self.solvers, ignore_dpp=self.ignore_dpp)
+            self._prefer(succeeded)
+            return (np.array(self.variable.value), self.problem.status, self.problem.value)
+
+    def try_solve(self, **parameter_values)->Tuple[np.ndarray, str, float]:
+        """
+        Like `solve`, but the returned value is None if no optimal solution is found.
+        """
+        with self.lock:
+            self.bind(**parameter_values)
+            for solver_and_kwargs in list(self.solvers):
+                (solver, solver_kwargs) = solver_and_kwargs
+                try:
+                    self.problem.solve(solver=solver, ignore_dpp=self.ignore_dpp, **solver_kwargs)
+                except cvxpy.SolverError as err:
+                    logger.info("Solver %s [%s] fails: %s", solver, solver_kwargs, err)
+                    continue
+                self._prefer(solver_and_kwargs)
+                if self.problem.status == "optimal" and self.variable.value is not None:
+                    return (np.array(self.variable.value), self.problem.status, self.problem.value)
+                return (None, self.problem.status, self.problem.value)
+            raise cvxpy.SolverError(f"All solvers failed: {self.solvers}")
+
+    def bind(self, **parameter_values):
+        for name,value in parameter_values.items():
+            self.parameters[name].value = np.asarray(value, dtype=float)
+
+    def _prefer(self, solver:Tuple[str, Dict]):
+        """
+        Moves the given solver to the front of the list, so that the next solve does not re-try (and re-compile for) the solvers that failed.
+        """
+        if solver is not None and self.solvers[0] != solver:
+            self.solvers.remove(solver)
+            self.solvers.insert(0, solver)
+
+
+def _allocation_variable_and_constraints(num_of_agents:int, num_of_objects:int):
+    allocation_vars = cvxpy.Variable((num_of_agents, num_of_objects))
+    constraints = [
+        cvxpy.sum(allocation_vars, axis=0) == 1,    # each object is allocated entirely
+        allocation_vars >= 0,
+    ]
+    return allocation_vars, constraints
+
+
+@functools.lru_cache(maxsize=64)
+def welfare_template(num_of_agents:int, num_of_objects:int, welfare_kind:str, power:float=None)->ProblemTemplate:
+    """
+    A template for finding an allocation that maximizes a social welfare function.
+    :param welfare_kind: one of "sum", "product", "minimum", "power".
+    :param power: the power of the utilities, when welfare_kind=="power". Must be in (0,1) or negative.
+    The only parameter is the "valuations" matrix.
+
+    >>> template = welfare_template(2, 2, "sum")
+    >>> template.solve(valuations=[[3,2],[1,4]])[0].round(3) + 0
+    array([[1., 0.],
+           [0., 1.]])
+    >>> template.solve(valuations=[[3,3],[1,1]])[0].round(3) + 0
+    array([[1., 1.],
+           [0., 0.]])
+    >>> welfare_template(2, 2, "sum") is template
+    True
+    >>> welfare_template(2, 1, "minimum").solve(valuations=[[3],[5]])[0].round(3)
+    array([[0.625],
+           [0.375]])
+    >>> welfare_template(2, 1, "median")
+    Traceback (most recent call last):
+    ...
+    ValueError: Unknown welfare kind median; should be one of ['sum', 'product', 'minimum', 'power']
+    """
+    valuations = cvxpy.Parameter((num_of_agents, num_of_objects))
+    allocation_vars, constraints = _allocation_variable_and_constraints(num_of_agents, num_of_objects)
+    utilities = cvxpy.sum(cvxpy.multiply(valuations, allocation_vars), axis=1)
+    constraints.append(utilities >= 0)
+    problem = cvxpy.Problem(cvxpy.Maximize(welfare_expression(utilities, welfare_kind, power)), constraints)
+    return ProblemTemplate(problem, allocation_vars, {"valuations": valuations}, solvers=welfare_solvers(welfare_kind))
+
+
+def welfare_expression(utilities:cvxpy.Expression, welfare_kind:str, power:float=None)->cvxpy.Expression:
+    """
+    :param utilities: a cvxpy vector of the agents' utilities.
+    :return: the welfare of the given kind (see welfare_template), as a cvxpy expression to maximize.
+    """
+    if welfare_kind == "sum":
+        return cvxpy.sum(utilities)
+    elif welfare_kind == "product":
+        return cvxpy.sum(cvxpy.log(utilities))
+    elif welfare_kind == "minimum":
+        return cvxpy.min(utilities)
+    elif welfare_kind == "power":
+        if power > 0:
+            return cvxpy.sum(cvxpy.power(utilities, power))
+        else:
+            return -cvxpy.sum(cvxpy.power(utilities, power))
+    else:
+        raise ValueError(f"Unknown welfare kind {welfare_kind}; should be one of {WELFARE_KINDS}")
+
+
+def welfare_solvers(welfare_kind:str)->List[Tuple[str, Dict]]:
+    """
+    :return: the solvers to try for a welfare of the given kind: linear for sum and minimum, conic otherwise.
+    """
+    return DEFAULT_SOLVERS if welfare_kind in ["sum", "minimum"] else CONIC_SOLVERS
+
+
+@functools.lru_cache(maxsize=64)
+def dominating_template(num_of_agents:int, num_of_objects:int)->ProblemTemplate:
+    """
+    A template for finding an allocation that maximizes the utility of the last agent,
+    subject to the utility of every other agent i being at least thresholds[i].
+    The parameters are the "valuations" matrix and the "thresholds" vector (of size num_of_agents-1).
+    It is solved with BFS_SOLVERS, so the returned allocation has at most n-1 sharings.
+
+    >>> dominating_template(2, 2).solve(valuations=[[8,2],[5,5]], thresholds=[2])[0].round(3) + 0
+    array([[0.25, 0.  ],
+           [0.75, 1.  ]])
+    """
+    valuations = cvxpy.Parameter((num_of_agents, num_of_objects))
+    thresholds = cvxpy.Parameter(num_of_agents-1)
+    allocation_vars, constraints = _allocation_variable_and_constraints(num_of_agents, num_of_objects)
+    utilities = cvxpy.sum(cvxpy.multiply(valuations, allocation_vars), axis=1)
+    if num_of_agents > 1:
+        constraints.append(utilities[:num_of_agents-1] >= thresholds)
+    problem = cvxpy.Problem(cvxpy.Maximize(utilities[num_of_agents-1]), constraints)
+    return ProblemTemplate(problem, allocation_vars, {"valuations": valuations, "thresholds": thresholds}, solvers=BFS_SOLVERS)
+
+
+@functools.lru_cache(maxsize=64)
+def pareto_improvement_template(num_of_agents:int, num_of_objects:int)->ProblemTemplate:
+    """
+    A template for finding an allocation that maximizes the sum of utilities,
+    subject to the utility of every agent i being at least thresholds[i] (his utility in the allocation to improve).
+    The parameters are the "valuations" matrix and the "thresholds" vector.
+    It is solved with BFS_SOLVERS, so the returned allocation is a vertex of the feasible polytope.
+
+    >>> pareto_improvement_template(2, 2).solve(valuations=[[8,2],[5,5]], thresholds=[2,5])[0].round(3) + 0
+    array([[1., 0.],
+           [0., 1.]])
+    >>> pareto_improvement_template(2, 2).solve(valuations=[[8,2],[5,5]], thresholds=[2,8])[0].round(3) + 0
+    array([[0.4, 0. ],
+           [0.6, 1. ]])
+    """
+    valuations = cvxpy.Parameter((num_of_agents, num_of_objects))
+    thresholds = cvxpy.Parameter(num_of_agents)
+    allocation_vars, constraints = _allocation_variable_and_constraints(num_of_agents, num_of_objects)
+    utilities = cvxpy.sum(cvxpy.multiply(valuations, allocation_vars), axis=1)
+    constraints.append(utilities >= thresholds)
+    problem = cvxpy.Problem(cvxpy.Maximize(cvxpy.sum(utilities)), constraints)
+    return ProblemTemplate(problem, allocation_vars, {"valuations": valuations, "thresholds": thresholds}, solvers=BFS_SOLVERS)
+
+
+def consumption_graph_template(num_of_agents:int, num_of_objects:int, criterion:str)->ProblemTemplate:
+    """
+    A template for finding an allocation whose support is contained in a given consumption graph, and satisfies a fairness criterion.
+    :param criterion: either "threshold" (each agent i gets utility at least thresholds[i]), or "envy-free".
+    The parameters are the "valuations" matrix, the "graph" 0/1 matrix, and (for "threshold") the "thresholds" vector.
+    Unlike the other templates, this one is not cached globally, since each min-sharing problem keeps its own.
+
+    >>> template = consumption_graph_template(2, 3, "threshold")
+    >>> template.try_solve(valuations=[[465,0,535],[0,0,1000]], thresholds=[732.5,500], graph=[[1,1,1],[0,0,1]])[0].round(3) + 0
+    array([[1. , 1. , 0.5],
+           [0. , 0. , 0.5]])
+    >>> template.try_solve(graph=[[1,1,0],[0,0,1]])[:2]
+    (None, 'infeasible')
+    >>> template = consumption_graph_template(2, 2, "envy-free")
+    >>> template.try_solve(valuations=[[2,1],[1,2]], graph=[[1,0],[0,1]])[0].round(3) + 0
+    array([[1., 0.],
+           [0., 1.]])
+    >>> template.try_solve(graph=[[1,1],[0,0]])[:2]
+    (None, 'infeasible')
+    """
+    valuations = cvxpy.Parameter((num_of_agents, num_of_objects))
+    graph = cvxpy.Parameter((num_of_agents, num_of_objects), nonneg=True)
+    allocation_vars, constraints = _allocation_variable_and_constraints(num_of_agents, num_of_objects)
+    constraints.append(cvxpy.multiply(1-graph, allocation_vars) == 0)   # no edge => no consumption
+    parameters = {"valuations": valuations, "graph": graph}
+    if criterion == "threshold":
+        thresholds = cvxpy.Parameter(num_of_agents)
+        utilities = cvxpy.sum(cvxpy.multiply(valuations, allocation_vars), axis=1)
+        constraints.append(utilities >= thresholds)
+        parameters["thresholds"] = thresholds
+    elif criterion == "envy-free":
+        values_to_bundles = valuations @ allocation_vars.T     # [i,j] = value of agent i to bundle of agent j
+        own_values = cvxpy.reshape(cvxpy.diag(values_to_bundles), (num_of_agents, 1), order="F")
+        constraints.append(own_values @ np.ones((1, num_of_agents)) >= values_to_bundles)
+    else:
+        raise ValueError(f"Unknown criterion {criterion}; should be 'threshold' or 'envy-free'")
+    problem = cvxpy.Problem(cvxpy.Maximize(0), constraints)
+    return ProblemTemplate(problem, allocation_vars, parameters, solvers=CONSUMPTION_GRAPH_SOLVERS)
+
+
+
+if __name__ == '__main__':
+    import doctest
+    (failures, tests) = doctest.testmod(report=True)
+    print("{} failures, {} tests".format(failures, tests))
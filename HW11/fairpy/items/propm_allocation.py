@@ -10,11 +10,10 @@ Programmer: Maksim Timokhin
 Since:  2021-05
 """
 
-import networkx as nx
 import numpy as np
-from fairpy import ValuationMatrix, Allocation, convert_input_to_valuation_matrix
-from typing import List
-from copy import deepcopy
+from fairpy import ValuationMatrix, Allocation, convert_input_to_valuation_matrix, input_to_valuation_matrix
+from typing import List, Tuple, Union
+import itertools
 import logging
 
 logger = logging.getLogger(__name__)
@@ -24,9 +23,14 @@ logger = logging.getLogger(__name__)
 ### Main function
 ###
 
-def propm_allocation(instance) -> Allocation:
+def propm_allocation(instance, decompose_only:bool=False) -> Union[Allocation, List[Tuple[list, list]]]:
     """
     Function that takes a valuation matrix and returns PROPm allocation of goods.
+    :param instance: a valuation matrix, or any other input format accepted by `convert_input_to_valuation_matrix`.
+    :param decompose_only: if True, the sub-problems are not solved; the function returns the list of sub-problems
+        of the first stage (see `decompose`), with agents and goods given by their names if the input has names,
+        and by their indices otherwise.
+    :return: a PROPm allocation; or, if decompose_only is True, a list of pairs (agents, goods).
     >>> import numpy as np
     >>> v = np.array([
     ... [0.25, 0.25, 0.25, 0.25, 0, 0],
@@ -43,6 +47,8 @@ def propm_allocation(instance) -> Allocation:
     Agent #1 gets {0,1} with value 0.51.
     Agent #2 gets {4,5} with value 0.51.
     <BLANKLINE>
+    >>> propm_allocation(v, decompose_only=True)
+    [([0], [2, 3]), ([1, 2], [4, 5, 0, 1])]
 
     >>> v = {"Alice":  {"z":12, "y":10, "x":8, "w":7, "v":4, "u":1},\
             "Dina":   {"z":14, "y":9, "x":15, "w":4, "v":9, "u":12},\
@@ -53,7 +59,16 @@ def propm_allocation(instance) -> Allocation:
     Dina gets {u,v,w} with value 25.
     George gets {z} with value 19.
     <BLANKLINE>
+    >>> propm_allocation(v, decompose_only=True)
+    [(['George'], ['z']), (['Alice'], ['x', 'y']), (['Dina'], ['u', 'v', 'w'])]
     """
+    if decompose_only:
+        (valuation_matrix, agent_names, object_names) = input_to_valuation_matrix(instance)
+        return [
+            (agents if agent_names is None else [agent_names[agent] for agent in agents],
+             goods if object_names is None else [object_names[good] for good in goods])
+            for agents, goods in decompose(valuation_matrix)
+        ]
     return convert_input_to_valuation_matrix(solve)(instance)
 
 
@@ -92,39 +107,61 @@ def divide(v: ValuationMatrix) -> List[List[int]]:
     [[4, 5, 0], [1], [2, 3]]
     """
     total_value = v.verify_normalized()
-    item_order = sorted(v.objects(), key=lambda j: v[0, j])
+    (item_order, ends) = _divide(np.asarray(v[0]), total_value, v.num_of_agents)
+    return [item_order[start:end].tolist() for start, end in zip([0] + ends[:-1], ends)]
 
-    bundles = []
+
+def _divide(divider_values: np.ndarray, total_value: float, num_of_bundles: int) -> Tuple[np.ndarray, List[int]]:
+    """
+    The divider sorts the goods by increasing value, and cuts the sorted sequence into num_of_bundles consecutive bundles.
+    :return: the item order, and the list of end positions of the bundles in this order.
+
+    >>> _divide(np.array([0.25, 0.25, 0.25, 0.25, 0, 0]), 1, 3)
+    (array([4, 5, 0, 1, 2, 3]), [3, 4, 6])
+    """
+    item_order = np.argsort(divider_values, kind="stable")
+    sorted_values = divider_values[item_order].tolist()
+    ends = []
     divided_items_count = 0
     divided_value = 0
-    for bundle_index in v.agents():
+    for bundle_index in range(num_of_bundles):
         bundle_value = 0
         item_index = divided_items_count
         while (
-            item_index < v.num_of_objects
-            and (bundle_value + v[0, item_order[item_index]]) * (v.num_of_agents - bundle_index) + divided_value
+            item_index < len(sorted_values)
+            and (bundle_value + sorted_values[item_index]) * (num_of_bundles - bundle_index) + divided_value
             <= total_value
         ):
-            bundle_value += v[0, item_order[item_index]]
+            bundle_value += sorted_values[item_index]
             item_index += 1
-
-        bundles.append(list(map(lambda t: item_order[t], range(divided_items_count, item_index))))
+        ends.append(item_index)
         divided_items_count = item_index
         divided_value += bundle_value
-    return bundles
+    return item_order, ends
 
 
 class Decomposition:
     """
     this class represents decomposition of problem into sub-problems
     sub-problem i is defined by pair (agents[i], bundles[i])
+
+    The bundle of sub-problem i contains the items in positions ends[i-1]..ends[i] of the divider's item order,
+    and values[i] is the array of values of all agents to this bundle.
     """
 
-    def __init__(self, values: ValuationMatrix):
-        self.v = values
-        self.total_value = values.verify_normalized()
+    def __init__(self, item_order: np.ndarray, total_values: np.ndarray, divider_total_values: np.ndarray):
+        """
+        :param item_order: the items, sorted by the divider.
+        :param total_values: total_values[a] is the total value of agent a to all items.
+        :param divider_total_values: the total values with which the sub-problem graph is built
+               (equal to total_values, up to the rounding errors of the divider's normalization).
+        """
+        self.item_order = item_order
+        self.total_values = total_values
+        self.divider_total_values = divider_total_values
         self.agents = []
-        self.bundles = []
+        self.ends = []
+        self.values = []
 
     def __repr__(self):
         return "\n".join(
@@ -134,6 +171,10 @@ class Decomposition:
             ]
         )
 
+    @property
+    def bundles(self) -> List[List[int]]:
+        return [self.item_order[start:end].tolist() for start, end in zip([0] + self.ends[:-1], self.ends)]
+
     def num_of_agents(self):
         """
         this method returns number of agents in decomposition
@@ -144,7 +185,7 @@ class Decomposition:
         """
         this method returns number of goods in decomposition
         """
-        return sum(map(len, self.bundles))
+        return self.ends[-1] if self.ends else 0
 
     def get_all_agents(self):
         """
@@ -156,100 +197,222 @@ class Decomposition:
         """
         this method returns list containing all items in decomposition
         """
-        return sum(self.bundles, [])
+        return self.item_order[: self.num_of_objects()].tolist()
 
-    def update(self, candidate, bundle):
+    def update(self, candidate: int, end: int, bundle_values: np.ndarray, prefix_values: np.ndarray):
         """
         UpdateDecomposition subroutine
 
-        bundle is S_t bundle
         candidate is agent k from the paper
+        the S_t bundle contains the items in positions num_of_objects()..end of the item order
+        bundle_values and prefix_values are the values of all agents to S_t, and to all items up to S_t (including)
         """
-        logger.info("Updating decomposition trying to add agent %d and bundle %s", candidate, str(bundle))
-
-        t = len(self.bundles) + 1
-
-        sub_problem_graph = nx.DiGraph()
-        sub_problem_graph.add_node(0, agents={candidate}, bundle=[])
-        for i in range(1, t):
-            sub_problem_graph.add_node(i, agents=self.agents[i - 1], bundle=self.bundles[i - 1])
-        sub_problem_graph.add_node(t, agents=set(), bundle=bundle)
-
-        sub_problem_agents = nx.get_node_attributes(sub_problem_graph, "agents")
-        sub_problem_bundle = nx.get_node_attributes(sub_problem_graph, "bundle")
-        for node_from in range(t):
-            for node_to in range(1, t + 1):
-                agent = next(
-                    filter(
-                        lambda a: self.v.agent_value_for_bundle(a, sub_problem_bundle[node_to]) * self.v.num_of_agents
-                        >= self.total_value * max(1, len(sub_problem_agents[node_to])),
-                        sub_problem_agents[node_from],
-                    ),
-                    None,
-                )
-
-                if agent is not None:
-                    sub_problem_graph.add_edge(node_from, node_to, agent=agent)
-
-        reachable = set()
-        for parent, child in nx.dfs_edges(sub_problem_graph, 0):
-            nx.set_node_attributes(sub_problem_graph, {child: parent}, "parent")
-            reachable.add(child)
-
-        parent = nx.get_node_attributes(sub_problem_graph, "parent")
-        edge_agent = nx.get_edge_attributes(sub_problem_graph, "agent")
-        if t in reachable:
+        start = self.num_of_objects()
+        logger.info("Updating decomposition trying to add agent %d and bundle %s", candidate, self.item_order[start:end].tolist())
+
+        num_of_all_agents = len(self.total_values)
+        t = len(self.agents) + 1
+
+        # The sub-problem graph: node 0 is the candidate, nodes 1..t-1 are the sub-problems, and node t is the new bundle.
+        # An edge node_from -> node_to means that some agent of node_from values the bundle of node_to at least
+        # 1/n of her total value times the number of agents in node_to (at least 1); edge_agent[node_from, node_to-1] is the first such agent.
+        node_agents = [[candidate]] + [list(agents) for agents in self.agents]
+        agents = np.fromiter(itertools.chain.from_iterable(node_agents), dtype=int)
+        node_values = np.column_stack(self.values + [bundle_values])[agents]
+        sizes = np.maximum([len(agents) for agents in self.agents] + [0], 1)
+        is_edge_agent = node_values * num_of_all_agents >= self.divider_total_values[agents, None] * sizes
+        rows = np.where(is_edge_agent, np.arange(len(agents))[:, None], len(agents))
+        first_rows = np.minimum.reduceat(rows, np.cumsum([0] + [len(a) for a in node_agents[:-1]]), axis=0)
+        edge_agent = np.where(first_rows < len(agents), np.append(agents, -1)[first_rows], -1)
+
+        # Depth-first search from the candidate's node, visiting the children of each node in increasing order;
+        # parent[node] is the node from which it was reached.
+        has_edge = edge_agent >= 0
+        parent = np.full(t + 1, -1)
+        reachable = np.zeros(t + 1, dtype=bool)
+        reachable[0] = True
+        stack = [0]
+        while stack:
+            new_children = has_edge[stack[-1]] & ~reachable[1:]
+            if new_children.any():
+                child = int(np.argmax(new_children)) + 1
+                reachable[child] = True
+                parent[child] = stack[-1]
+                if child < t:
+                    stack.append(child)
+            else:
+                stack.pop()
+
+        if reachable[t]:
             logger.info("Case 1: bundle's vertex is reachable from candidate's vertex in sub-problem graph")
 
             self.agents.append(set())
-            self.bundles.append(bundle)
-
-            node_to = t
-            node_from = parent[node_to]
-            while node_from != 0:
-                logger.info("Moving agent %d from sub-problem %d to sub-problem %d", node_from - 1, node_to - 1)
-                self.agents[node_from - 1].remove(edge_agent[(node_from, node_to)])
-                self.agents[node_to - 1].add(edge_agent[(node_from, node_to)])
-                node_to = node_from
-                node_from = parent[node_to]
+            self.ends.append(end)
+            self.values.append(bundle_values)
+            node_to = self._move_agents_along_path(t, parent, edge_agent)
 
             logger.info("Adding agent %d to sub-problem %d", candidate, node_to - 1)
             self.agents[node_to - 1].add(candidate)
             return
 
-        for node_to in reachable:
-            for agent in sub_problem_agents[node_to]:
-                if self.v.num_of_agents * self.v.agent_value_for_bundle(agent, self.get_all_items() + bundle) <= t:
-                    logger.info(
-                        "Case 2: agent's %d vertex is reachable from the candidate's in sub-problem graph"
-                        "and she prefers sharing last n-t bundles rather than first t",
-                        agent,
-                    )
-
-                    logger.info("Removing agent %d from decomposition", agent)
-                    self.agents[node_to - 1].remove(agent)
-
-                    node_from = parent[node_to]
-                    while node_from != 0:
-                        logger.info("Moving agent %d from sub-problem %d to sub-problem %d", node_from - 1, node_to - 1)
-                        self.agents[node_from - 1].remove(edge_agent[(node_from, node_to)])
-                        self.agents[node_to - 1].add(edge_agent[(node_from, node_to)])
-                        node_to = node_from
-                        node_from = parent[node_to]
-
-                    logger.info("Adding agent %d to sub-problem %d")
-                    self.agents[node_to - 1].add(candidate)
-                    return
+        reachable_nodes = [(node, agent) for node in np.flatnonzero(reachable[1:t]) + 1 for agent in self.agents[node - 1]]
+        reachable_agents = np.array([agent for _, agent in reachable_nodes], dtype=int)
+        prefers_last_bundles = num_of_all_agents * prefix_values[reachable_agents] <= t * self.total_values[reachable_agents]
+        if prefers_last_bundles.any():
+            (node_to, agent) = reachable_nodes[np.argmax(prefers_last_bundles)]
+            logger.info(
+                "Case 2: agent's %d vertex is reachable from the candidate's in sub-problem graph"
+                "and she prefers sharing last n-t bundles rather than first t",
+                agent,
+            )
+
+            logger.info("Removing agent %d from decomposition", agent)
+            self.agents[node_to - 1].remove(agent)
+            node_to = self._move_agents_along_path(node_to, parent, edge_agent)
+
+            logger.info("Adding agent %d to sub-problem %d", candidate, node_to - 1)
+            self.agents[node_to - 1].add(candidate)
+            return
 
         logger.info(
             "Case 3: bundle's t vertex is not reachable from candidate's and all reachable agents of decomposition "
             "prefer first %d bundles rather than last %d",
             t,
-            self.v.num_of_agents - t,
+            num_of_all_agents - t,
         )
         logger.info("Merging all sub-problems into one and adding candidate and bundle")
         self.agents = [self.get_all_agents().union({candidate})]
-        self.bundles = [self.get_all_items() + bundle]
+        self.ends = [end]
+        self.values = [prefix_values]
+
+    def _move_agents_along_path(self, node_to: int, parent: np.ndarray, edge_agent: np.ndarray) -> int:
+        """
+        Moves the agent of each edge on the path from the candidate's node to node_to, one sub-problem forward.
+        :return: the first sub-problem node on the path (the one that the candidate should join).
+        """
+        node_from = parent[node_to]
+        while node_from != 0:
+            agent = int(edge_agent[node_from, node_to - 1])
+            logger.info("Moving agent %d from sub-problem %d to sub-problem %d", agent, node_from - 1, node_to - 1)
+            self.agents[node_from - 1].remove(agent)
+            self.agents[node_to - 1].add(agent)
+            node_to = node_from
+            node_from = parent[node_to]
+        return node_to
+
+
+def _sub_problems(values: np.ndarray):
+    """
+    Runs the first stage of the algorithm on the given valuations (agents are rows, goods are columns),
+    and generates its sub-problems as triplets (agents, goods, sub_values), with agents and goods given by their indices.
+    sub_values is None if the sub-problem is already solved - its single agent gets all its goods
+    (or its agents get nothing, when there are no goods). Otherwise, it is the valuation matrix of the sub-problem, to be solved recursively.
+
+    Integer valuations are not normalized: every agent is compared with her own total value.
+    """
+    (agent_ids, item_ids) = (np.arange(values.shape[0]), np.arange(values.shape[1]))
+    while True:
+        if len(agent_ids) == 0 or len(item_ids) == 0:
+            if len(agent_ids) > 0:
+                yield agent_ids.tolist(), [], None
+            return
+
+        irrelevant = np.all(np.isclose(values, 0.0), axis=1)  # irrelevant agents - value everything at 0
+        if irrelevant.any():
+            for agent in agent_ids[irrelevant]:
+                yield [int(agent)], [], None
+            (values, agent_ids) = (values[~irrelevant], agent_ids[~irrelevant])
+            continue
+
+        num_of_agents = len(agent_ids)
+        if np.issubdtype(values.dtype, np.integer):
+            total_values = divider_total_values = values.sum(axis=1)
+        else:
+            values = values / values.sum(axis=1, keepdims=True)
+            total_values = np.ones(num_of_agents)
+            # The division and the decomposition compare with the total value of the divider, which may differ from 1 by rounding.
+            divider_total_values = np.full(num_of_agents, values.sum(axis=1)[0])
+        logger.info("Looking for PROPm allocation for %d agents and %d items", num_of_agents, len(item_ids))
+
+        large = values * num_of_agents > total_values[:, None]
+        if large.any():
+            (agent, item) = np.unravel_index(np.argmax(large), large.shape)
+            logger.info("Allocating item %d to agent %d as she values it more than 1/n", item_ids[item], agent_ids[agent])
+            yield [int(agent_ids[agent])], [int(item_ids[item])], None
+            values = np.delete(np.delete(values, agent, axis=0), item, axis=1)
+            (agent_ids, item_ids) = (np.delete(agent_ids, agent), np.delete(item_ids, item))
+            continue
+        break
+
+    (item_order, bundle_ends) = _divide(values[0], divider_total_values[0], num_of_agents)
+    logger.info("Divider divides items into bundles ending at positions %s of the order %s", bundle_ends, item_ids[item_order])
+
+    # bundle_values[a][t-1] is the value of agent a to bundle t, and prefix_values[a][t-1] is her value to the first t bundles.
+    # The values are summed from left to right (as in agent_value_for_bundle), so that exact ties are decided the same way.
+    sorted_values = values[:, item_order]
+    cumulative_values = np.zeros((num_of_agents, len(item_order) + 1), dtype=values.dtype)
+    np.cumsum(sorted_values, axis=1, out=cumulative_values[:, 1:])
+    prefix_values = cumulative_values[:, bundle_ends]
+    bundle_values = np.column_stack([
+        np.cumsum(sorted_values[:, start:end], axis=1)[:, -1] if end > start else np.zeros(num_of_agents, dtype=values.dtype)
+        for start, end in zip([0] + bundle_ends[:-1], bundle_ends)
+    ])
+
+    def agents_preferring_first_bundles(agents: set, t: int) -> np.ndarray:
+        """ the agents who prefer sharing the first t bundles rather than the last n-t """
+        agents = np.fromiter(agents, dtype=int, count=len(agents))
+        return agents[num_of_agents * prefix_values[agents, t - 1] > t * total_values[agents]]
+
+    remaining_agents = set(range(1, num_of_agents))
+    logger.info("Building decomposition:")
+    decomposition = Decomposition(item_order, total_values, divider_total_values)
+    for t in range(1, num_of_agents + 1):
+        candidates = agents_preferring_first_bundles(remaining_agents, t)
+        logger.info(
+            "There are %s remaining agents that prefer sharing first %s bundles rather than last %s: %s",
+            len(candidates),
+            t,
+            num_of_agents - t,
+            candidates,
+        )
+
+        while len(candidates) > 0 and decomposition.num_of_agents() < t:
+            logger.info("Current decomposition:\n %s", decomposition)
+            decomposition.update(int(candidates[0]), bundle_ends[t - 1], bundle_values[:, t - 1], prefix_values[:, t - 1])
+            remaining_agents = set(range(1, num_of_agents)).difference(decomposition.get_all_agents())
+            candidates = agents_preferring_first_bundles(remaining_agents, t)
+
+        if decomposition.num_of_agents() < t:
+            sub_problems = list(zip(decomposition.agents, decomposition.bundles))
+            sub_problems.append((remaining_agents, item_order[bundle_ends[t - 1] : bundle_ends[-1]].tolist()))
+            logger.info("Final decomposition:\n %s\n remaining agents %s get the last bundles", decomposition, remaining_agents)
+
+            logger.info("Allocating bundle %d to divider agent", t)
+            divider_bundle = item_order[decomposition.num_of_objects() : bundle_ends[t - 1]]
+            yield [int(agent_ids[0])], item_ids[divider_bundle].tolist(), None
+
+            for agents, bundle in sub_problems:
+                if len(agents) > 0:
+                    agents = sorted(agents)
+                    yield agent_ids[agents].tolist(), item_ids[bundle].tolist(), values[np.ix_(agents, bundle)]
+            return
+
+
+def decompose(v: ValuationMatrix) -> List[Tuple[List[int], List[int]]]:
+    """
+    Runs the first stage of the algorithm, and returns its sub-problems without solving them, for auditing.
+    Each sub-problem is a pair (agents, goods); a sub-problem with several agents is solved by the same algorithm,
+    and a PROPm allocation is obtained by combining the solutions of all sub-problems.
+
+    >>> decompose(ValuationMatrix([[0.25, 0.25, 0.25, 0.25, 0, 0], [0.25, 0, 0.26, 0, 0.25, 0.24], [0.25, 0, 0.24, 0, 0.25, 0.26]]))
+    [([0], [2, 3]), ([1, 2], [4, 5, 0, 1])]
+    >>> decompose(ValuationMatrix([[0, 0, 0, 0, 0, 0], [1, 2, 3, 4, 5, 6], [10, 20, 30, 40, 50, 60]]))
+    [([0], []), ([1], [0, 1, 2, 3]), ([2], [4, 5])]
+    >>> decompose(ValuationMatrix([[1, 5], [1, 1]]))   # agent 0 values good 1 more than 1/n
+    [([0], [1]), ([1], [0])]
+    """
+    values = np.asarray(v._v)
+    return [(agents, goods) for agents, goods, _ in _sub_problems(values)]
 
 
 def solve(agents) -> List[List[int]]:
@@ -278,91 +441,22 @@ def solve(agents) -> List[List[int]]:
     [[], [0, 1, 2, 3], [4, 5]]
     """
     v = ValuationMatrix(agents)
-    if v.num_of_agents == 0 or v.num_of_objects == 0:
-        return []
-
-    logger.info("Looking for PROPm allocation for %d agents and %d items", v.num_of_agents, v.num_of_objects)
-    logger.info("Solving a problem defined by valuation matrix:\n %s", v)
-
-    for agent in v.agents():
-        if np.allclose(v[agent], 0.0):  # irrelevant agent - values everything at 0
-            allocation = solve(v.without_agent(agent))
-            allocation.insert(agent, [])
-            return allocation
-
-    total_value = v.normalize()
-
-    logger.info("Normalized matrix:\n %s", v)
-
-    for agent in v.agents():
-        for item in v.objects():
-            if v[agent][item] * v.num_of_agents > total_value:
-                logger.info(
-                    "Allocating item %d to agent %d as she values it as %f > 1/n",
-                    item,
-                    agent,
-                    v[agent][item] / total_value,
-                )
-
-                allocation = solve(v.without_agent(agent).without_object(item))
-                insert_agent_into_allocation(agent, item, allocation)
-                return allocation
-
-    bundles = divide(v)
-    logger.info("Divider divides items into following bundles: %s", str(bundles))
-
-    remaining_agents = set(range(1, v.num_of_agents))
+    allocation = [[] for _ in v.agents()]
+    _solve_into(np.asarray(v._v), np.arange(v.num_of_agents), np.arange(v.num_of_objects), allocation)
+    return allocation
 
-    logger.info("Building decomposition:")
-    decomposition = Decomposition(v)
-    for t in range(1, v.num_of_agents + 1):
-        considered_items = sum(bundles[:t], [])
-
-        candidates = list(
-            filter(
-                lambda a: v.num_of_agents * v.agent_value_for_bundle(a, considered_items) > t * total_value,
-                remaining_agents,
-            )
-        )
-        logger.info(
-            "There are %s remaining agents that prefer sharing first %s bundles rather than last %s: %s",
-            len(candidates),
-            str(candidates),
-            t,
-            v.num_of_agents - t,
-        )
-
-        while len(candidates) > 0 and decomposition.num_of_agents() < t:
-            logger.info("Current decomposition:\n %s", str(decomposition))
-
-            decomposition.update(candidates[0], bundles[t - 1])
 
-            remaining_agents = set(range(1, v.num_of_agents)).difference(decomposition.get_all_agents())
-            candidates = list(
-                filter(
-                    lambda a: v.num_of_agents * v.agent_value_for_bundle(a, considered_items) > t * total_value,
-                    remaining_agents,
-                )
-            )
-
-        if decomposition.num_of_agents() < t:
-            decomposition.agents.append(remaining_agents)
-            decomposition.bundles.append(sum(bundles[t:], []))
-            logger.info("Final decomposition:\n %s", str(decomposition))
-
-            logger.info("Allocating bundle %d to divider agent", t)
-            allocation = list([[] for _ in range(v.num_of_agents)])
-            allocation[0] = bundles[t - 1]
-
-            for agents, bundle in zip(decomposition.agents, decomposition.bundles):
-                agents = list(sorted(agents))
-                sub_problem = v.submatrix(agents, bundle)
-                solution = solve(sub_problem)
-                for i, agent in enumerate(agents):
-                    for j in solution[i]:
-                        allocation[agent].append(bundle[j])
-
-            return allocation
+def _solve_into(values: np.ndarray, agent_ids: np.ndarray, item_ids: np.ndarray, allocation: List[List[int]]):
+    """
+    Solves the sub-problem with the given valuations, whose agents and goods have the given ids in the original problem,
+    and writes the bundles of its agents into the allocation.
+    """
+    for agents, goods, sub_values in _sub_problems(values):
+        if sub_values is None:
+            for agent in agents:
+                allocation[agent_ids[agent]] = item_ids[goods].tolist()
+        else:
+            _solve_into(sub_values, agent_ids[agents], item_ids[goods], allocation)
 
 
 propm_allocation.logger = logger
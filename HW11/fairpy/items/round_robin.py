@@ -8,13 +8,14 @@ Programmer: Erel Segal-Halevi
 Since:  2020-07
 """
 
-from fairpy.allocations import Allocation
+from fairpy.allocations import Allocation, _item_values
 import fairpy
+import numpy as np
 
 import logging
 logger = logging.getLogger(__name__)
 
-from typing import List, Any
+from typing import List, Any, Tuple
 
 
 def round_robin(agents, agent_order:List[int]=None, items:List[Any]=None) -> Allocation:
@@ -51,27 +52,168 @@ def round_robin(agents, agent_order:List[int]=None, items:List[Any]=None) -> All
     Agent #0 gets {1,2} with value 66.
     Agent #1 gets {0,3} with value 55.
     <BLANKLINE>
+    >>> ### A sparse valuation matrix is used as is, without creating an agent per row:
+    >>> round_robin(fairpy.SparseValuationMatrix([[0,22,44,0,0],[0,0,66,33,0]]))
+    Agent #0 gets {1,2,4} with value 66.
+    Agent #1 gets {0,3} with value 33.
+    <BLANKLINE>
     """
+    if isinstance(agents, fairpy.SparseValuationMatrix):
+        if agent_order is None: agent_order = agents.agents()
+        return round_robin_many(agents, [agent_order], items)[0]
     agents = fairpy.agents_from(agents)  # Handles various input formats
 
     if agent_order is None: agent_order = range(len(agents))
-    agent_order = list(agent_order)
+    return round_robin_many(agents, [agent_order], items)[0]
+
 
+def round_robin_many(agents, agent_orders:List[List[int]], items:List[Any]=None) -> List[Allocation]:
+    """
+    Runs round-robin on the same instance with each of the given agent-orders.
+    The preferences of the agents are sorted once, and reused for all orders.
+
+    >>> allocations = round_robin_many([[11,22,44,0],[22,11,66,33]], agent_orders=[[0,1],[1,0]])
+    >>> allocations[0]
+    Agent #0 gets {1,2} with value 66.
+    Agent #1 gets {0,3} with value 55.
+    <BLANKLINE>
+    >>> allocations[1]
+    Agent #0 gets {0,1} with value 33.
+    Agent #1 gets {2,3} with value 99.
+    <BLANKLINE>
+    """
+    if isinstance(agents, fairpy.SparseValuationMatrix):
+        items = list(agents.objects()) if items is None else list(items)
+        sparse_queues = _sparse_preference_queues(agents, items)
+        return [
+            _round_robin_with_sparse_preference_queues(agents, items, sparse_queues, list(agent_order))
+            for agent_order in agent_orders
+        ]
+    agents = fairpy.agents_from(agents)  # Handles various input formats
     if items is None: items = agents[0].all_items()
-    
-    remaining_items = list(items)
-    logger.info("\nRound Robin with agent-order %s and items %s", agent_order, remaining_items)
+    items = list(items)
+    values = _item_values(agents, items)
+    preference_queues = _preference_queues(values)
+    return [
+        _round_robin_with_preference_queues(agents, items, values, preference_queues, list(agent_order))
+        for agent_order in agent_orders
+    ]
+
+
+def _preference_queues(values:np.ndarray) -> List[List[int]]:
+    """
+    :return: for each agent, the list of item indices sorted from the best to the worst.
+        Items with equal values keep their original order, like `max` in the naive implementation.
+
+    >>> _preference_queues(np.array([[1,3,3,2],[5,4,3,2]]))
+    [[1, 2, 3, 0], [0, 1, 2, 3]]
+    """
+    return np.argsort(-values, axis=1, kind="stable").tolist()
+
+
+def _round_robin_with_preference_queues(agents:List[fairpy.Agent], items:List[Any], values:np.ndarray, preference_queues:List[List[int]], agent_order:List[int]) -> Allocation:
+    """
+    The round-robin protocol, where in each turn the agent takes the first item in its preference queue that is not taken yet.
+    Each agent keeps a pointer to its queue, so each item is skipped at most once by each agent.
+    """
+    logger.info("\nRound Robin with agent-order %s and items %s", agent_order, items)
+    taken = bytearray(len(items))
+    pointers = [0] * len(agents)
     allocations = [[] for _ in agents]
+    num_of_remaining_items = len(items)
     while True:
         for agent_index in agent_order:
-            if len(remaining_items)==0:
+            if num_of_remaining_items==0:
                 return Allocation(agents, allocations)
-            agent = agents[agent_index]
-            best_item_for_agent = max(remaining_items, key=agent.value)
-            best_item_value = agent.value(best_item_for_agent)
-            allocations[agent_index].append(best_item_for_agent)
-            logger.info("%s takes %s (value %d)", agent.name(), best_item_for_agent, best_item_value)
-            remaining_items.remove(best_item_for_agent)
+            queue = preference_queues[agent_index]
+            pointer = pointers[agent_index]
+            while taken[queue[pointer]]:
+                pointer += 1
+            best_item_index = queue[pointer]
+            taken[best_item_index] = 1
+            pointers[agent_index] = pointer + 1
+            num_of_remaining_items -= 1
+            allocations[agent_index].append(items[best_item_index])
+            logger.info("%s takes %s (value %d)", agents[agent_index].name(), items[best_item_index], values[agent_index, best_item_index])
+
+
+def _sparse_preference_queues(valuations:fairpy.SparseValuationMatrix, items:List[int]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Sorts the non-zero values of all agents at once, without creating a dense matrix.
+    :param items: the objects (column indices) to allocate; positions in this list break ties, as in _preference_queues.
+    :return: a tuple (positions, boundaries, positive_ends):
+        positions[boundaries[i]:boundaries[i+1]] are the positions (in items) of the objects with non-zero value to agent i,
+        sorted from the best to the worst; the first positive_ends[i]-boundaries[i] of them have a positive value.
+
+    >>> (positions, boundaries, positive_ends) = _sparse_preference_queues(fairpy.SparseValuationMatrix([[0,5,-1,5],[2,0,0,0]]), [3,2,1,0])
+    >>> positions.tolist(), boundaries.tolist(), positive_ends.tolist()
+    ([0, 2, 1, 3], [0, 3, 4], [2, 4])
+    """
+    matrix = valuations._v
+    position_of_object = np.full(valuations.num_of_objects, -1)
+    position_of_object[np.asarray(items, dtype=int)] = np.arange(len(items))
+    rows = np.repeat(np.arange(valuations.num_of_agents), np.diff(matrix.indptr))
+    positions = position_of_object[matrix.indices]
+    values = matrix.data
+    relevant = (positions >= 0) & (values != 0)
+    (rows, positions, values) = (rows[relevant], positions[relevant], values[relevant])
+    order = np.lexsort((positions, -values, rows))
+    boundaries = np.searchsorted(rows[order], np.arange(valuations.num_of_agents+1))
+    positive_ends = boundaries[:-1] + np.bincount(rows[values > 0], minlength=valuations.num_of_agents)
+    return (positions[order], boundaries, positive_ends)
+
+
+def _round_robin_with_sparse_preference_queues(valuations:fairpy.SparseValuationMatrix, items:List[int], sparse_queues:Tuple[np.ndarray, np.ndarray, np.ndarray], agent_order:List[int]) -> Allocation:
+    """
+    The round-robin protocol on a sparse valuation matrix. Each agent picks from its positive objects (best first),
+    then from the objects it values at zero (in the order of items), then from its negative objects (best first) ---
+    the same order as the dense _preference_queues. The next untaken zero-valued object is found through a
+    "next free position" array with path compression, so the zero values are never stored.
+    """
+    logger.info("\nRound Robin with agent-order %s on a sparse valuation matrix", agent_order)
+    (positions, boundaries, positive_ends) = sparse_queues
+    num_of_items = len(items)
+    taken = bytearray(num_of_items)
+    next_free = list(range(num_of_items+1))   # next_free[p] leads to the first untaken position >= p
+
+    def first_free(position:int) -> int:
+        root = position
+        while next_free[root] != root:
+            root = next_free[root]
+        while next_free[position] != root:
+            (next_free[position], position) = (root, next_free[position])
+        return root
+
+    def preference_queue(agent:int):
+        for index in range(boundaries[agent], positive_ends[agent]):
+            yield int(positions[index])
+        nonzero_positions = set(positions[boundaries[agent]:boundaries[agent+1]].tolist())
+        position = first_free(0)
+        while position < num_of_items:
+            if position not in nonzero_positions:
+                yield position
+            position = first_free(position+1)
+        for index in range(positive_ends[agent], boundaries[agent+1]):
+            yield int(positions[index])
+
+    queues = {}
+    allocations = [[] for _ in valuations.agents()]
+    num_of_remaining_items = num_of_items
+    while True:
+        for agent_index in agent_order:
+            if num_of_remaining_items==0:
+                return Allocation(valuations, allocations)
+            if agent_index not in queues:
+                queues[agent_index] = preference_queue(agent_index)
+            queue = queues[agent_index]
+            best_item_index = next(queue)
+            while taken[best_item_index]:
+                best_item_index = next(queue)
+            taken[best_item_index] = 1
+            next_free[best_item_index] = best_item_index+1
+            num_of_remaining_items -= 1
+            allocations[agent_index].append(items[best_item_index])
+            logger.info("Agent #%d takes %s", agent_index, items[best_item_index])
 
 
 round_robin.logger = logger
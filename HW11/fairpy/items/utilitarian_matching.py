@@ -15,10 +15,13 @@ Since : 2021-04
 """
 
 import networkx
+import numpy as np
+from scipy.optimize import linear_sum_assignment
 from typing import *
 from dicttools import stringify
 from collections import defaultdict
 import fairpy
+from fairpy import ValuationMatrix
 from fairpy.allocations import Allocation
 
 import logging
@@ -142,14 +145,146 @@ def matching_to_allocation(matching: list, agent_names:list)->Dict[str,str]:
 
 
 
+def instance_to_edges(agents: AgentsDict, agent_weights: Dict[str, int]=None)->Tuple[list, list, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Converts agents' preferences to the edges of a bipartite graph, given as arrays.
+    :param agents: maps each agent to a map from an item's name to its value for the agent; or a ValuationMatrix / numpy array / list of lists.
+    :param agent_weights [optional]: maps each agent to a weight. The values of each agent are multiplied by the agent's weight.
+    :return: (agent_names, items, agent_of_edge, item_of_edge, weight_of_edge), where agent_of_edge and item_of_edge are indices into agent_names and items.
+
+    >>> (agent_names, items, agent_of_edge, item_of_edge, weight_of_edge) = instance_to_edges({"avi": {"x":5, "y": 4}, "beni": {"y":3}}, agent_weights={"beni":10})
+    >>> agent_names, items, agent_of_edge.tolist(), item_of_edge.tolist(), weight_of_edge.tolist()
+    (['avi', 'beni'], ['x', 'y'], [0, 0, 1], [0, 1, 1], [5, 4, 30])
+    >>> instance_to_edges(ValuationMatrix([[5,4],[2,3]]))[4].tolist()
+    [5, 4, 2, 3]
+    """
+    if isinstance(agents, (ValuationMatrix, np.ndarray)) or (isinstance(agents, list) and len(agents)>0 and isinstance(agents[0], list)):
+        values = np.asarray(ValuationMatrix(agents)._v if not isinstance(agents, ValuationMatrix) else agents._v)
+        agent_names = fairpy.agent_names_from(ValuationMatrix(values) if not isinstance(agents, ValuationMatrix) else agents)
+        items = list(range(values.shape[1]))
+        (agent_of_edge, item_of_edge) = np.divmod(np.arange(values.size), values.shape[1])
+        weight_of_edge = values.ravel()
+    else:
+        agents_list = fairpy.agents_from(agents)
+        agent_names = [agent.name() for agent in agents_list]
+        item_index = {}
+        agent_of_edge, item_of_edge, weight_of_edge = [], [], []
+        for i_agent, agent in enumerate(agents_list):
+            for item in agent.all_items():
+                if item not in item_index:
+                    item_index[item] = len(item_index)
+                agent_of_edge.append(i_agent)
+                item_of_edge.append(item_index[item])
+                weight_of_edge.append(agent.value(item))
+        items = list(item_index.keys())
+        (agent_of_edge, item_of_edge, weight_of_edge) = (np.array(agent_of_edge, dtype=int), np.array(item_of_edge, dtype=int), np.array(weight_of_edge))
+    if agent_weights is not None:
+        weight_of_edge = weight_of_edge * np.array([agent_weights.get(name,1) for name in agent_names])[agent_of_edge]
+    return (agent_names, items, agent_of_edge, item_of_edge, weight_of_edge)
+
+
+def maximum_weight_matching(agents: AgentsDict, agent_weights: Dict[str, int]=None, item_capacities: Dict[str,int]=None, agent_capacities: Dict[str,int]=None, maxcardinality=True)->Dict[str,list]:
+    """
+    Finds a maximum-weight one-to-many matching of agents to item-units, without creating a node per unit:
+    when all capacities are 1, it solves an assignment problem (scipy's linear_sum_assignment) on the agents x items weight matrix;
+    otherwise, it solves a min-cost-flow problem in the network source -> agents -> items -> sink,
+    in which the capacities are on the edges (an agent may get several units of the same item, as long as its capacity allows).
+    The parameters are as in utilitarian_matching.
+    :return a dict, mapping an agent to its bundle (a sorted list of items, with an item repeated for each unit).
+
+    >>> prefs = {"avi": {"x":5, "y": 4}, "beni": {"x":2, "y":3}, "gadi": {"x":3, "y":2}}
+    >>> dict(maximum_weight_matching(prefs))
+    {'avi': ['x'], 'beni': ['y']}
+    >>> dict(maximum_weight_matching(prefs, item_capacities={"x":1, "y":2}, agent_capacities={"avi":2, "beni":1, "gadi":1}))
+    {'avi': ['x', 'y'], 'beni': ['y']}
+    >>> dict(maximum_weight_matching({"avi": {"x":1, "y":2}}, item_capacities={"x":1, "y":2}, agent_capacities={"avi":2}))    # two units of the same item
+    {'avi': ['y', 'y']}
+    """
+    (agent_names, items, agent_of_edge, item_of_edge, weight_of_edge) = instance_to_edges(agents, agent_weights)
+    agent_capacity = np.array([1 if agent_capacities is None else agent_capacities.get(name,0) for name in agent_names], dtype=int)
+    item_capacity = np.array([1 if item_capacities is None else item_capacities.get(item,0) for item in items], dtype=int)
+
+    # Remove edges that cannot be used, and edges that never increase the weight when the cardinality need not be maximum:
+    usable = (agent_capacity[agent_of_edge] > 0) & (item_capacity[item_of_edge] > 0)
+    if not maxcardinality:
+        usable &= weight_of_edge > 0
+    (agent_of_edge, item_of_edge, weight_of_edge) = (agent_of_edge[usable], item_of_edge[usable], weight_of_edge[usable])
+
+    if np.all(agent_capacity <= 1) and np.all(item_capacity <= 1):
+        flow_of_edge = _assignment(len(agent_names), len(items), agent_of_edge, item_of_edge, weight_of_edge, maxcardinality)
+    else:
+        flow_of_edge = _min_cost_flow(agent_capacity, item_capacity, agent_of_edge, item_of_edge, weight_of_edge, maxcardinality)
+    logger.info("Matched %d units along %d edges", flow_of_edge.sum(), np.count_nonzero(flow_of_edge))
+
+    map_agent_to_bundle = defaultdict(list)
+    for edge in np.flatnonzero(flow_of_edge):
+        map_agent_to_bundle[agent_names[agent_of_edge[edge]]] += [items[item_of_edge[edge]]] * int(flow_of_edge[edge])
+    for bundle in map_agent_to_bundle.values():
+        bundle.sort()
+    return map_agent_to_bundle
+
+
+def _assignment(num_of_agents:int, num_of_items:int, agent_of_edge:np.ndarray, item_of_edge:np.ndarray, weight_of_edge:np.ndarray, maxcardinality:bool)->np.ndarray:
+    """
+    Solves the unit-capacity case by linear_sum_assignment; pairs that are not edges are dropped from the assignment.
+    If maxcardinality is True, these pairs get a penalty larger than the total weight of all edges,
+    so the assignment first maximizes the number of matched edges, and then their weight.
+    Otherwise, they cost 0 (all edges have positive weights in this case, so this maximizes the weight).
+    :return: the flow (0 or 1) on each edge.
+    """
+    if len(weight_of_edge) == 0:
+        return np.zeros(0, dtype=int)
+    penalty = 2 * np.abs(weight_of_edge).sum() + 1 if maxcardinality else 0
+    costs = np.full([num_of_agents, num_of_items], penalty, dtype=float)
+    costs[agent_of_edge, item_of_edge] = -weight_of_edge
+    edge_of_pair = np.full([num_of_agents, num_of_items], -1)
+    edge_of_pair[agent_of_edge, item_of_edge] = np.arange(len(weight_of_edge))
+    (rows, columns) = linear_sum_assignment(costs)
+    flow_of_edge = np.zeros(len(weight_of_edge), dtype=int)
+    matched_edges = edge_of_pair[rows, columns]
+    flow_of_edge[matched_edges[matched_edges >= 0]] = 1
+    return flow_of_edge
+
+
+def _min_cost_flow(agent_capacity:np.ndarray, item_capacity:np.ndarray, agent_of_edge:np.ndarray, item_of_edge:np.ndarray, weight_of_edge:np.ndarray, maxcardinality:bool)->np.ndarray:
+    """
+    Solves the general case by a min-cost maximum flow from the agents to the items.
+    When the cardinality need not be maximum, each agent also has an edge of cost 0 directly to the sink ("gets nothing"),
+    so the maximum flow is always the sum of agent capacities, and the minimum cost is the maximum weight.
+    The network simplex algorithm is exact only for integer costs, so non-integer weights are scaled and rounded to 9 significant digits.
+    :return: the flow on each edge.
+    """
+    costs = -weight_of_edge
+    if not np.all(np.mod(costs, 1) == 0):
+        scale = 10**9 / max(np.abs(costs).max(), 1e-300)
+        costs = np.round(costs * scale)
+    costs = costs.astype(np.int64).tolist()
+    network = networkx.DiGraph()
+    network.add_nodes_from(["source", "sink"])
+    for agent, capacity in enumerate(agent_capacity.tolist()):
+        network.add_edge("source", ("agent",agent), capacity=capacity, weight=0)
+        if not maxcardinality:
+            network.add_edge(("agent",agent), "sink", capacity=capacity, weight=0)
+    for item, capacity in enumerate(item_capacity.tolist()):
+        network.add_edge(("item",item), "sink", capacity=capacity, weight=0)
+    for agent, item, cost in zip(agent_of_edge.tolist(), item_of_edge.tolist(), costs):
+        network.add_edge(("agent",agent), ("item",item), capacity=int(min(agent_capacity[agent], item_capacity[item])), weight=cost)
+    flow = networkx.max_flow_min_cost(network, "source", "sink")
+    return np.array([flow[("agent",agent)][("item",item)] for agent,item in zip(agent_of_edge.tolist(), item_of_edge.tolist())], dtype=int)
+
+
+
 def utilitarian_matching(agents: AgentsDict, agent_weights: Dict[str, int]=None, item_capacities: Dict[str,int]=None, agent_capacities: Dict[str,int]=None, maxcardinality=True):
     """
     Finds a maximum-weight matching with the given preferences, agent_weights and capacities.
     :param agents: maps each agent to a map from an item's name to its value for the agent.
     :param agent_weights [optional]: maps each agent to an integer priority. The weights of each agent are multiplied by WEIGHT_BASE^priority.
     :param item_capacities [optional]: maps each item to its number of units. Default is 1.
+    :param agent_capacities [optional]: maps each agent to the number of item-units it may get. Default is 1.
     :param maxcardinality: True to require maximum weight subject to maximum cardinality. False to require only maximum weight.
 
+    The matching is computed by maximum_weight_matching, so the running time does not grow with the square of the capacities.
+
     >>> prefs = {"avi": {"x":5, "y": 4}, "beni": {"x":2, "y":3}}
     >>> alloc = utilitarian_matching(prefs)
     >>> stringify(alloc.map_agent_to_bundle())
@@ -178,19 +313,20 @@ def utilitarian_matching(agents: AgentsDict, agent_weights: Dict[str, int]=None,
     >>> stringify(alloc.map_agent_to_bundle())
     "{avi:['x', 'y'], beni:['y'], gadi:['x']}"
 
-    >>> prefs = [[5,4],[3,2]]
+    >>> prefs = [[5,4],[3,2]]    # a tie: both matchings have value 7
     >>> alloc = utilitarian_matching(prefs)
     >>> stringify(alloc.map_agent_to_bundle())
-    '{Agent #0:[1], Agent #1:[0]}'
+    '{Agent #0:[0], Agent #1:[1]}'
     >>> stringify(alloc.map_item_to_agents())
-    "{0:['Agent #1'], 1:['Agent #0']}"
+    "{0:['Agent #0'], 1:['Agent #1']}"
+    >>> utilitarian_matching(ValuationMatrix([[5,4,1],[2,3,1]]), item_capacities={0:1, 1:1, 2:100}, agent_capacities={"Agent #0":2, "Agent #1":2})   # an agent may get several units of the same item
+    Agent #0 gets {0,1} with value 9.
+    Agent #1 gets {2,2} with value 2.
+    <BLANKLINE>
     """
-    graph = instance_to_graph(agents, agent_weights=agent_weights, item_capacities=item_capacities, agent_capacities=agent_capacities)
-    logger.info("Graph edges: %s", list(graph.edges.data()))
-    matching = networkx.max_weight_matching(graph, maxcardinality=maxcardinality)
-    logger.info("Matching: %s", matching)
-    agent_names = fairpy.agent_names_from(agents)
-    map_agent_to_bundle = matching_to_allocation(matching, agent_names=agent_names)
+    map_agent_to_bundle = maximum_weight_matching(agents, agent_weights=agent_weights, item_capacities=item_capacities, agent_capacities=agent_capacities, maxcardinality=maxcardinality)
+    if isinstance(agents, np.ndarray):
+        agents = ValuationMatrix(agents)
     return Allocation(agents, map_agent_to_bundle)
 
 
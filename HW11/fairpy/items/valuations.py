@@ -20,7 +20,7 @@ import numpy as np
 
 from dicttools import stringify
 
-import math, itertools
+import math, itertools, json, os, sys, zipfile
 from fractions import Fraction
 
 from fairpy.bundles import FractionalBundle
@@ -29,8 +29,6 @@ from typing import *
 Item = Any
 Bundle = Set[Item]
 
-import prtpy
-from more_itertools import set_partitions
 
 
 class Valuation(ABC):
@@ -46,6 +44,7 @@ class Valuation(ABC):
         self.desired_items_list = sorted(desired_items)
         self.desired_items = set(desired_items)
         self.total_value_cache = self.value(self.desired_items)
+        self._mms_cache = {}    # maps (c, frozenset of items) to the result of a 1-out-of-c MMS computation on these items
 
     @abstractmethod
     def value(self, bundle:Bundle)->float:
@@ -138,11 +137,14 @@ class Valuation(ABC):
         """
         if c > len(self.desired_items):
             return 0
-        else:
-            return max(
+        key = (c, frozenset(self.desired_items))
+        if key not in self._mms_cache:
+            from more_itertools import set_partitions
+            self._mms_cache[key] = max(
                 min([self.value(bundle) for bundle in partition])
                 for partition in set_partitions(self.desired_items_list, c)
             )
+        return self._mms_cache[key]
 
     def value_proportional_except_c(self, num_of_agents:int, c:int):
         """
@@ -247,6 +249,14 @@ class MonotoneValuation(Valuation):
     True
     >>> a.is_EFx({"x"}, [{"y"}])
     True
+
+    When the values of all subsets of the desired items are specified, the MMS and the EFc/EFx checks
+    are computed from a table indexed by bitmasks of these items:
+    >>> b = MonotoneValuation({bundle: len(bundle)**2 for c in range(5) for bundle in itertools.combinations("abcd", c)})
+    >>> b.value_1_of_c_MMS(c=2), b.value_1_of_c_MMS(c=3), b.value_1_of_c_MMS(c=4)
+    (4, 1, 1)
+    >>> b.value_except_best_c_goods(set("abcd"), c=2), b.value_except_worst_c_goods(set("abc"), c=1)
+    (4, 4)
     """
     def __init__(self, map_bundle_to_value:Dict[Bundle,float]):
         """
@@ -257,6 +267,9 @@ class MonotoneValuation(Valuation):
         self.map_bundle_to_value[frozenset()] = 0   # normalization: the value of the empty bundle is always 0
         desired_items = max(map_bundle_to_value.keys(), key=lambda k:map_bundle_to_value[k])
         super().__init__(desired_items)
+        self.bit_of_item = {item: 1<<i for i,item in enumerate(self.desired_items_list)}
+        self._except_best_tables = {}    # maps c to the table of value_except_best_c_goods
+        self._except_worst_tables = {}   # maps c to the table of value_except_worst_c_goods
 
     def value(self, bundle:Bundle)->int:
         """
@@ -268,6 +281,77 @@ class MonotoneValuation(Valuation):
         else:
             raise ValueError(f"The value of {bundle} is not specified in the valuation function")
 
+    def value_table(self)->np.ndarray:
+        """
+        :return: an array of size 2^m, where m is the number of desired items, whose entry at index mask
+                 is the value of the bundle {desired_items_list[i] : bit i of mask is set};
+                 or None if the value of some such bundle is not specified.
+
+        >>> MonotoneValuation({"x": 1, "y": 2, "xy": 4}).value_table().tolist()
+        [0, 1, 2, 4]
+        >>> print(MonotoneValuation({"x": 1, "xy": 4}).value_table())
+        None
+        """
+        if not hasattr(self, "_value_table"):
+            bundles = [frozenset()]
+            for item in self.desired_items_list:
+                bundles += [bundle | {item} for bundle in bundles]
+            if all(bundle in self.map_bundle_to_value for bundle in bundles):
+                self._value_table = np.array([self.map_bundle_to_value[bundle] for bundle in bundles])
+            else:
+                self._value_table = None
+        return self._value_table
+
+    def _mask(self, bundle:Bundle)->int:
+        """
+        :return: the bitmask of the given bundle in value_table(), or None if it contains undesired items.
+        """
+        mask = 0
+        for item in bundle:
+            if item not in self.bit_of_item:
+                return None
+            mask |= self.bit_of_item[item]
+        return mask
+
+    def value_except_best_c_goods(self, bundle:Bundle, c:int=1)->int:
+        """
+        >>> a = MonotoneValuation({"x": 1, "y": 2, "xy": 4})
+        >>> a.value_except_best_c_goods(set("xy"), c=1), a.value_except_best_c_goods(set("xy"), c=2)
+        (1, 0)
+        """
+        mask = self._mask(bundle)
+        if mask is None or self.value_table() is None:
+            return super().value_except_best_c_goods(bundle, c)
+        return _value_except_c_goods_table(self.value_table(), len(self.desired_items_list), c, np.minimum, self._except_best_tables)[mask].item()
+
+    def value_except_worst_c_goods(self, bundle:Bundle, c:int=1)->int:
+        """
+        >>> a = MonotoneValuation({"x": 1, "y": 2, "xy": 4})
+        >>> a.value_except_worst_c_goods(set("xy"), c=1), a.value_except_worst_c_goods(set("y"), c=1)
+        (2, 0)
+        """
+        mask = self._mask(bundle)
+        if mask is None or self.value_table() is None:
+            return super().value_except_worst_c_goods(bundle, c)
+        return _value_except_c_goods_table(self.value_table(), len(self.desired_items_list), c, np.maximum, self._except_worst_tables)[mask].item()
+
+    def value_1_of_c_MMS(self, c:int=1)->int:
+        """
+        Calculates the value of the 1-out-of-c maximin-share by a dynamic program over subsets of the desired items,
+        in time O(c * 3^m). Falls back to enumerating partitions if the value table is incomplete.
+
+        >>> a = MonotoneValuation({"x": 1, "y": 2, "xy": 4})
+        >>> a.value_1_of_c_MMS(c=1), a.value_1_of_c_MMS(c=2), a.value_1_of_c_MMS(c=3)
+        (4, 1, 0)
+        """
+        values = self.value_table()
+        if c > len(self.desired_items) or values is None:
+            return super().value_1_of_c_MMS(c)
+        key = (c, frozenset(self.desired_items))
+        if key not in self._mms_cache:
+            self._mms_cache[key] = _maximin_value_of_subsets(values, len(self.desired_items_list), c)
+        return self._mms_cache[key]
+
     def __repr__(self):
         return f"Monotone valuation on {sorted(self.desired_items)}."
 
@@ -410,6 +494,41 @@ class AdditiveValuation(Valuation):
     def all_items(self):
         return self._all_items
 
+    def value_vector(self, items:List[Item]=None)->np.ndarray:
+        """
+        Returns a 1-dimensional array with the values of the given items, in the given order.
+        :param items: a list of items; default is all items, in the order of the input dict/list.
+
+        >>> AdditiveValuation({"x": 1, "y": 2, "z": 4}).value_vector()
+        array([1, 2, 4])
+        >>> AdditiveValuation({"x": 1, "y": 2, "z": 4}).value_vector(["z","x"])
+        array([4, 1])
+        >>> AdditiveValuation([11,22,44]).value_vector()
+        array([11, 22, 44])
+        """
+        if items is None:
+            if isinstance(self.map_good_to_value, dict):
+                return np.array(list(self.map_good_to_value.values()))
+            return np.asarray(self.map_good_to_value)
+        return np.array([self.map_good_to_value[g] for g in items])
+
+    def bundle_values(self, allocation)->np.ndarray:
+        """
+        Calculates the agent's value for every bundle of the given allocation, in a single matrix-vector product.
+        :param allocation: either a 1-dimensional array that maps each item to the index of its bundle (negative = unallocated),
+           or a 2-dimensional (bundles x items) 0/1 or fractional matrix.
+           The items are ordered as in value_vector().
+        :return: a 1-dimensional array in which element j is the agent's value for bundle j.
+
+        >>> a = AdditiveValuation({"x": 1, "y": 2, "z": 4})
+        >>> a.bundle_values([1,0,1])
+        array([2., 5.])
+        >>> a.bundle_values([[1,0,1],[0,0.5,0]])
+        array([5., 1.])
+        """
+        values = self.value_vector()
+        return allocation_to_matrix(allocation, len(values)) @ values
+
     def value_except_best_c_goods(self, bundle:Bundle, c:int=1)->int:
         """
         Calculates the value of the given bundle when the "best" (at most) c goods are removed from it.
@@ -501,14 +620,7 @@ class AdditiveValuation(Valuation):
         [['a', 'b', 'c'], ['d'], ['e'], ['f']]
         >>> mms_part = valuation.partition_1_of_c_MMS(4,['a','b','c']) # just verify that there is no exception
         """
-        partition = prtpy.partition(
-            algorithm=prtpy.partitioning.integer_programming,
-            numbins=c,
-            items=items,
-            valueof=lambda item: self.value(item),
-            objective=prtpy.obj.MaximizeSmallestSum,
-            outputtype=prtpy.out.Partition
-        )
+        (partition, _) = self._maximin_partition(c, items)
         return [set(x) for x in partition]
 
 
@@ -519,18 +631,24 @@ class AdditiveValuation(Valuation):
         >>> a = AdditiveValuation({"x": 1, "y": 2, "z": 4, "w":0})
         >>> a.value_1_of_c_MMS(c=2)
         3.0
+        >>> a.value_1_of_c_MMS(c=2)     # the second call is answered from the cache
+        3.0
         """
         if c > len(self.desired_items):
             return 0
         else:
-            return prtpy.partition(
-                algorithm=prtpy.partitioning.integer_programming,
-                numbins=c,
-                items=self.desired_items,
-                valueof=lambda item: self.value(item),
-                objective=prtpy.obj.MaximizeSmallestSum,
-                outputtype=prtpy.out.SmallestSum
-            )
+            (_, value) = self._maximin_partition(c, self.desired_items)
+            return value
+
+    def _maximin_partition(self, c:int, items:Bundle) -> Tuple[List[Bundle], float]:
+        """
+        A partition of the given items into c bundles that maximizes the smallest value, and that value.
+        Each valuation caches the results by c and the set of items.
+        """
+        key = (c, frozenset(items))
+        if key not in self._mms_cache:
+            self._mms_cache[key] = maximin_partition(c, list(items), valueof=lambda item: self.value(item))
+        return self._mms_cache[key]
 
 
 
@@ -615,6 +733,457 @@ class BinaryValuation(Valuation):
         return f"Binary valuation who wants {sorted(self.desired_items)}."
 
 
+class BinaryValuationBitsets:
+    """
+    The desired items of many agents with binary valuations, stored as a matrix of packed bits over a common index of items:
+    bit j of row i is set iff agent i desires items[j]. Each row takes num_of_items/8 bytes,
+    instead of a Python set of desired items per agent.
+
+    >>> bitsets = BinaryValuationBitsets([[1,0,1],[0,1,1]], items=["x","y","z"])
+    >>> bitsets.num_of_agents, bitsets.num_of_items
+    (2, 3)
+    >>> bitsets.values([{"x","z"}, {"y"}, set()]).tolist()
+    [[2, 0, 0], [1, 1, 0]]
+    >>> [valuation.value({"x","y"}) for valuation in bitsets.valuations()]
+    [1, 1]
+    >>> BinaryValuationBitsets.from_bundles([{"x"}, {"y","z"}]).valuations()[1]
+    Binary valuation who wants ['y', 'z'].
+    """
+
+    def __init__(self, matrix, items:List[Item]=None):
+        """
+        :param matrix: a 0/1 matrix (a list of lists or a numpy array) with a row for each agent and a column for each item.
+        :param items [optional]: the item of each column. Default: 0, 1, 2, ...
+        """
+        matrix = np.asarray(matrix) != 0
+        if matrix.ndim != 2:
+            raise ValueError(f"Expected a 2-dimensional 0/1 matrix, but got shape {matrix.shape}")
+        self.items = list(range(matrix.shape[1])) if items is None else list(items)
+        if len(self.items) != matrix.shape[1]:
+            raise ValueError(f"There are {matrix.shape[1]} columns but {len(self.items)} items")
+        self.item_index = {item:j for j,item in enumerate(self.items)}
+        self.bits = _pack_bits(matrix)
+
+    @staticmethod
+    def from_bundles(desired_bundles:List[Bundle], items:List[Item]=None)->'BinaryValuationBitsets':
+        """
+        :param desired_bundles: the set of desired items of each agent.
+        :param items [optional]: the index of items. Default: all desired items, sorted.
+        """
+        if items is None:
+            items = sorted(set().union(*desired_bundles))
+        bitsets = BinaryValuationBitsets(np.zeros((0, len(items)), dtype=bool), items)
+        bitsets.bits = np.vstack([bitsets.pack(bundle) for bundle in desired_bundles] or [bitsets.bits])
+        return bitsets
+
+    @property
+    def num_of_agents(self)->int:
+        return self.bits.shape[0]
+
+    @property
+    def num_of_items(self)->int:
+        return len(self.items)
+
+    def positions(self, bundle:Bundle)->List[int]:
+        """
+        :return: the column of each item of the given bundle. Items outside the index are ignored.
+
+        >>> BinaryValuationBitsets([[1,1,1]], items="xyz").positions(["z","w","x"])
+        [2, 0]
+        """
+        return [j for j in map(self.item_index.get, bundle) if j is not None]
+
+    def pack(self, bundle:Bundle)->np.ndarray:
+        """
+        :return: the packed bits of the given bundle. Items outside the index are ignored.
+
+        >>> BinaryValuationBitsets([[1,1,1]], items="xyz").pack({"x","z","w"})
+        array([5], dtype=uint64)
+        """
+        row = np.zeros((1, self.num_of_items), dtype=bool)
+        row[0, self.positions(bundle)] = True
+        return _pack_bits(row)[0]
+
+    def values(self, bundles:List[Bundle], chunk_size:int=1<<22)->np.ndarray:
+        """
+        Computes the value of every agent to every bundle, by intersecting the packed bits and counting the set bits.
+        :param bundles: a list of k bundles (e.g. the bundles of an allocation).
+        :param chunk_size: the maximum number of 64-bit words intersected at once; bounds the memory used.
+        :return: an integer matrix with a row for each agent and a column for each bundle.
+        """
+        packed = np.array([self.pack(bundle) for bundle in bundles], dtype=np.uint64).reshape(len(bundles), self.bits.shape[1])
+        result = np.zeros((self.num_of_agents, len(bundles)), dtype=np.int64)
+        rows_per_chunk = max(1, chunk_size // max(1, packed.size))
+        for start in range(0, self.num_of_agents, rows_per_chunk):
+            rows = self.bits[start:start+rows_per_chunk]
+            result[start:start+rows_per_chunk] = _popcount(rows[:, np.newaxis, :] & packed[np.newaxis, :, :]).sum(axis=2)
+        return result
+
+    def valuations(self)->List['BitsetBinaryValuation']:
+        """
+        :return: a binary valuation for each row. The valuations share the packed bits of this object.
+        """
+        return [BitsetBinaryValuation(self, row) for row in range(self.num_of_agents)]
+
+
+class BitsetBinaryValuation(BinaryValuation):
+    """
+    A binary valuation stored as one row of a BinaryValuationBitsets object.
+    The desired items are not kept as Python containers; desired_items and desired_items_list are computed on demand.
+
+    >>> a = BinaryValuationBitsets([[1,0,1,1]], items=["w","x","y","z"]).valuations()[0]
+    >>> a
+    Binary valuation who wants ['w', 'y', 'z'].
+    >>> a.value({"x","y","z"}), a.value("y"), a.value({"v"}), a.total_value()
+    (2, 1, 0, 3)
+    >>> a.is_EF1({"x","w"},[{"y","z"}]), a.value_1_of_c_MMS(c=2)
+    (True, 1)
+
+    Performance note: a bundle given as a collection of items must first be translated to bit positions,
+    which costs one dictionary lookup per item - as much as the set intersection of BinaryValuation.value.
+    With 2000 agents and 3000 items, value(bundle) takes about 1.15-1.4 times as long as BinaryValuation.value
+    for bundles of up to 64 items (which are packed into a Python integer and counted with int.bit_count),
+    and up to about 1.8 times as long for larger bundles (which are packed into 64-bit words).
+    To evaluate many bundles, or the same bundle for many agents, pack it once with BinaryValuationBitsets.pack
+    and pass the packed bits (a single popcount), or use BinaryValuationBitsets.values.
+    """
+
+    def __init__(self, bitsets:BinaryValuationBitsets, row:int):
+        # Valuation.__init__ is not called, since it stores the desired items in a set and a list.
+        self.bitsets = bitsets
+        self.row = row
+        self.total_value_cache = int(_popcount(self.bits).sum())
+        self._mms_cache = {}
+        self._bits_as_int = None
+
+    @property
+    def bits(self)->np.ndarray:
+        return self.bitsets.bits[self.row]
+
+    @property
+    def bits_as_int(self)->int:
+        """
+        The bits of this row as a single Python integer (bit j is set iff the agent desires item j). Computed on first use.
+        """
+        if self._bits_as_int is None:
+            self._bits_as_int = int.from_bytes(self.bits.astype("<u8").tobytes(), "little")
+        return self._bits_as_int
+
+    @property
+    def desired_items(self)->Set[Item]:
+        return set(self.desired_items_list)
+
+    @property
+    def desired_items_list(self)->List[Item]:
+        positions = np.flatnonzero(np.unpackbits(self.bits.view(np.uint8), bitorder="little")[:self.bitsets.num_of_items])
+        return sorted(self.bitsets.items[j] for j in positions)
+
+    def value(self, bundle:Bundle)->int:
+        """
+        Calculates the agent's value for the given set of goods, or for the packed bits of a bundle.
+
+        >>> bitsets = BinaryValuationBitsets([[1,0,1]], items="xyz")
+        >>> bitsets.valuations()[0].value(bitsets.pack({"x","y"}))
+        1
+        >>> bitsets = BinaryValuationBitsets([np.arange(200) % 3 == 0])     # agent wants items 0, 3, 6, ...
+        >>> a = bitsets.valuations()[0]
+        >>> a.value(range(100)), a.value(range(10)), a.value([0, 0, 3, 300])
+        (34, 4, 2)
+        """
+        if isinstance(bundle, np.ndarray):
+            return int(_popcount(self.bits & bundle).sum())
+        if not hasattr(bundle, "__len__"):
+            bundle = list(bundle)
+        if len(bundle) > 64:    # pack the bundle into 64-bit words and intersect them with the row
+            return int(_popcount(self.bits & self.bitsets.pack(bundle)).sum())
+        # A small bundle is packed into a Python integer, which is much cheaper than building a numpy array.
+        item_index = self.bitsets.item_index
+        mask = 0
+        for item in bundle:
+            j = item_index.get(item)
+            if j is not None:
+                mask |= 1 << j
+        return _int_popcount((self._bits_as_int if self._bits_as_int is not None else self.bits_as_int) & mask)
+
+
+def _pack_bits(matrix:np.ndarray)->np.ndarray:
+    """
+    Packs each row of a boolean matrix into 64-bit words: column j goes to bit (j mod 64) of word (j div 64).
+
+    >>> _pack_bits(np.array([[True, False, True], [False]*3]))
+    array([[5],
+           [0]], dtype=uint64)
+    """
+    num_of_words = (matrix.shape[1] + 63) // 64
+    packed = np.packbits(matrix, axis=1, bitorder="little")
+    padded = np.zeros((matrix.shape[0], 8*num_of_words), dtype=np.uint8)
+    padded[:, :packed.shape[1]] = packed
+    return padded.view("<u8").astype(np.uint64, copy=False)
+
+
+# The number of set bits in a non-negative Python integer (int.bit_count exists since Python 3.10).
+_int_popcount = int.bit_count if hasattr(int, "bit_count") else (lambda number: bin(number).count("1"))
+
+
+def _popcount(words:np.ndarray)->np.ndarray:
+    """
+    :return: the number of set bits in each 64-bit word.
+
+    >>> _popcount(np.array([0, 5, 2**64-1], dtype=np.uint64)).tolist()
+    [0, 2, 64]
+    """
+    if hasattr(np, "bitwise_count"):   # numpy >= 2.0
+        return np.bitwise_count(words)
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return np.unpackbits(words.view(np.uint8)).reshape(words.shape + (64,)).sum(axis=-1)
+
+
+MAXIMIN_SEARCH_NODE_LIMIT = 20000    # nodes of complete-greedy search before falling back to integer programming
+
+def maximin_partition(numbins:int, items:List[Item], valueof:Callable[[Item],float]) -> Tuple[List[List[Item]], float]:
+    """
+    Finds a partition of the items into numbins bundles, that maximizes the value of the least valuable bundle.
+
+    The value of the least valuable bundle is at most
+        min( total / numbins, total - [sum of the numbins-1 most valuable items] ),
+    rounded down when all values are integers. Fast heuristics are tried first: greedy (LPT) and Karmarkar-Karp;
+    if one of them reaches this upper bound, its partition is optimal and is returned.
+    Otherwise, a complete-greedy branch-and-bound search, limited to MAXIMIN_SEARCH_NODE_LIMIT nodes,
+    looks for a better partition. Integer programming is used only when the search is cut off by the limit.
+
+    :param numbins: number of bundles in the partition.
+    :param items: a list of items.
+    :param valueof: maps each item to its value.
+    :return: the bundles (from the least to the most valuable), and the value of the least valuable bundle.
+
+    >>> values = {"a": 1, "b": 2, "c": 4, "d": 8, "e": 16, "f": 32}
+    >>> (bundles, value) = maximin_partition(3, list(values), values.get)   # greedy is optimal
+    >>> [sorted(bundle) for bundle in bundles], value
+    ([['a', 'b', 'c', 'd'], ['e'], ['f']], 15.0)
+    >>> maximin_partition(2, [5, 5, 4, 3, 3], lambda x:x)   # greedy and Karmarkar-Karp find only 9
+    ([[5, 5], [4, 3, 3]], 10.0)
+    >>> maximin_partition(2, [3, 3, 3, 3, 3], lambda x:x)[1]   # the upper bound 7 is not attainable
+    6.0
+    >>> maximin_partition(3, [1, 2], lambda x:x)[1]
+    0.0
+    """
+    import prtpy
+    sorted_items = sorted(items, key=valueof, reverse=True)
+    values = [valueof(item) for item in sorted_items]
+    if all(value >= 0 for value in values):   # the upper bound holds only for goods
+        total = sum(values)
+        upper_bound = min(total/numbins, total - sum(values[:numbins-1]))
+        if all(float(value).is_integer() for value in values):
+            upper_bound = math.floor(upper_bound)
+        best_bins = None
+        for algorithm in [prtpy.partitioning.greedy, prtpy.partitioning.karmarkar_karp]:
+            bins = prtpy.partition(algorithm=algorithm, numbins=numbins, items=items, valueof=valueof, outputtype=prtpy.out.PartitionAndSums)
+            if min(bins.sums) >= upper_bound:
+                return _bundles_by_value(bins.lists, bins.sums)
+            if best_bins is None or min(bins.sums) > min(best_bins.sums):
+                best_bins = bins
+        (bin_of_item, complete) = _complete_greedy_maximin(values, numbins, min(best_bins.sums), upper_bound, MAXIMIN_SEARCH_NODE_LIMIT)
+        if complete and bin_of_item is None:   # the search proved that no partition is better than the heuristic one
+            return _bundles_by_value(best_bins.lists, best_bins.sums)
+        if complete:
+            lists = [[item for item,bin in zip(sorted_items, bin_of_item) if bin==i] for i in range(numbins)]
+            return _bundles_by_value(lists, [sum(valueof(item) for item in bundle) for bundle in lists])
+    bins = prtpy.partition(
+        algorithm=prtpy.partitioning.integer_programming,
+        numbins=numbins,
+        items=items,
+        valueof=valueof,
+        objective=prtpy.obj.MaximizeSmallestSum,
+        outputtype=prtpy.out.PartitionAndSums
+    )
+    return _bundles_by_value(bins.lists, bins.sums)
+
+
+def _complete_greedy_maximin(values:List[float], numbins:int, lower_bound:float, upper_bound:float, node_limit:int) -> Tuple[List[int], bool]:
+    """
+    Complete-greedy branch-and-bound search (Korf, 1998) for a partition whose smallest bin sum is as large as possible.
+    Each item, from the most to the least valuable, is tried in every bin, smallest sum first;
+    bins with equal sums are tried once, and a branch is pruned when the remaining items cannot fill
+    all bins above the best smallest sum found so far.
+    :param values: the item values, in descending order.
+    :param lower_bound: the smallest sum of a known partition; only better partitions are reported.
+    :param upper_bound: the search stops as soon as it finds a partition whose smallest sum reaches this bound.
+    :return: the bin of each item in the best partition found (or None if none is better than lower_bound),
+             and whether this partition is optimal (False if the search was cut off after node_limit nodes).
+
+    >>> _complete_greedy_maximin([5, 5, 4, 3, 3], 2, 9, 10, 100)
+    ([0, 0, 1, 1, 1], True)
+    >>> _complete_greedy_maximin([3, 3, 3, 3, 3], 2, 6, 7, 100)
+    (None, True)
+    >>> _complete_greedy_maximin([3, 3, 3, 3, 3], 2, 6, 7, 5)
+    (None, False)
+    """
+    remaining_values = list(itertools.accumulate(reversed(values), initial=0))[::-1]
+    best = lower_bound
+    best_bin_of_item = None
+    stack = [((0,)*numbins, 0, None)]    # (the bin sums, the number of assigned items, the path of bins chosen so far)
+    for _ in range(node_limit):
+        if len(stack)==0:
+            return (best_bin_of_item, True)
+        (sums, depth, path) = stack.pop()
+        if min(sums) <= best and sum(max(0, best-bin_sum) for bin_sum in sums) >= remaining_values[depth]:
+            continue
+        if depth==len(values):
+            best = min(sums)
+            best_bin_of_item = []
+            while path is not None:
+                (bin, path) = path
+                best_bin_of_item.append(bin)
+            best_bin_of_item.reverse()
+            if best >= upper_bound:
+                return (best_bin_of_item, True)
+            continue
+        bins = sorted(set(sums), reverse=True)   # pushed in descending order, so that the smallest bin is popped first
+        for bin_sum in bins:
+            bin = sums.index(bin_sum)
+            new_sums = sums[:bin] + (bin_sum+values[depth],) + sums[bin+1:]
+            stack.append((new_sums, depth+1, (bin, path)))
+    return (best_bin_of_item, len(stack)==0)
+
+
+def _bundles_by_value(lists:List[List[Item]], sums:List[float]) -> Tuple[List[List[Item]], float]:
+    order = sorted(range(len(sums)), key=lambda i: sums[i])
+    return ([lists[i] for i in order], float(sums[order[0]]))
+
+
+
+def _submask_pairs(num_of_bits:int) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    :return: two arrays (supersets, subsets) listing all 3^num_of_bits pairs of bitmasks T subseteq S < 2^num_of_bits,
+             sorted by S.
+
+    >>> [(int(S),int(T)) for S,T in zip(*_submask_pairs(2))]
+    [(0, 0), (1, 0), (1, 1), (2, 0), (2, 2), (3, 0), (3, 1), (3, 2), (3, 3)]
+    """
+    supersets = np.zeros(1, dtype=np.int64)
+    subsets = np.zeros(1, dtype=np.int64)
+    for bit in range(num_of_bits):
+        supersets = np.concatenate([supersets, supersets | (1<<bit), supersets | (1<<bit)])
+        subsets = np.concatenate([subsets, subsets, subsets | (1<<bit)])
+    order = np.argsort(supersets, kind="stable")
+    return (supersets[order], subsets[order])
+
+
+def _maximin_value_of_subsets(values:np.ndarray, num_of_bits:int, c:int) -> float:
+    """
+    Computes the maximin value of a partition of all items into c bundles, where values[mask] is the value of the bundle with bitmask mask.
+    Uses the recursion  f_1 = values,  f_k[S] = max [T subseteq S] min(values[T], f_{k-1}[S - T]),
+    vectorized by splitting each mask into a high half, enumerated in Python, and a low half, handled by numpy.
+
+    >>> _maximin_value_of_subsets(np.array([0, 1, 2, 4]), 2, 2)
+    1
+    >>> _maximin_value_of_subsets(np.array([0, 3, 3, 6, 3, 6, 6, 9]), 3, 2)   # three goods of value 3
+    3
+    """
+    full = (1<<num_of_bits) - 1
+    low_bits = (num_of_bits+1)//2
+    (low_supersets, low_subsets) = _submask_pairs(low_bits)
+    low_starts = np.flatnonzero(np.r_[True, low_supersets[1:] != low_supersets[:-1]])
+    (high_supersets, high_subsets) = _submask_pairs(num_of_bits - low_bits)
+    previous = values
+    for _ in range(c-2):
+        current = np.full(len(values), values.min(), dtype=values.dtype)   # every candidate is at least the smallest value
+        for (high_superset, high_subset) in zip(high_supersets.tolist(), high_subsets.tolist()):
+            subsets = (high_subset << low_bits) | low_subsets
+            complements = ((high_superset ^ high_subset) << low_bits) | (low_supersets ^ low_subsets)
+            best = np.maximum.reduceat(np.minimum(values[subsets], previous[complements]), low_starts)
+            block = slice(high_superset << low_bits, (high_superset+1) << low_bits)
+            current[block] = np.maximum(current[block], best)
+        previous = current
+    if c == 1:
+        return values[full].item()
+    subsets = np.arange(len(values))
+    return np.minimum(values[subsets], previous[full ^ subsets]).max().item()
+
+
+def _value_except_c_goods_table(values:np.ndarray, num_of_bits:int, c:int, choose:Callable, tables:Dict[int,np.ndarray]) -> np.ndarray:
+    """
+    Computes (and memoizes in tables) the value of every bundle after removing its best (choose=np.minimum)
+    or worst (choose=np.maximum) c goods; bundles with at most c goods get 0. Uses the recursion
+        E_0 = values,  E_c[S] = choose [i in S] E_{c-1}[S - i].
+
+    >>> _value_except_c_goods_table(np.array([0, 1, 2, 4]), 2, 1, np.minimum, {}).tolist()
+    [0, 0, 0, 1]
+    >>> _value_except_c_goods_table(np.array([0, 1, 2, 4]), 2, 1, np.maximum, {}).tolist()
+    [0, 0, 0, 2]
+    """
+    if c == 0:
+        return values
+    if c not in tables:
+        previous = _value_except_c_goods_table(values, num_of_bits, c-1, choose, tables)
+        masks = np.arange(len(values))
+        table = values.copy()
+        sizes = np.zeros(len(values), dtype=np.int64)   # the number of goods in each bundle
+        for bit in range(num_of_bits):
+            has_bit = (masks >> bit) & 1 == 1
+            candidates = previous[masks ^ (1<<bit)]
+            table = np.where(has_bit & (sizes==0), candidates, np.where(has_bit, choose(table, candidates), table))
+            sizes += has_bit
+        tables[c] = np.where(sizes <= c, 0, table)
+    return tables[c]
+
+
+def _issparse(matrix)->bool:
+    """
+    Same as scipy.sparse.issparse, without importing scipy.sparse (a sparse matrix can exist only if it was already imported).
+    """
+    sparse = sys.modules.get("scipy.sparse")
+    return sparse is not None and sparse.issparse(matrix)
+
+def _names_path(path:str)->str:
+    return path + ".names.json"
+
+def _select_names(names:list, positions:np.ndarray)->list:
+    """
+    :return: the names at the given positions, or None if there are no names.
+    """
+    return None if names is None else [names[position] for position in positions]
+
+def _save_matrix(path:str, matrix, agent_names:list=None, object_names:list=None):
+    """
+    Saves a 2-dimensional matrix to the given path: a dense matrix in .npy format, a sparse matrix in .npz format.
+    The agent and object names, if any, are saved in a sidecar JSON file next to it.
+    """
+    with open(path, "wb") as file:
+        if _issparse(matrix):
+            import scipy.sparse
+            scipy.sparse.save_npz(file, scipy.sparse.csr_matrix(matrix))
+        else:
+            np.save(file, np.asarray(matrix))
+    if agent_names is not None or object_names is not None:
+        with open(_names_path(path), "w") as file:
+            json.dump({"agents": agent_names, "objects": object_names}, file)
+    elif os.path.exists(_names_path(path)):
+        os.remove(_names_path(path))
+
+def _open_matrix(path:str, mmap:bool=True, mode:str="c"):
+    """
+    Opens a matrix saved by _save_matrix.
+
+    :param mmap: if True, a dense matrix is returned as an np.memmap, so that its values are read from the file only on demand,
+                 and several processes that open the same file share its pages.
+                 A sparse matrix is always read into memory.
+    :param mode: the mmap mode: "r" for read-only, "r+" for writing into the file, "c" (default) for copy-on-write.
+    :return: (matrix, agent_names, object_names).
+    """
+    if zipfile.is_zipfile(path):
+        import scipy.sparse
+        matrix = scipy.sparse.load_npz(path)
+    else:
+        matrix = np.load(path, mmap_mode=mode if mmap else None)
+    agent_names = object_names = None
+    if os.path.exists(_names_path(path)):
+        with open(_names_path(path)) as file:
+            names = json.load(file)
+        (agent_names, object_names) = (names["agents"], names["objects"])
+    return (matrix, agent_names, object_names)
+
+
 class ValuationMatrix:
     """
     A valuation matrix is a matrix v in which each row represents an agent, 
@@ -654,6 +1223,8 @@ class ValuationMatrix:
     >>> v.without_object(1)
     [[1 7]
      [6 0]]
+    >>> v.without_agent(0).without_object(1).agent_ids, v.without_object(1).object_ids    # the ids of the remaining agents and objects in v
+    (array([1]), array([0, 2]))
     >>> v = ValuationMatrix(np.ones([2,3]))        # Initialize from a numpy array.
     >>> v
     [[1. 1. 1.]
@@ -664,12 +1235,41 @@ class ValuationMatrix:
     >>> v2
     [[1. 1. 1.]
      [1. 1. 1.]]
+    >>> import scipy.sparse
+    >>> type(ValuationMatrix(scipy.sparse.csr_matrix([[1,0],[0,1]]))).__name__   # a sparse input gives a sparse valuation matrix
+    'SparseValuationMatrix'
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), "instance.npy")
+    >>> ValuationMatrix([[1,4,7],[6,3,0]]).save(path, agent_names=["Alice","George"], object_names=["x","y","z"])
+    >>> v = ValuationMatrix.open(path)      # memory-mapped: the values are read from the file on demand
+    >>> type(v._v).__name__, v.agent_names, v.object_names
+    ('memmap', ['Alice', 'George'], ['x', 'y', 'z'])
+    >>> v
+    [[1 4 7]
+     [6 3 0]]
+    >>> w = v.without_agent(0).without_object(1)    # the names of the remaining agents and objects are kept
+    >>> w.agent_names, w.object_names
+    (['George'], ['x', 'z'])
+    >>> type(SparseValuationMatrix.open(path)).__name__
+    'SparseValuationMatrix'
     """
 
+    agent_names: list = None      # optional names of the agents (rows), e.g. when opened from a file.
+    object_names: list = None     # optional names of the objects (columns).
+
+    def __new__(cls, valuation_matrix=None, *args, **kwargs):
+        if cls is ValuationMatrix and (_issparse(valuation_matrix) or isinstance(valuation_matrix, SparseValuationMatrix)):
+            cls = SparseValuationMatrix
+        elif cls is ValuationMatrix and isinstance(valuation_matrix, ValuationMatrixView):
+            cls = ValuationMatrixView
+        return super().__new__(cls)
+
     def __init__(self, valuation_matrix: np.ndarray):
         if isinstance(valuation_matrix, list):
             valuation_matrix = np.array(valuation_matrix)
         elif isinstance(valuation_matrix, ValuationMatrix):
+            (self.agent_names, self.object_names) = (valuation_matrix.agent_names, valuation_matrix.object_names)
             valuation_matrix = valuation_matrix._v
 
         self._v = valuation_matrix
@@ -696,31 +1296,73 @@ class ValuationMatrix:
         else:
             return sum([self._v[agent][object] for object in bundle])
 
+    def agent_bundle_value_matrix(self, allocation, num_of_bundles:int=None)->np.ndarray:
+        """
+        Calculates the value of every agent for every bundle of the given allocation, in a single matrix product.
+        :param allocation: either a 1-dimensional array that maps each object to the index of its bundle (negative = unallocated),
+           or a 2-dimensional (bundles x objects) 0/1 or fractional matrix.
+        :param num_of_bundles: the number of bundles when the allocation is an index array; default is the number of agents.
+        :return: a matrix U in which each row is an agent, each column is a bundle, and U[i,j] is the value of agent i to bundle j.
+
+        >>> v = ValuationMatrix([[1,4,7],[6,3,0]])
+        >>> v.agent_bundle_value_matrix([0,1,0])
+        array([[8., 4.],
+               [6., 3.]])
+        >>> v.agent_bundle_value_matrix([[1,0,1],[0,1,0]])  # equivalent to the above
+        array([[8., 4.],
+               [6., 3.]])
+        >>> v.agent_bundle_value_matrix([-1,1,1])
+        array([[ 0., 11.],
+               [ 0.,  3.]])
+        >>> v.agent_bundle_value_matrix([[0.5,0,0.5]])
+        array([[4.],
+               [3.]])
+        """
+        if num_of_bundles is None:
+            num_of_bundles = self.num_of_agents
+        bundle_matrix = allocation_to_matrix(allocation, self.num_of_objects, num_of_bundles)
+        return self._v @ bundle_matrix.T
+
+
+    @property
+    def agent_ids(self)->np.ndarray:
+        """
+        :return: for each agent (row), its index in the original valuation matrix, from which this one was derived
+                 by without_agent, without_object and submatrix.
+        """
+        return np.arange(self.num_of_agents)
+
+    @property
+    def object_ids(self)->np.ndarray:
+        """
+        :return: for each object (column), its index in the original valuation matrix.
+        """
+        return np.arange(self.num_of_objects)
 
     def without_agent(self, agent:int)->'ValuationMatrix':
         """
-        :return a copy of this valuation matrix, in which the given agent is removed.
+        :return a view of this valuation matrix, in which the given agent is removed. The values are not copied.
         """
         if isinstance(agent,int):
-            return ValuationMatrix(np.delete(self._v, agent, axis=0))
+            return ValuationMatrixView(self._v, agent_names=self.agent_names, object_names=self.object_names).without_agent(agent)
         else:
             raise IndexError(f"agent index should be an integer, but it is {agent}")
             
 
     def without_object(self, object:int)->'ValuationMatrix':
         """
-        :return a copy of this valuation matrix, in which the given object is removed.
+        :return a view of this valuation matrix, in which the given object is removed. The values are not copied.
         """
         if isinstance(object,int):
-            return ValuationMatrix(np.delete(self._v, object, axis=1))
+            return ValuationMatrixView(self._v, agent_names=self.agent_names, object_names=self.object_names).without_object(object)
         else:
             raise IndexError(f"object index should be an integer, but it is {object}")
 
     def submatrix(self, agents: List[int], objects: List[int]):
         """
-        :return a submatrix of this valuation matrix, containing only specified agents and objects.
+        :return a view of this valuation matrix, containing only specified agents and objects. The values are not copied.
         """
-        return ValuationMatrix(self._v[np.ix_(agents, objects)])
+        return ValuationMatrixView(self._v, agent_names=self.agent_names, object_names=self.object_names).submatrix(agents, objects)
 
     def verify_ordered(self)->bool:
         """
@@ -735,8 +1377,8 @@ class ValuationMatrix:
         ValueError: Valuations of agent 1 are not ordered: [6 0 3]
         """
         for i in self.agents():
-            v_i = self._v[i]
-            if any(v_i[j] < v_i[j+1] for j in range(self.num_of_objects-1)):
+            v_i = self[i]
+            if np.any(np.asarray(v_i)[:-1] < np.asarray(v_i)[1:]):
                 raise ValueError(f"Valuations of agent {i} are not ordered: {v_i}")
 
     def total_values(self) -> np.ndarray:
@@ -764,22 +1406,22 @@ class ValuationMatrix:
         [[15 36  9]
          [40  4 16]]
         """
+        # A new array is assigned rather than writing in place, since views derived from this matrix
+        # (by without_agent, without_object and submatrix) may share its array.
         total_values = self.total_values()
         if issubclass(self._v.dtype.type, np.integer):
             new_total_value = np.lcm.reduce(total_values)
-            for i in self.agents():
-                self._v[i] *= (new_total_value // total_values[i])
+            self._v = self._v * (new_total_value // total_values)[:, np.newaxis]
             return new_total_value
         else:
-            for i in self.agents():
-                self._v[i] /= total_values[i]
+            self._v = self._v / total_values[:, np.newaxis]
             return 1
 
     def verify_normalized(self) -> int:
         """
         Check if total value of each agent is the same. Return total value.
         """
-        total_values = np.sum(self._v, axis=1)
+        total_values = self.total_values()
         if not np.allclose(total_values, total_values[0]):
             raise ValueError(f"Valuation matrix is not normalized. Total values: {total_values}")
         return total_values[0]
@@ -787,11 +1429,394 @@ class ValuationMatrix:
     def equals(self, other)->bool:
         return np.array_equal(self._v, other._v)
 
+    def save(self, path:str, agent_names:list=None, object_names:list=None):
+        """
+        Saves this valuation matrix to the given path (in .npy format; .npz for a sparse matrix).
+        The agent and object names (default: the names of this matrix, if any) are saved in the sidecar file path+".names.json".
+        """
+        _save_matrix(path, self._v,
+            self.agent_names if agent_names is None else list(agent_names),
+            self.object_names if object_names is None else list(object_names))
+
+    @classmethod
+    def open(cls, path:str, mmap:bool=True, mode:str="c")->'ValuationMatrix':
+        """
+        Opens a valuation matrix saved by `save`.
+
+        :param mmap: if True (default), the matrix is backed by an np.memmap, so opening is immediate, and several
+                     worker processes that open the same file share a single copy of it in memory.
+        :param mode: "c" (default) - copy-on-write: in-place changes (e.g. v[0][1] = 5) are private and never written to the file;
+                     "r" - read-only; "r+" - in-place changes are written to the file.
+                     normalize never writes to the file: it replaces the matrix by a normalized copy in memory.
+        """
+        (matrix, agent_names, object_names) = _open_matrix(path, mmap, mode)
+        valuation_matrix = cls(matrix)
+        (valuation_matrix.agent_names, valuation_matrix.object_names) = (agent_names, object_names)
+        return valuation_matrix
+
     def __repr__(self):
         return np.array2string (self._v, max_line_width=100)		
 
 
 
+class ValuationMatrixView(ValuationMatrix):
+    """
+    A valuation matrix made of some of the rows and columns of another (dense) valuation matrix, without copying the values.
+    It keeps the rows and columns of the underlying array, and the ids of the agents and objects in the original matrix.
+    Removing an agent or an object only updates these index arrays. The values are copied when the
+    matrix is needed as a whole (through _v), e.g. when it is normalized; this copy is private to the view.
+
+    >>> original = ValuationMatrix([[1,4,7,2],[6,3,0,5],[9,9,9,9]])
+    >>> v = original.without_agent(1).without_object(0)
+    >>> v
+    [[4 7 2]
+     [9 9 9]]
+    >>> int(v[1,2]), int(v.agent_value_for_bundle(0, [1,2])), v.total_values().tolist()
+    (9, 9, [13, 27])
+    >>> v.agent_ids, v.object_ids
+    (array([0, 2]), array([1, 2, 3]))
+    >>> u = original.without_object(0)      # indexing a view gives the same results as indexing a copy
+    >>> copy = ValuationMatrix(np.delete(original[:], 0, axis=1))
+    >>> keys = [(0,1), 1, slice(1,3), (slice(0,2), slice(1,3)), (slice(None), [1,2])]
+    >>> all(np.array_equal(u[key], copy[key]) for key in keys)
+    True
+    >>> u[0:2, 1:3]
+    array([[3, 0, 5]])
+    >>> w = v.submatrix([1], [2,0])
+    >>> w, w.agent_ids, w.object_ids
+    ([[9 9]], array([2]), array([3, 1]))
+    >>> (original.agent_names, original.object_names) = (["Alice","George","Dina"], ["w","x","y","z"])
+    >>> w = original.without_agent(1).without_object(0).submatrix([1], [2,0])    # the names are sliced like the ids
+    >>> w.agent_names, w.object_names
+    (['Dina'], ['z', 'x'])
+    >>> ValuationMatrix(w).agent_names
+    ['Dina']
+    >>> int(v.normalize())    # copy-on-write: the original matrix is not changed
+    351
+    >>> v
+    [[108 189  54]
+     [117 117 117]]
+    >>> original
+    [[1 4 7 2]
+     [6 3 0 5]
+     [9 9 9 9]]
+    >>> s = original.without_object(0)
+    >>> int(original.normalize())    # normalizing the original does not change views derived from it
+    252
+    >>> s
+    [[4 7 2]
+     [3 0 5]
+     [9 9 9]]
+    """
+
+    def __init__(self, valuation_matrix, rows:np.ndarray=None, columns:np.ndarray=None, agent_ids:np.ndarray=None, object_ids:np.ndarray=None,
+            agent_names:list=None, object_names:list=None):
+        """
+        :param valuation_matrix: the underlying 2-dimensional array, or another ValuationMatrixView (whose fields are shared).
+        :param rows, columns: the rows and columns of the underlying array that are in this view. Default: all of them.
+        :param agent_ids, object_ids: the ids of these rows and columns in the original matrix. Default: same as rows and columns.
+        :param agent_names, object_names: the names of the agents and objects in this view (optional).
+        """
+        if isinstance(valuation_matrix, ValuationMatrixView):
+            (agent_names, object_names) = (valuation_matrix.agent_names, valuation_matrix.object_names)
+            (valuation_matrix, rows, columns, agent_ids, object_ids) = (valuation_matrix._base, valuation_matrix._rows, valuation_matrix._columns, valuation_matrix._agent_ids, valuation_matrix._object_ids)
+        (self.agent_names, self.object_names) = (agent_names, object_names)
+        self._base = np.asarray(valuation_matrix)
+        self._rows = np.arange(self._base.shape[0]) if rows is None else np.asarray(rows, dtype=int)
+        self._columns = np.arange(self._base.shape[1]) if columns is None else np.asarray(columns, dtype=int)
+        self._agent_ids = self._rows if agent_ids is None else np.asarray(agent_ids, dtype=int)
+        self._object_ids = self._columns if object_ids is None else np.asarray(object_ids, dtype=int)
+        self._materialized = rows is None and columns is None   # True iff the view covers the whole underlying array, in order
+        self.num_of_agents = len(self._rows)
+        self.num_of_objects = len(self._columns)
+
+    @property
+    def _v(self)->np.ndarray:
+        if not self._materialized:
+            self._base = self._base[np.ix_(self._rows, self._columns)]
+            self._rows = np.arange(self.num_of_agents)
+            self._columns = np.arange(self.num_of_objects)
+            self._materialized = True
+        return self._base
+
+    @_v.setter
+    def _v(self, valuation_matrix:np.ndarray):
+        self._base = valuation_matrix
+        self._rows = np.arange(self.num_of_agents)
+        self._columns = np.arange(self.num_of_objects)
+        self._materialized = True
+
+    @property
+    def agent_ids(self)->np.ndarray:
+        return self._agent_ids
+
+    @property
+    def object_ids(self)->np.ndarray:
+        return self._object_ids
+
+    def __getitem__(self, key):
+        if self._materialized:
+            return super().__getitem__(key)
+        if isinstance(key,tuple):
+            if isinstance(key[0], (int,np.integer)) and isinstance(key[1], (int,np.integer)):
+                return self._base[self._rows[key[0]], self._columns[key[1]]]  # agent's value for a single object
+            return self[key[0]][key[1]]     # same as v._v[key[0]][key[1]] in ValuationMatrix
+        else:
+            return self._base[self._rows[key]][..., self._columns]
+
+    def agent_value_for_bundle(self, agent:int, bundle:Bundle)->float:
+        if self._materialized or bundle is None or isinstance(bundle,FractionalBundle):
+            return super().agent_value_for_bundle(agent, bundle)
+        return self._base[self._rows[agent], self._columns[list(bundle)]].sum()
+
+    def total_values(self) -> np.ndarray:
+        if self._materialized:
+            return super().total_values()
+        return self._base[np.ix_(self._rows, self._columns)].sum(axis=1)
+
+    def without_agent(self, agent:int)->'ValuationMatrixView':
+        if isinstance(agent,int):
+            remaining = np.delete(np.arange(self.num_of_agents), agent)
+            return self._subview(remaining, np.arange(self.num_of_objects))
+        else:
+            raise IndexError(f"agent index should be an integer, but it is {agent}")
+
+    def without_object(self, object:int)->'ValuationMatrixView':
+        if isinstance(object,int):
+            remaining = np.delete(np.arange(self.num_of_objects), object)
+            return self._subview(np.arange(self.num_of_agents), remaining)
+        else:
+            raise IndexError(f"object index should be an integer, but it is {object}")
+
+    def submatrix(self, agents: List[int], objects: List[int])->'ValuationMatrixView':
+        return self._subview(np.asarray(agents, dtype=int), np.asarray(objects, dtype=int))
+
+    def _subview(self, agents: np.ndarray, objects: np.ndarray)->'ValuationMatrixView':
+        """
+        :return a view of the given agents and objects (positions in this view), with their ids and names.
+        """
+        return ValuationMatrixView(self._base, self._rows[agents], self._columns[objects], self._agent_ids[agents], self._object_ids[objects],
+            _select_names(self.agent_names, agents), _select_names(self.object_names, objects))
+
+
+
+class SparseValuationMatrix(ValuationMatrix):
+    """
+    A valuation matrix stored in compressed sparse row (CSR) format, for instances in which most values are zero.
+    All operations work on the non-zero values only; the matrix is never converted to a dense array,
+    except when a single row is requested with v[i].
+
+    It can be initialized by a scipy.sparse matrix, a numpy array, a list of lists, or another ValuationMatrix.
+
+    >>> v = SparseValuationMatrix([[1,0,7,0],[0,3,0,0]])
+    >>> v
+    [[1 0 7 0]
+     [0 3 0 0]]
+    >>> int(v[0,2]), v[1]
+    (7, array([0, 3, 0, 0]))
+    >>> int(v.agent_value_for_bundle(0, [0,1,2])), int(v.agent_value_for_bundle(1, [0,2]))
+    (8, 0)
+    >>> float(v.agent_value_for_bundle(0, FractionalBundle([0.5,1,0.5,0])))
+    4.0
+    >>> v.total_values()
+    array([8, 3])
+    >>> v.agent_bundle_value_matrix([0,1,0,1]).toarray()
+    array([[8., 0.],
+           [0., 3.]])
+    >>> v.without_agent(0)
+    [[0 3 0 0]]
+    >>> v.without_object(1)
+    [[1 7 0]
+     [0 0 0]]
+    >>> v.submatrix([1,0], [2,1])
+    [[0 3]
+     [7 0]]
+    >>> v.equals(ValuationMatrix([[1,0,7,0],[0,3,0,0]]))
+    True
+    """
+
+    def __init__(self, valuation_matrix):
+        if isinstance(valuation_matrix, ValuationMatrix):
+            (self.agent_names, self.object_names) = (valuation_matrix.agent_names, valuation_matrix.object_names)
+            valuation_matrix = valuation_matrix._v
+        elif isinstance(valuation_matrix, list):
+            valuation_matrix = np.array(valuation_matrix)
+        import scipy.sparse
+        self._v = scipy.sparse.csr_matrix(valuation_matrix)
+        (self.num_of_agents, self.num_of_objects) = self._v.shape
+
+    def __getitem__(self, key):
+        if isinstance(key,tuple):
+            return self._v[key[0], key[1]]                # agent's value for a single object
+        else:
+            return self._v.getrow(key).toarray().ravel()  # agent's values for all objects, as a dense array
+
+    def nonzero_values(self, agent:int)->Tuple[np.ndarray, np.ndarray]:
+        """
+        :return: the objects with a stored value for the given agent, and their values.
+
+        >>> SparseValuationMatrix([[1,0,7,0],[0,3,0,0]]).nonzero_values(0)
+        (array([0, 2], dtype=int32), array([1, 7]))
+        """
+        start, end = self._v.indptr[agent], self._v.indptr[agent+1]
+        return (self._v.indices[start:end], self._v.data[start:end])
+
+    def agent_value_for_bundle(self, agent:int, bundle:Bundle)->float:
+        if bundle is None:
+            return 0
+        (objects, values) = self.nonzero_values(agent)
+        if isinstance(bundle,FractionalBundle):
+            return (values * np.asarray(bundle.fractions)[objects]).sum()
+        else:
+            return values[np.isin(objects, list(bundle))].sum()
+
+    def agent_bundle_value_matrix(self, allocation, num_of_bundles:int=None):
+        """
+        Calculates the value of every agent for every bundle of the given allocation, in a single sparse matrix product.
+        :param allocation: as in ValuationMatrix.agent_bundle_value_matrix; a 2-dimensional allocation may also be a scipy.sparse matrix.
+        :return: a scipy.sparse CSR matrix U in which each row is an agent, each column is a bundle, and U[i,j] is the value of agent i to bundle j.
+        """
+        if num_of_bundles is None:
+            num_of_bundles = self.num_of_agents
+        import scipy.sparse
+        if scipy.sparse.issparse(allocation) or np.ndim(allocation) == 2:
+            bundle_matrix = scipy.sparse.csr_matrix(allocation, dtype=float)
+        else:
+            allocation = np.asarray(allocation)
+            allocated = np.flatnonzero(allocation >= 0)
+            bundle_matrix = scipy.sparse.csr_matrix(
+                (np.ones(len(allocated)), (allocation[allocated], allocated)),
+                shape=(num_of_bundles, self.num_of_objects))
+        if bundle_matrix.shape[1] != self.num_of_objects:
+            raise ValueError(f"Allocation should have {self.num_of_objects} objects, but it has {bundle_matrix.shape[1]}")
+        return (self._v @ bundle_matrix.T).tocsr()
+
+    def without_agent(self, agent:int)->'SparseValuationMatrix':
+        """
+        :return a copy of this valuation matrix, in which the given agent is removed.
+        """
+        if isinstance(agent,int):
+            return self.submatrix(np.delete(np.arange(self.num_of_agents), agent), np.arange(self.num_of_objects))
+        else:
+            raise IndexError(f"agent index should be an integer, but it is {agent}")
+
+    def without_object(self, object:int)->'SparseValuationMatrix':
+        """
+        :return a copy of this valuation matrix, in which the given object is removed.
+        """
+        if isinstance(object,int):
+            return self.submatrix(np.arange(self.num_of_agents), np.delete(np.arange(self.num_of_objects), object))
+        else:
+            raise IndexError(f"object index should be an integer, but it is {object}")
+
+    def submatrix(self, agents: List[int], objects: List[int])->'SparseValuationMatrix':
+        """
+        :return a submatrix of this valuation matrix, containing only specified agents and objects.
+        """
+        (agents, objects) = (np.asarray(agents, dtype=int), np.asarray(objects, dtype=int))
+        submatrix = SparseValuationMatrix(self._v[agents][:, objects])
+        (submatrix.agent_names, submatrix.object_names) = (_select_names(self.agent_names, agents), _select_names(self.object_names, objects))
+        return submatrix
+
+    def total_values(self) -> np.ndarray:
+        return np.asarray(self._v.sum(axis=1)).ravel()
+
+    def normalize(self) -> float:
+        """
+        Normalize valuation matrix so that each agent has equal total value of all items.
+        In case of integer values they remain integer to avoid floating point inaccuracies.
+        :return the common value after normalization.
+
+        >>> v = SparseValuationMatrix([[5, 0, 15],[20, 0, 0]])
+        >>> int(v.normalize())
+        20
+        >>> v
+        [[ 5  0 15]
+         [20  0  0]]
+        >>> v = SparseValuationMatrix([[1., 0, 3],[0, 2, 0]])
+        >>> v.normalize()
+        1
+        >>> v
+        [[0.25 0.   0.75]
+         [0.   1.   0.  ]]
+
+        The matrix is replaced, not modified in place, so matrices that share its buffers are unchanged:
+        >>> import scipy.sparse
+        >>> m = scipy.sparse.csr_matrix([[1., 0, 3],[0, 2, 0]])
+        >>> v = SparseValuationMatrix(m)
+        >>> w = v.without_object(1)
+        >>> v.normalize()
+        1
+        >>> m.toarray()
+        array([[1., 0., 3.],
+               [0., 2., 0.]])
+        >>> w
+        [[1. 3.]
+         [0. 0.]]
+        """
+        import scipy.sparse
+        total_values = self.total_values()
+        row_of_value = np.repeat(np.arange(self.num_of_agents), np.diff(self._v.indptr))
+        if issubclass(self._v.dtype.type, np.integer):
+            new_total_value = np.lcm.reduce(total_values)
+            new_data = self._v.data * (new_total_value // total_values)[row_of_value]
+        else:
+            new_total_value = 1
+            new_data = self._v.data / total_values[row_of_value]
+        self._v = scipy.sparse.csr_matrix((new_data, self._v.indices.copy(), self._v.indptr.copy()), shape=self._v.shape)
+        return new_total_value
+
+    def equals(self, other)->bool:
+        import scipy.sparse
+        other = scipy.sparse.csr_matrix(other._v)
+        return self._v.shape == other.shape and (self._v != other).nnz == 0
+
+    def __repr__(self):
+        if self.num_of_agents * self.num_of_objects <= 10000:
+            return np.array2string(self._v.toarray(), max_line_width=100)
+        return f"<{self.num_of_agents}x{self.num_of_objects} sparse valuation matrix with {self._v.nnz} stored values>"
+
+
+
+def allocation_to_matrix(allocation, num_of_objects:int, num_of_bundles:int=None)->np.ndarray:
+    """
+    Converts an allocation to a (bundles x objects) float matrix, in which entry [j,o] is the fraction of object o in bundle j.
+    :param allocation: either a 1-dimensional array that maps each object to the index of its bundle (negative = unallocated),
+       or a 2-dimensional (bundles x objects) matrix, which is returned as is.
+    :param num_of_objects: the number of objects (columns).
+    :param num_of_bundles: the number of bundles (rows) when the allocation is an index array;
+       default is one more than the largest bundle index.
+
+    >>> allocation_to_matrix([1,0,1], 3)
+    array([[0., 1., 0.],
+           [1., 0., 1.]])
+    >>> allocation_to_matrix([1,-1,1], 3, num_of_bundles=3)
+    array([[0., 0., 0.],
+           [1., 0., 1.],
+           [0., 0., 0.]])
+    >>> allocation_to_matrix([[1,0],[0,1]], 2)
+    array([[1., 0.],
+           [0., 1.]])
+    """
+    allocation = np.asarray(allocation)
+    if allocation.ndim == 2:
+        if allocation.shape[1] != num_of_objects:
+            raise ValueError(f"Allocation matrix should have {num_of_objects} columns, but it has {allocation.shape[1]}")
+        return allocation.astype(float, copy=False)
+    elif allocation.ndim == 1:
+        if len(allocation) != num_of_objects:
+            raise ValueError(f"Allocation array should have {num_of_objects} entries, but it has {len(allocation)}")
+        if num_of_bundles is None:
+            num_of_bundles = int(allocation.max())+1 if len(allocation)>0 else 0
+        bundle_matrix = np.zeros([num_of_bundles, num_of_objects])
+        allocated = allocation >= 0
+        bundle_matrix[allocation[allocated], np.flatnonzero(allocated)] = 1
+        return bundle_matrix
+    else:
+        raise ValueError(f"Allocation should be a 1-dimensional index array or a 2-dimensional matrix, but it has {allocation.ndim} dimensions")
+
+
+
 if __name__ == "__main__":
     import doctest
     (failures,tests) = doctest.testmod(report=True)
@@ -20,22 +20,25 @@ DEFAULT_SOLVERS = [
 import logging
 logger = logging.getLogger(__name__)
 
-def solve(problem:cvxpy.Problem, solvers:List[Tuple[str, Dict]] = DEFAULT_SOLVERS):
+def solve(problem:cvxpy.Problem, solvers:List[Tuple[str, Dict]] = DEFAULT_SOLVERS, **solve_kwargs):
 	"""
 	Try to solve the given cvxpy problem using the given solvers, in order, until one succeeds.
     See here https://www.cvxpy.org/tutorial/advanced/index.html for a list of supported solvers.
 
 	:param solvers list of tuples. Each tuple is (name-of-solver, keyword-arguments-to-solver)
+	:param solve_kwargs: keyword arguments to cvxpy's problem.solve, for every solver (e.g. ignore_dpp).
+	:return the tuple of the solver that succeeded.
 	"""
 	is_solved=False
 	for (solver, solver_kwargs) in solvers:  # Try the first n-1 solvers.
 		try:
 			if solver==cvxpy.SCIPY:
-				problem.solve(solver=solver, scipy_options=dict(solver_kwargs))  # WARNING: solve changes both its arguments!
+				problem.solve(solver=solver, scipy_options=dict(solver_kwargs), **solve_kwargs)  # WARNING: solve changes both its arguments!
 			else:
-				problem.solve(solver=solver, **solver_kwargs)
+				problem.solve(solver=solver, **solver_kwargs, **solve_kwargs)
 			logger.info("Solver %s [%s] succeeds", solver, solver_kwargs)
 			is_solved = True
+			succeeded = (solver, solver_kwargs)
 			break
 		except cvxpy.SolverError as err:
 			logger.info("Solver %s [%s] fails: %s", solver, solver_kwargs, err)
@@ -45,6 +48,7 @@ def solve(problem:cvxpy.Problem, solvers:List[Tuple[str, Dict]] = DEFAULT_SOLVER
 		raise ValueError("Problem is infeasible")
 	elif problem.status == "unbounded":
 		raise ValueError("Problem is unbounded")
+	return succeeded
 
 def maximize(objective, constraints, solvers:list=DEFAULT_SOLVERS):
 	"""